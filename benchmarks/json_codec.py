@@ -0,0 +1,46 @@
+"""
+Decode cost of one paginated answer (100 pages with typical properties) by the available JSON codecs.
+`requests` is the old way (`Response.json()` with charset detection), others decode the response bytes.
+
+`python benchmarks/json_codec.py --repeat 200`
+"""
+import argparse
+import json
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from memory import raw_page  # noqa: E402
+from pytion.codec import codecs, orjson  # noqa: E402
+from pytion.query import make_response  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=200, help="number of decoded answers")
+    args = parser.parse_args()
+
+    answer = {"object": "list", "results": [raw_page(i) for i in range(100)], "next_cursor": None, "has_more": False}
+    content = json.dumps(answer).encode("utf-8")
+    print(f"answer: {len(content) / 1024:.0f} KiB, 100 results")
+
+    response = make_response("post", "https://api.notion.com/v1/databases/1/query", None, 200, "OK", {}, content)
+    cases = {"requests": response.json}
+    for name, cls in codecs.items():
+        if name == "orjson" and orjson is None:
+            print(f"{name:>10}: not installed")
+            continue
+        cases[name] = lambda codec=cls(): codec.loads(content)
+
+    baseline = None
+    for name, func in cases.items():
+        seconds = min(timeit.repeat(func, number=args.repeat, repeat=3)) / args.repeat
+        baseline = baseline or seconds
+        print(f"{name:>10}: {seconds * 1000:7.3f} ms per page, x{baseline / seconds:.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""
+Memory used by models of a synthetic large database (pages with typical properties) and its blocks.
+Answers are encoded before the measurement. Decoding of the answer and creation of models are measured
+(like `Request` does it), so the memory kept by `Model.raw` is counted too.
+
+The baseline is the same payload built with interning of annotations and partial users disabled
+(`__slots__` can not be disabled at runtime, so they are used in both columns).
+
+`python benchmarks/memory.py --pages 50000`
+"""
+import argparse
+import os
+import sys
+import tracemalloc
+from contextlib import contextmanager
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytion.codec as codec  # noqa: E402
+import pytion.models as models  # noqa: E402
+from pytion.models import BlockArray, PageArray, User  # noqa: E402
+
+
+USERS = [f"{i:032x}" for i in range(20)]
+
+
+def raw_user(i):
+    return {"object": "user", "id": USERS[i % len(USERS)]}
+
+
+def raw_rich_text(text):
+    return {
+        "type": "text",
+        "text": {"content": text, "link": None},
+        "annotations": {
+            "bold": False, "italic": False, "strikethrough": False,
+            "underline": False, "code": False, "color": "default"
+        },
+        "plain_text": text,
+        "href": None,
+    }
+
+
+def raw_page(i):
+    return {
+        "object": "page",
+        "id": f"{i:032x}",
+        "created_time": "2022-05-12T10:00:00.000Z",
+        "last_edited_time": "2022-05-12T10:00:00.000Z",
+        "created_by": raw_user(i),
+        "last_edited_by": raw_user(i + 1),
+        "cover": None,
+        "icon": None,
+        "parent": {"type": "database_id", "database_id": "0e9539099cff456d89e44684d6b6c701"},
+        "archived": False,
+        "properties": {
+            "Name": {"id": "title", "type": "title", "title": [raw_rich_text(f"Task {i}")]},
+            "Note": {"id": "nt", "type": "rich_text", "rich_text": [raw_rich_text("note"), raw_rich_text("more")]},
+            "Price": {"id": "pr", "type": "number", "number": i * 1.5},
+            "Done": {"id": "dn", "type": "checkbox", "checkbox": bool(i % 2)},
+            "Status": {"id": "st", "type": "select", "select": {"id": "1", "name": "Open", "color": "red"}},
+            "Tags": {"id": "tg", "type": "multi_select", "multi_select": [{"id": "2", "name": "a", "color": "blue"}]},
+            "Due": {"id": "du", "type": "date", "date": {"start": "2022-05-12", "end": None}},
+            "Owner": {"id": "ow", "type": "people", "people": [raw_user(i)]},
+            "Created by": {"id": "cb", "type": "created_by", "created_by": raw_user(i)},
+        },
+        "url": f"https://www.notion.so/{i:032x}",
+        "public_url": None,
+    }
+
+
+def raw_block(i):
+    return {
+        "object": "block",
+        "id": f"{i:032x}",
+        "parent": {"type": "page_id", "page_id": "878d628488d94894ab14f9b872cd6870"},
+        "created_time": "2022-05-12T10:00:00.000Z",
+        "last_edited_time": "2022-05-12T10:00:00.000Z",
+        "created_by": raw_user(i),
+        "last_edited_by": raw_user(i + 1),
+        "has_children": False,
+        "archived": False,
+        "type": "paragraph",
+        "paragraph": {"rich_text": [raw_rich_text(f"Paragraph {i}"), raw_rich_text(" end")], "color": "default"},
+    }
+
+
+@contextmanager
+def no_interning():
+    """Every rich text keeps its decoded annotations and every user is a new object"""
+    with mock.patch.object(models, "intern_annotations", lambda rich_text: rich_text), \
+            mock.patch.object(User, "intern", classmethod(lambda cls, data: cls(**data))):
+        yield
+
+
+def measure(build, raws):
+    body = codec.dumps({"object": "list", "results": raws, "next_cursor": None, "has_more": False})
+    del raws
+    tracemalloc.start()
+    result = build(codec.loads(body)["results"])
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, current
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--pages", type=int, default=50000, help="number of pages (and blocks)")
+    args = parser.parse_args()
+
+    print(f"{'':>10}  {'baseline':>12}  {'interned':>12}  {'saved':>6}  {'B per object':>12}")
+    for build, raw in ((PageArray, raw_page), (BlockArray, raw_block)):
+        with no_interning():
+            _, baseline = measure(build, [raw(i) for i in range(args.pages)])
+        _, size = measure(build, [raw(i) for i in range(args.pages)])
+        print(
+            f"{build.__name__:>10}  {baseline / 2 ** 20:8.1f} MiB  {size / 2 ** 20:8.1f} MiB  "
+            f"{1 - size / baseline:6.0%}  {baseline / args.pages:5.0f} -> {size / args.pages:<5.0f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
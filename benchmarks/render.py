@@ -0,0 +1,75 @@
+"""
+Export of a large page: `str(BlockArray)` (decode every block, join one string) against the streaming
+`pytion.render` of lazy blocks written to a file. Raw API dicts are built before the measurement.
+
+`python benchmarks/render.py --blocks 100000`
+"""
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from memory import raw_block  # noqa: E402
+from pytion.models import Block, BlockArray  # noqa: E402
+from pytion.render import render  # noqa: E402
+
+
+TYPES = ("paragraph", "heading_2", "bulleted_list_item", "to_do", "quote")
+
+
+def raw_blocks(count):
+    raws = []
+    for i in range(count):
+        raw = raw_block(i)
+        type_ = TYPES[i % len(TYPES)]
+        raw["type"] = type_
+        raw[type_] = raw.pop("paragraph")
+        raws.append(raw)
+    return raws
+
+
+def measure(export):
+    start = time.perf_counter()
+    export()
+    elapsed = time.perf_counter() - start
+    tracemalloc.start()
+    export()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--blocks", type=int, default=100000, help="number of blocks")
+    args = parser.parse_args()
+    raws = raw_blocks(args.blocks)
+
+    def joined():
+        with open(os.devnull, "w") as f:
+            f.write(str(BlockArray(raws)))
+
+    def streamed():
+        with open(os.devnull, "w") as f:
+            BlockArray(raws, lazy=True).render(f)
+
+    def streamed_iterator():
+        # like `render(no.pages.iter_block_children_recursive(...), f)`: one block at a time
+        with open(os.devnull, "w") as f:
+            render((Block(lazy=True, **raw) for raw in raws), f)
+
+    base = None
+    for name, export in (
+            ("str(BlockArray)", joined), ("BlockArray.render", streamed), ("render(iterator)", streamed_iterator),
+    ):
+        elapsed, peak = measure(export)
+        base = base or elapsed
+        print(f"{name:>16}: {elapsed:6.2f} s (x{base / elapsed:.1f}), peak {peak / 2 ** 20:7.1f} MiB")
+
+
+if __name__ == "__main__":
+    main()
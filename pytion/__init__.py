@@ -2,7 +2,7 @@ import logging
 from typing import Optional, Union
 
 import pytion.envs as envs
-from pytion.api import Notion
+from pytion.api import Notion, AsyncNotion
 from pytion.exceptions import *
 
 
@@ -1,31 +1,130 @@
 # -*- coding: utf-8 -*-
 from __future__ import annotations
 
+import asyncio
 import logging
-from typing import Optional, Union, Dict, List
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, Future, wait, FIRST_COMPLETED
+from contextlib import nullcontext
+from typing import Optional, Union, Dict, List, Tuple, Iterator, AsyncIterator, Iterable, Generator, Any
+from urllib.parse import unquote
 
 import pytion.envs as envs
-from pytion.query import Request, Filter, Sort
+from pytion.cache import ResponseCache, SQLiteStore
+from pytion.hooks import Hooks, caller_context, submit
+from pytion.diff import BlockOp, diff_blocks
+from pytion.query import Request, AsyncRequest, Filter, Sort, RetryPolicy
 from pytion.models import Database, Page, Block, BlockArray, PropertyValue, PageArray, LinkTo, RichTextArray, Property
 from pytion.models import ElementArray, User
 
 
 Models = Union[Database, Page, Block, BlockArray, PropertyValue, PageArray, ElementArray]
+# body of API method: yields kwargs of `Request.method()`, receives its answers and returns the result
+Calls = Generator[Dict[str, Any], Any, Any]
 logger = logging.getLogger(__name__)
 
 
+class BulkResult(object):
+    __slots__ = ("index", "row", "id", "error", "ambiguous")
+
+    def __init__(self, index: int, row: Union[Dict[str, Any], Page]):
+        """
+        Result of one row of `Element.page_create_many()`
+
+        :param index:   position of the row in the input
+        :param row:     the row itself (properties dict or Page)
+        .id             ID of the created page (None if failed)
+        .error          the exception if the page is not created (after all retries)
+        .ambiguous      True if the request failed after it was sent (read timeout, broken connection, 5xx),
+                        so the page may be created. Such rows are not sent again, check them before the next try
+        """
+        self.index = index
+        self.row = row
+        self.id: Optional[str] = None
+        self.error: Optional[Exception] = None
+        self.ambiguous = False
+
+    def fail(self, error: Exception) -> None:
+        self.error = error
+        self.ambiguous = RetryPolicy.is_ambiguous(error)
+        if self.ambiguous:
+            logger.warning(f"Row {self.index} may be created, the answer is lost: {error!r}")
+        else:
+            logger.warning(f"Row {self.index} is not created: {error!r}")
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None and self.id is not None
+
+    def __repr__(self):
+        if self.ok:
+            return f"BulkResult({self.index}, {self.id})"
+        return f"BulkResult({self.index}, {'ambiguous ' if self.ambiguous else ''}{self.error!r})"
+
+
 class Notion(object):
-    def __init__(self, token: Optional[str] = None, version: Optional[str] = None):
+    def __init__(
+            self, token: Optional[str] = None, version: Optional[str] = None,
+            rate_limit: Optional[float] = None, rate_burst: Optional[int] = None,
+            max_retries: Optional[int] = None, cache: Optional[ResponseCache] = None,
+            store: Optional[SQLiteStore] = None, pool_size: Optional[int] = None, keep_alive: Optional[bool] = None,
+            connect_timeout: Optional[float] = None, read_timeout: Optional[float] = None, warm_up: int = 0,
+            hooks: Optional[Hooks] = None,
+    ):
         """
         Creates main API object.
 
-        :param token:   provide your integration API token. If None - find the file `token`
-        :param version: provide non hardcoded API version
+        :param token:       provide your integration API token. If None - find the file `token`
+        :param version:     provide non hardcoded API version
+        :param rate_limit:  max requests per second of this object and all its Elements (0 = no limit)
+                            default is `envs.RATE_LIMIT`
+        :param rate_burst:  how many requests can be sent at once (default is `envs.RATE_LIMIT_BURST`)
+        :param max_retries: how many times to repeat a request failed with 429, 5xx or connection error
+                            default is `envs.RETRY_MAX`
+        :param cache:       `pytion.cache.ResponseCache` object to keep GET answers in memory (disabled by default)
+        :param store:       `pytion.cache.SQLiteStore` object to keep pages and blocks between restarts
+        :param pool_size:   max number of kept-alive connections, should not be less than number of threads
+                            sending requests at once (default is `envs.POOL_SIZE`)
+        :param keep_alive:  reuse connections between requests (default is `envs.KEEP_ALIVE`)
+        :param connect_timeout: seconds to wait for the connection (default is `envs.CONNECT_TIMEOUT`)
+        :param read_timeout:    seconds to wait for the answer (default is `envs.READ_TIMEOUT`)
+        :param warm_up:     number of connections to open right now (0 = open on the first requests)
+        :param hooks:       `pytion.hooks.Hooks` object with functions called on every request (`.hooks` attr)
+
+        `no = Notion(token, pool_size=8, warm_up=8, read_timeout=30)`
         """
         self.version = version if version else envs.NOTION_VERSION
-        self.session = Request(api=self, token=token)
+        self.session = Request(
+            api=self, token=token, rate_limit=rate_limit, rate_burst=rate_burst, max_retries=max_retries,
+            cache=cache, pool_size=pool_size, keep_alive=keep_alive, connect_timeout=connect_timeout,
+            read_timeout=read_timeout, hooks=hooks,
+        )
+        self.hooks = self.session.hooks
+        if warm_up:
+            self.session.warm_up(warm_up)
+        self.store = store
         logger.debug(f"API object created. Version {envs.NOTION_VERSION}")
 
+    def _run(self, calls: Calls) -> Any:
+        """
+        Sends the requests of the method body (see `Calls`) one by one and returns its result.
+        Errors of requests are thrown into the body, so it can handle them
+        """
+        answer, error = None, None
+        while True:
+            try:
+                request = calls.throw(error) if error is not None else calls.send(answer)
+            except StopIteration as e:
+                return e.value
+            answer, error = None, None
+            try:
+                answer = self.session.method(**request)
+            except Exception as e:
+                error = e
+
+    def _element(self, name: str, obj: Optional[Models] = None) -> Element:
+        return Element(self, name, obj)
+
     def search(
             self, query: Optional[str] = None, limit: int = 0,
             object_type: Optional[str] = None, sort_last_edited_time: Optional[str] = None
@@ -44,23 +143,54 @@ class Notion(object):
         `r = no.search("pytion", 10, sort_last_edited_time="ascending")`
         `print(r.obj)`
         """
-        data = {"query": query} if query else None
-        filter_ = Filter(raw={"property": "object", "value": object_type}) if object_type else None
-        if sort_last_edited_time:
-            sort_last_edited_time = Sort(property_name="last_edited_time", direction=sort_last_edited_time)
-        result = self.session.method(
-            "post", "search", sort=sort_last_edited_time, filter_=filter_, limit=limit, data=data
-        )
+        return self._run(self._search(query, limit, object_type, sort_last_edited_time))
+
+    def _search(
+            self, query: Optional[str], limit: int, object_type: Optional[str], sort_last_edited_time: Optional[str]
+    ) -> Calls:
+        result = yield dict(method="post", path="search", limit=limit, **self._search_args(
+            query, object_type, sort_last_edited_time
+        ))
         if "results" in result and isinstance(result["results"], list):
             data = ElementArray(result["results"])
+            pages = self._element("pages")
             for item in data:
                 if isinstance(item, Page):
-                    self.pages.get_page_properties(title_only=True, obj=item)
-            return Element(api=self, name="search", obj=data)
+                    yield from pages._get_page_properties(title_only=True, obj=item)
+            return self._element("search", data)
         else:
             logger.warning("Results list is not found")
             return None
 
+    @staticmethod
+    def _search_args(
+            query: Optional[str], object_type: Optional[str], sort_last_edited_time: Optional[str]
+    ) -> Dict[str, Any]:
+        data = {"query": query} if query else None
+        filter_ = Filter(raw={"property": "object", "value": object_type}) if object_type else None
+        if sort_last_edited_time:
+            sort_last_edited_time = Sort(property_name="last_edited_time", direction=sort_last_edited_time)
+        return {"data": data, "filter_": filter_, "sort": sort_last_edited_time}
+
+    def iter_search(
+            self, query: Optional[str] = None, page_size: int = 0,
+            object_type: Optional[str] = None, sort_last_edited_time: Optional[str] = None
+    ) -> Iterator[Union[Page, Database]]:
+        """
+        Generator version of `.search()`. Yields Page and Database objects as soon as every answer is received.
+
+        :param page_size:   0 < int < 100 - number of items in one request (0 = API default)
+
+        `for item in no.iter_search("pytion", object_type="page"):`
+            `print(item)`
+        """
+        args = self._search_args(query, object_type, sort_last_edited_time)
+        for result in self.session.iterate("post", "search", page_size=page_size, **args):
+            for item in ElementArray(result.get("results", [])):
+                if isinstance(item, Page):
+                    self.pages.get_page_properties(title_only=True, obj=item)
+                yield item
+
     def __len__(self):
         return 1
 
@@ -73,10 +203,15 @@ class Notion(object):
     def __getattr__(self, name):
         if name in dir(self):
             return self.name
-        return Element(self, name)
+        return self._element(name)
 
 
 class Element(object):
+    """
+    API methods of one endpoint (`no.pages`, `no.blocks` etc.).
+    Bodies of methods are generators (see `Calls`) shared with `AsyncElement`,
+    public methods only run them by `Notion` (sync) or `AsyncNotion` (async).
+    """
     class_map = {"page": Page, "database": Database, "block": Block, "user": User}
 
     def __init__(self, api: Notion, name: str, obj: Optional[Models] = None):
@@ -85,27 +220,50 @@ class Element(object):
         self.obj = obj
         logger.debug(f"Element {self!r} created")
 
-    def get(self, id_: str, _after_path: str = None, limit: int = 0) -> Element:
+    def _run(self, calls: Calls) -> Any:
+        return self.api._run(calls)
+
+    def _element(self, name: str, obj: Optional[Models] = None) -> Element:
+        return self.api._element(name, obj)
+
+    def get(
+            self, id_: str, _after_path: str = None, limit: int = 0, properties: Optional[List[str]] = None
+    ) -> Element:
         """
         Get Element by ID.
         .exceptions.ObjectNotFound exception if not found
 
+        :param properties:  IDs of page properties to be received (others are skipped by API)
         :return:    `Element.obj` may be `Page`, `Database`, `Block`
 
         result = no.databases.get("1234123412341")
         result = no.pages.get("123412341234")
+        result = no.pages.get("123412341234", properties=["title", "%3AUPp"])
         result = no.blocks.get("123412341234")
         result = no.users.get("123412341234")
         print(result.obj)
         """
+        return self._run(self._get(id_, _after_path, limit, properties))
+
+    def _get(
+            self, id_: str, _after_path: str = None, limit: int = 0, properties: Optional[List[str]] = None
+    ) -> Calls:
         if "-" in id_:
             id_ = id_.replace("-", "")
-        if not _after_path:
-            raw_obj = self.api.session.method(method="get", path=self.name, id_=id_, limit=limit)
-        else:
-            raw_obj = self.api.session.method(
-                method="get", path=self.name, id_=id_, after_path=_after_path, limit=limit
+        store = self.api.store
+        params = self._projection(properties)
+        if params:
+            raw_obj = yield dict(
+                method="get", path=self.name, id_=id_, after_path=_after_path, limit=limit, params=params
             )
+        elif not _after_path:
+            raw_obj = store.get(id_) if store is not None and store.max_age else None
+            if not raw_obj:
+                raw_obj = yield dict(method="get", path=self.name, id_=id_, limit=limit)
+                if store is not None and raw_obj["object"] in ("page", "database", "block"):
+                    store.put(raw_obj)
+        else:
+            raw_obj = yield dict(method="get", path=self.name, id_=id_, after_path=_after_path, limit=limit)
         if raw_obj["object"] == "list":
             if self.name == "pages":
                 self.obj = PageArray(raw_obj["results"])
@@ -117,6 +275,18 @@ class Element(object):
             self.obj = self.class_map[raw_obj["object"]](**raw_obj)
         return self
 
+    def _projection(self, properties: Optional[List[str]]) -> Optional[Dict[str, List[str]]]:
+        """
+        Query params to receive only chosen page properties.
+        Names are replaced by IDs if the Database is known (`self.obj`), IDs are sent as is
+        """
+        if not properties:
+            return None
+        schema = self.obj.properties if isinstance(self.obj, Database) else {}
+        ids = [schema[name].id if name in schema else name for name in properties]
+        # property IDs are url-encoded already
+        return {"filter_properties": [unquote(id_) for id_ in ids]}
+
     def get_parent(self, id_: Optional[str] = None) -> Optional[Element]:
         """
         Get parent object of current object if possible.
@@ -131,10 +301,13 @@ class Element(object):
         `print(result)`
         Notion/databases/Database(Some database name)
         """
+        return self._run(self._get_parent(id_))
+
+    def _get_parent(self, id_: Optional[str] = None) -> Calls:
         if not self.obj:
-            self.get(id_)
+            yield from self._get(id_)
         if getattr(self.obj, "parent", None):
-            return self.from_linkto(self.obj.parent)
+            return (yield from self._from_linkto(self.obj.parent))
         logger.warning(f"Parent object can not be found")
         return None
 
@@ -162,26 +335,93 @@ class Element(object):
 
         BlockArray or Database object expected.
         """
+        return self._run(self._get_block_children(id_, block, limit))
+
+    def _get_block_children(self, id_: Optional[str], block: Optional[Block], limit: int) -> Calls:
+        parent = self._children_parent(id_, block)
+        if parent is None:
+            return None
+        if isinstance(parent, LinkTo):
+            return (yield from self._from_linkto(parent, limit=limit))
+        children = yield from self._get_children_raw(*parent, limit)
+        return self._element("blocks", BlockArray(children))
+
+    def _children_parent(
+            self, id_: Optional[str], block: Optional[Block]
+    ) -> Union[None, LinkTo, Tuple[str, Optional[str]]]:
+        """
+        (ID, last_edited_time) of the page or the block whose children are requested,
+        LinkTo of the database for `child_database` block, None if the Element can not have children
+        """
         if self.name not in ("blocks", "pages"):
             logger.warning("Only `blocks` or `pages` can have children")
             return None
         if isinstance(id_, str) and "-" in id_:
             id_ = id_.replace("-", "")
         obj = block if block else self.obj
+        if isinstance(obj, Block) and obj.type == "child_database":
+            return obj.children
         if obj:
-            return self.from_linkto(obj.children, limit=limit)
-        child = self.api.session.method(
-            method="get", path="blocks", id_=id_, after_path="children", limit=limit
-        )
-        # children object returns list of Blocks
-        if child["object"] != "list":
-            logger.warning(f"List of Blocks expected. Received\n{child}")
+            return obj.id, obj.raw.get("last_edited_time")
+        return id_, None
+
+    def iter_block_children(
+            self, id_: Optional[str] = None, block: Optional[Block] = None, page_size: int = 0
+    ) -> Iterator[Block]:
+        """
+        Generator version of `.get_block_children()`. Yields Block objects as soon as every answer is received.
+
+        :param id_:
+        :param block:       you can provide a Block object instead to get his children
+        :param page_size:   0 < int < 100 - number of blocks in one request (0 = API default)
+
+        `for block in no.blocks.iter_block_children("PAGE ID"):`
+            `print(block)`
+        """
+        args = self._iter_children_args(id_, block, page_size)
+        if args is None:
+            return
+        for child in self.api.session.iterate(**args):
+            for b in child.get("results", []):
+                yield Block(**b)
+
+    def _iter_children_args(self, id_: Optional[str], block: Optional[Block], page_size: int) -> Optional[Dict]:
+        if self.name not in ("blocks", "pages"):
+            logger.warning("Only `blocks` or `pages` can have children")
             return None
-        return Element(api=self.api, name="blocks", obj=BlockArray(child["results"]))
+        if isinstance(id_, str) and "-" in id_:
+            id_ = id_.replace("-", "")
+        obj = block if block else self.obj
+        if obj:
+            id_ = obj.id
+        return dict(method="get", path="blocks", id_=id_, after_path="children", page_size=page_size)
+
+    def iter_block_children_recursive(
+            self, id_: Optional[str] = None, max_depth: int = 10, block: Optional[Block] = None,
+            force: bool = False, _cur_depth: int = 0,
+    ) -> Iterator[Block]:
+        """
+        Generator version of `.get_block_children_recursive()`: yields blocks in the page order (depth first)
+        as soon as every answer is received. Only the current branch is kept in memory.
+
+        `with open("page.md", "w") as f:`
+            `render(no.pages.iter_block_children_recursive("PAGE ID"), f)`
+        """
+        if self.name not in ("blocks", "pages"):
+            logger.warning("Only `blocks` or `pages` can have children")
+            return
+        parent = block if block else (self.obj if isinstance(self.obj, (Page, Block)) else None)
+        for b in self._element("blocks").iter_block_children(id_, block=parent):
+            b._level = _cur_depth
+            yield b
+            if self._expandable(b, _cur_depth, max_depth, force) and b.type != "child_database":
+                yield from self.iter_block_children_recursive(
+                    block=b, max_depth=max_depth, force=force, _cur_depth=_cur_depth + 1
+                )
 
     def get_block_children_recursive(
         self, id_: Optional[str] = None, max_depth: int = 10, block: Optional[Block] = None,
-        _cur_depth: int = 0, limit: int = 0, force: bool = False
+        _cur_depth: int = 0, limit: int = 0, force: bool = False, workers: int = 0
     ) -> Optional[Element]:
         """
         Get children Block objects of current Block object (tabulated texts) if exist (else None) recursive
@@ -191,6 +431,8 @@ class Element(object):
         :param max_depth:   how deep use the recursion (block inside block inside block etc.)
         :param limit:       0 < int < 100 - max number of items to be returned (0 = return all)
         :param force:       get blocks in subpages too
+        :param workers:     number of threads to request children of different blocks concurrently
+                            (0 = one by one)
         :return:            `Element.obj` will be BlockArray object even nothing is found
 
         `print(no.blocks.get_block_children_recursive("PAGE ID").obj)`
@@ -199,33 +441,107 @@ class Element(object):
             block inside block
         some text
         """
-        if self.name not in ("blocks", "pages"):
-            logger.warning("Only `blocks` or `pages` can have children")
+        parent = self._children_parent(id_, block)
+        if parent is None:
             return None
-        if isinstance(id_, str) and "-" in id_:
-            id_ = id_.replace("-", "")
-        obj = block if block else self.obj
-        if obj:
-            id_ = obj.id
-            if isinstance(obj, Block) and obj.type == "child_database":
-                return self.from_linkto(obj.children)
-        child = self.api.session.method(
-            method="get", path="blocks", id_=id_, after_path="children", limit=limit
-        )
+        if isinstance(parent, LinkTo):
+            return self.from_linkto(parent)
+        if workers > 1:
+            ba = self._get_block_tree(*parent, max_depth, _cur_depth, limit, force, workers)
+        else:
+            ba = self._run(self._get_block_tree_by_one(*parent, max_depth, _cur_depth, limit, force))
+        return self._element("blocks", ba)
+
+    @staticmethod
+    def _expandable(block: Block, depth: int, max_depth: int, force: bool) -> bool:
+        # Do not get subpages if not force
+        return block.has_children and depth < max_depth and (block.type != "child_page" or force)
+
+    def _get_children_raw(self, id_: str, last_edited_time: Optional[str], limit: int = 0) -> Calls:
+        """
+        Raw children of the block or the page. With `Notion.store` they are requested only if the parent
+        is changed since the last request (its `last_edited_time` differs from the stored one).
+        """
+        store = self.api.store
+        if store is not None and not limit:
+            results = store.get_children(id_, last_edited_time)
+            if results is not None:
+                return results
+        results = (yield dict(method="get", path="blocks", id_=id_, after_path="children", limit=limit))["results"]
+        if store is not None and not limit:
+            store.put_children(id_, last_edited_time, results)
+        return results
+
+    def _get_block_tree_by_one(
+            self, id_: str, last_edited_time: Optional[str], max_depth: int, cur_depth: int, limit: int, force: bool
+    ) -> Calls:
         ba = BlockArray([])
-        for b in child["results"]:
-            block_obj = Block(level=_cur_depth, **b)
+        for b in (yield from self._get_children_raw(id_, last_edited_time, limit)):
+            block_obj = Block(level=cur_depth, **b)
             ba.append(block_obj)
-            # Do not get subpages if not force
-            if block_obj.type == "child_page" and not force:
-                continue
-            if block_obj.has_children and _cur_depth < max_depth:
-                sub_element = Element(api=self.api, name="blocks").get_block_children_recursive(
-                    id_=block_obj.id, max_depth=max_depth, _cur_depth=_cur_depth + 1, limit=limit, force=force
-                )
-                ba.extend(sub_element.obj)
+            if self._expandable(block_obj, cur_depth, max_depth, force):
+                ba.extend((yield from self._get_block_tree_by_one(
+                    block_obj.id, block_obj.raw.get("last_edited_time"), max_depth, cur_depth + 1, limit, force
+                )))
+        return ba
+
+    def _get_block_tree(
+            self, id_: str, last_edited_time: Optional[str], max_depth: int, cur_depth: int, limit: int,
+            force: bool, workers: int
+    ) -> BlockArray:
+        """
+        Concurrent implementation of `.get_block_children_recursive()`:
+        children of every found block are requested by the pool of `workers` threads as soon as it is found,
+        then the tree is flattened in the original order.
+        """
+        def fetch(block: Block) -> List[Dict]:
+            return self._run(self._get_children_raw(block.id, block.raw.get("last_edited_time"), limit))
+
+        children = {}
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            top = [Block(level=cur_depth, **b) for b in self._run(self._get_children_raw(id_, last_edited_time, limit))]
+            pending = {
+                self._submit(pool, fetch, b): (b, cur_depth)
+                for b in top if self._expandable(b, cur_depth, max_depth, force)
+            }
+            try:
+                while pending:
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        parent, depth = pending.pop(future)
+                        blocks = [Block(level=depth + 1, **b) for b in future.result()]
+                        children[parent.id] = blocks
+                        for b in blocks:
+                            if self._expandable(b, depth + 1, max_depth, force):
+                                pending[self._submit(pool, fetch, b)] = (b, depth + 1)
+            except Exception:
+                for future in pending:
+                    future.cancel()
+                raise
+        return self._flatten_tree(top, children)
+
+    @staticmethod
+    def _flatten_tree(top: List[Block], children: Dict[str, List[Block]]) -> BlockArray:
+        ba = BlockArray([])
+
+        def flatten(blocks: List[Block]) -> None:
+            for b in blocks:
+                ba.append(b)
+                if b.id in children:
+                    flatten(children[b.id])
+
+        flatten(top)
+        return ba
 
-        return Element(api=self.api, name="blocks", obj=ba)
+    def _submit(self, pool: ThreadPoolExecutor, func, *args) -> Future:
+        # with hooks, requests of the worker are reported with the method called by user (`RequestEvent.caller`)
+        if self.api.hooks:
+            return submit(pool, func, *args)
+        return pool.submit(func, *args)
+
+    def _caller_context(self):
+        # the same for asyncio tasks created inside
+        return caller_context() if self.api.hooks else nullcontext()
 
     def get_page_property(self, property_id: str, id_: Optional[str] = None, limit: int = 0) -> Optional[Element]:
         """
@@ -243,6 +559,9 @@ class Element(object):
         `print(result.obj)`
         2021-11-04 16:47:00+00:00
         """
+        return self._run(self._get_page_property(property_id, id_, limit))
+
+    def _get_page_property(self, property_id: str, id_: Optional[str] = None, limit: int = 0) -> Calls:
         if self.name != "pages":
             logger.warning("Only `pages` can have properties")
             return None
@@ -250,30 +569,34 @@ class Element(object):
             id_ = id_.replace("-", "")
         if self.obj and not id_:
             id_ = self.obj.id
-        property_obj = self.api.session.method(
+        property_obj = yield dict(
             method="get", path=self.name, id_=id_, after_path="properties/"+property_id, limit=limit
         )
-        return Element(api=self.api, name=f"pages/{id_}/properties", obj=PropertyValue(property_obj, property_id))
+        return self._element(f"pages/{id_}/properties", PropertyValue(property_obj, property_id))
 
     def get_page_properties(self, title_only: bool = False, obj: Optional[Page] = None) -> None:
         """
-        Page properties must be retrieved using the page properties endpoint. (c)
-        after retrieving a Page object you can retrieve its properties
+        Page object (from page, query or search answer) already contains values of its properties.
+        The page properties endpoint is requested only for values truncated by API
+        (`title`, `rich_text`, `relation`, `people`, `rollup` with 25+ items). See `PropertyValue.truncated`
 
         obj or self.obj must be a Page
         :return:
         """
+        return self._run(self._get_page_properties(title_only, obj))
+
+    def _get_page_properties(self, title_only: bool = False, obj: Optional[Page] = None) -> Calls:
         if not obj:
             obj = self.obj
         if obj and isinstance(obj, Page):
             for prop in obj.properties:
                 # Skip already retrieved properties
-                if isinstance(obj.properties[prop], PropertyValue):
+                if isinstance(obj.properties[prop], PropertyValue) and not obj.properties[prop].truncated:
                     continue
                 prop_id = obj.properties[prop].id
                 if title_only and prop_id != "title":
                     continue
-                result = self.get_page_property(prop_id, id_=obj.id)
+                result = yield from self._get_page_property(prop_id, id_=obj.id)
                 obj.properties[prop] = result.obj
                 if prop_id == "title":
                     obj.title = result.obj.value if result.obj.value else ""
@@ -286,8 +609,40 @@ class Element(object):
             limit: int = 0,
             filter_: Optional[Filter] = None,
             sorts: Optional[Sort] = None,
+            properties: Optional[List[str]] = None,
             **kwargs,
     ) -> Optional[Element]:
+        """
+        :param limit:       0 < int < 100 - max number of items to be returned (0 = return all)
+        :param properties:  names (if the Database is received before) or IDs of properties to be received,
+                            other properties are skipped by API
+        :return:            self.obj -> PageArray
+
+        `pages = no.databases.get("DATABASE ID").db_query(properties=["Name", "Status"])`
+        """
+        return self._run(self._db_query(id_, limit, filter_, sorts, properties))
+
+    def _db_query(
+            self,
+            id_: Optional[str] = None,
+            limit: int = 0,
+            filter_: Optional[Filter] = None,
+            sorts: Optional[Sort] = None,
+            properties: Optional[List[str]] = None,
+            **kwargs,
+    ) -> Calls:
+        args = self._query_args(id_, filter_, sorts, properties)
+        if args is None:
+            return None
+        r = yield dict(args, limit=limit)
+        if r["object"] != "list":
+            return None
+        return self._element("pages", PageArray(r["results"]))
+
+    def _query_args(
+            self, id_: Optional[str], filter_: Optional[Filter], sorts: Optional[Sort],
+            properties: Optional[List[str]] = None,
+    ) -> Optional[Dict]:
         if self.name != "databases":
             logger.warning("Only `databases` can be queried")
             return None
@@ -295,13 +650,85 @@ class Element(object):
             id_ = id_.replace("-", "")
         if self.obj:
             id_ = self.obj.id
-        r = self.api.session.method(
+        return dict(
             method="post", path=self.name, id_=id_, after_path="query",
-            data={}, limit=limit, filter_=filter_, sorts=sorts
+            data={}, filter_=filter_, sorts=sorts, params=self._projection(properties)
+        )
+
+    def iter_db_query(
+            self,
+            id_: Optional[str] = None,
+            page_size: int = 0,
+            filter_: Optional[Filter] = None,
+            sorts: Optional[Sort] = None,
+            properties: Optional[List[str]] = None,
+    ) -> Iterator[Page]:
+        """
+        Generator version of `.db_query()`. Yields Page objects as soon as every answer is received,
+        so the whole database is never kept in memory.
+
+        :param page_size:   0 < int < 100 - number of pages in one request (0 = API default)
+
+        `for page in database.iter_db_query(filter_=Filter(...)):`
+            `print(page)`
+        """
+        args = self._query_args(id_, filter_, sorts, properties)
+        if args is None:
+            return
+        for r in self.api.session.iterate(page_size=page_size, **args):
+            for p in r.get("results", []):
+                yield Page(**p)
+
+    def db_sync(self, id_: Optional[str] = None, since: Optional[str] = None) -> Optional[Element]:
+        """
+        Incremental query of the database: only pages created or changed since the last sync are requested.
+        The high-water mark (max `last_edited_time` of received pages) is kept in `Notion.store`
+        between runs and received pages are saved there too.
+        API rounds `last_edited_time` to minutes, so pages of the last minute may be returned once more.
+
+        :param id_:
+        :param since:   ISO `last_edited_time` to start from instead of the stored mark (query all if no mark)
+        :return:        self.obj -> PageArray (sorted by `last_edited_time` ascending)
+
+        `no = Notion(token, store=SQLiteStore("notion.db"))`
+        `changed = no.databases.db_sync("DATABASE ID")  # the first run returns all pages`
+        `changed = no.databases.db_sync("DATABASE ID")  # next runs return only new and changed pages`
+        """
+        return self._run(self._db_sync(id_, since))
+
+    def _db_sync(self, id_: Optional[str] = None, since: Optional[str] = None) -> Calls:
+        if self.name != "databases":
+            logger.warning("Only `databases` can be synced")
+            return None
+        if isinstance(id_, str) and "-" in id_:
+            id_ = id_.replace("-", "")
+        if self.obj:
+            id_ = self.obj.id
+        store = self.api.store
+        key = f"watermark:{id_}"
+        if not since and store is not None:
+            since = store.get_meta(key)
+        r = yield dict(
+            method="post", path=self.name, id_=id_, after_path="query",
+            data={}, filter_=self._sync_filter(since), sorts=Sort("last_edited_time")
         )
         if r["object"] != "list":
             return None
-        return Element(api=self.api, name="pages", obj=PageArray(r["results"]))
+        watermark = max([since or ""] + [p.get("last_edited_time") or "" for p in r["results"]])
+        if store is not None:
+            store.put_many(r["results"])
+            if watermark:
+                store.set_meta(key, watermark)
+        logger.debug(f"Database {id_} synced since {since}: {len(r['results'])} pages")
+        return self._element("pages", PageArray(r["results"]))
+
+    @staticmethod
+    def _sync_filter(since: Optional[str]) -> Optional[Filter]:
+        if not since:
+            return None
+        return Filter(
+            property_name="last_edited_time", property_type="timestamp", condition="on_or_after", value=since
+        )
 
     def db_filter(self, title: str = None, **kwargs) -> Optional[Element]:
         """
@@ -330,8 +757,11 @@ class Element(object):
         `.db_filter(property_name="created_time", property_type="timestamp", condition="before", value=datetime.now())`
         `.db_filter(raw=YOUR_BIG_DICT_FROM_NOTION_DOCS, limit=2)`
 
-        Filters combinations are not supported. (in `raw` param only)
+        Filters combinations are supported by `.db_query(filter_=Filter(...) & Filter(...))` or in `raw` param
         """
+        return self._run(self._db_filter(title, **kwargs))
+
+    def _db_filter(self, title: str = None, **kwargs) -> Calls:
         if self.name == "databases" and self.obj:
             sort = None
             if kwargs.get("ascending"):
@@ -342,7 +772,7 @@ class Element(object):
                 filter_obj = Filter(property_name="title", value=title, property_type="title", **kwargs)
             else:
                 filter_obj = Filter(**kwargs)
-            return self.db_query(filter_=filter_obj, sorts=sort, **kwargs)
+            return (yield from self._db_query(filter_=filter_obj, sorts=sort, **kwargs))
         logger.warning("Database must be provided. use .get() before")
         return None
 
@@ -374,6 +804,16 @@ class Element(object):
         }```
         `db = db.db_create(parent=parent, properties=props, title=RichTextArray.create("NEW DB"))`
         """
+        return self._run(self._db_create(database_obj, parent, properties, title, description))
+
+    def _db_create(
+            self,
+            database_obj: Optional[Database] = None,
+            parent: Optional[LinkTo] = None,
+            properties: Optional[Dict[str, Property]] = None,
+            title: Optional[Union[str, RichTextArray]] = None,
+            description: Optional[Union[str, RichTextArray]] = None,
+    ) -> Calls:
         if self.name != "databases":
             logger.warning("Method supports `databases` only")
             return None
@@ -383,7 +823,7 @@ class Element(object):
             if isinstance(title, str):
                 title = RichTextArray.create(title)
             db = Database.create(parent=parent, properties=properties, title=title, description=description)
-        created_db = self.api.session.method(method="post", path=self.name, data=db.get())
+        created_db = yield dict(method="post", path=self.name, data=db.get())
         self.obj = Database(**created_db)
         return self
 
@@ -404,6 +844,12 @@ class Element(object):
         `props = {"Property1_name": rename_retype_prop, "Property2_ID": retype_prop}`
         `db = db.db_update(properties=props, title=RichTextArray.create("NEW DB"))`
         """
+        return self._run(self._db_update(id_, title, properties))
+
+    def _db_update(
+            self, id_: Optional[str] = None, title: Optional[Union[str, RichTextArray]] = None,
+            properties: Optional[Dict[str, Property]] = None
+    ) -> Calls:
         if self.name != "databases":
             logger.warning("Method supports `databases` only")
             return None
@@ -418,7 +864,7 @@ class Element(object):
             patch["title"] = title.get()
         if properties:
             patch["properties"] = {name: value.get() for name, value in properties.items()}
-        updated_db = self.api.session.method(method="patch", path=self.name, id_=id_, data=patch)
+        updated_db = yield dict(method="patch", path=self.name, id_=id_, data=patch)
         self.obj = Database(**updated_db)
         return self
 
@@ -450,6 +896,16 @@ class Element(object):
         `parent2 = LinkTo.create(page_id="123412341234")`
         `no.pages.page_create(parent=parent2, title="New page 121")`
         """
+        return self._run(self._page_create(page_obj, parent, properties, title, children))
+
+    def _page_create(
+            self,
+            page_obj: Optional[Page] = None,
+            parent: Optional[LinkTo] = None,
+            properties: Optional[Dict[str, PropertyValue]] = None,
+            title: Optional[Union[str, RichTextArray]] = None,
+            children: Union[BlockArray, List[Block], None] = None,
+    ) -> Calls:
         if self.name != "pages":
             logger.warning("Method supports `pages` only")
             return None
@@ -459,10 +915,91 @@ class Element(object):
             if children and not isinstance(children, BlockArray):
                 children = BlockArray(children, create=True)
             page = Page.create(parent=parent, properties=properties, title=title, children=children)
-        created_page = self.api.session.method(method="post", path=self.name, data=page.get())
+        created_page = yield dict(method="post", path=self.name, data=page.get())
         self.obj = Page(**created_page)
         return self
 
+    def page_create_many(
+            self,
+            rows: Iterable[Union[Dict[str, Any], Page]],
+            parent: Optional[LinkTo] = None,
+            workers: int = envs.BULK_WORKERS,
+    ) -> Optional[List[BulkResult]]:
+        """
+        Creates many pages concurrently by the pool of `workers` threads.
+        Requests share the rate limit of `Notion` object, so the import runs at the max allowed rate.
+        A row is sent again only if it was not processed (429, 503 with `Retry-After`, connection is not established).
+        Rows failed after the request was sent are not repeated and marked as `BulkResult.ambiguous`.
+        Failed rows do not stop the others.
+
+        :param rows:        Page objects or dicts of properties {name: PropertyValue}.
+                            Plain values (str, int, list...) are accepted if the database schema is known
+                            (`no.databases.get("DATABASE ID").page_create_many(rows)`)
+        :param parent:      LinkTo object of the parent. Default is the database of this Element
+        :param workers:     number of concurrent requests (default is `envs.BULK_WORKERS`)
+        :return:            list of `BulkResult` in the order of rows (`.id` or `.error` of every row)
+
+        `database = no.databases.get("DATABASE ID")`
+        `results = database.page_create_many([{"Name": "first", "Price": 10}, {"Name": "second", "Price": 20}])`
+        `failed = [r for r in results if not r.ok and not r.ambiguous]`
+        """
+        if self.name not in ("pages", "databases"):
+            logger.warning("Method supports `pages` and `databases` only")
+            return None
+        parent = self._bulk_parent(parent)
+
+        def create(result: BulkResult) -> BulkResult:
+            return self._run(self._bulk_create(result, parent))
+
+        results = []
+        rows = iter(enumerate(rows))
+        with ThreadPoolExecutor(max_workers=max(workers, 1)) as pool:
+            # rows are read as the pool goes, so a generator of any length can be imported
+            pending = set()
+            for index, row in rows:
+                results.append(BulkResult(index, row))
+                pending.add(self._submit(pool, create, results[-1]))
+                if len(pending) >= workers * 2:
+                    _, pending = wait(pending, return_when=FIRST_COMPLETED)
+        return self._bulk_done(results)
+
+    def _bulk_parent(self, parent: Optional[LinkTo]) -> Optional[LinkTo]:
+        if parent is None and isinstance(self.obj, Database):
+            return LinkTo.create(database_id=self.obj.id)
+        return parent
+
+    def _bulk_page(self, row: Union[Dict[str, Any], Page], parent: Optional[LinkTo]) -> Page:
+        """
+        Page object of the row. Plain values are converted by property types of the database
+        """
+        if isinstance(row, Page):
+            return row
+        if parent is None:
+            raise ValueError("`parent` is required (or use database Element: `no.databases.get(\"ID\")`)")
+        properties = {}
+        for name, value in row.items():
+            if not isinstance(value, PropertyValue):
+                schema = self.obj.properties.get(name) if isinstance(self.obj, Database) else None
+                if schema is None:
+                    raise ValueError(f"Type of `{name}` is unknown. Provide PropertyValue or database Element")
+                value = PropertyValue.create(schema.type, value)
+            properties[name] = value
+        return Page.create(parent=parent, properties=properties)
+
+    def _bulk_create(self, result: BulkResult, parent: Optional[LinkTo]) -> Calls:
+        try:
+            page = self._bulk_page(result.row, parent)
+            result.id = (yield dict(method="post", path="pages", data=page.get()))["id"]
+        except Exception as e:
+            result.fail(e)
+        return result
+
+    @staticmethod
+    def _bulk_done(results: List[BulkResult]) -> List[BulkResult]:
+        failed = sum(1 for r in results if not r.ok)
+        logger.info(f"{len(results) - failed} pages created, {failed} failed")
+        return results
+
     def page_update(
             self, id_: Optional[str] = None, properties: Optional[Dict[str, PropertyValue]] = None,
             title: Optional[Union[str, RichTextArray]] = None, archived: bool = False
@@ -473,7 +1010,20 @@ class Element(object):
         :param title:
         :param archived:    set to `True` for delete the page
         :return:            self.obj -> Page
+
+        If the Page is received before (`self.obj`), only values which differ from the received ones are sent
+        (including changes made in `self.obj.properties`). Nothing is sent if nothing is changed.
+
+        `page = no.pages.get("PAGE ID")`
+        `page.obj.properties["Done"].value = True`
+        `page.page_update()  # {"properties": {"Done": {"checkbox": true}}}`
         """
+        return self._run(self._page_update(id_, properties, title, archived))
+
+    def _page_update(
+            self, id_: Optional[str] = None, properties: Optional[Dict[str, PropertyValue]] = None,
+            title: Optional[Union[str, RichTextArray]] = None, archived: bool = False
+    ) -> Calls:
         if self.name != "pages":
             logger.warning("Method supports `pages` only")
             return None
@@ -481,18 +1031,43 @@ class Element(object):
             id_ = id_.replace("-", "")
         if self.obj:
             id_ = self.obj.id
-        patch = {}
-        if properties:
-            patch["properties"] = {name: p.get() for name, p in properties.items()}
-        if title:
-            patch.setdefault("properties", {})
-            patch["properties"]["title"] = PropertyValue.create("title", title).get()
-        # if archived:
-        patch["archived"] = archived
-        updated_page = self.api.session.method(method="patch", path=self.name, id_=id_, data=patch)
+        patch = self._page_patch(properties, title, archived)
+        if not patch:
+            logger.debug(f"Page {id_} is not changed")
+            return self
+        updated_page = yield dict(method="patch", path=self.name, id_=id_, data=patch)
         self.obj = Page(**updated_page)
         return self
 
+    def _page_patch(
+            self, properties: Optional[Dict[str, PropertyValue]], title: Optional[Union[str, RichTextArray]],
+            archived: bool,
+    ) -> Dict:
+        values = {name: p.get() for name, p in properties.items()} if properties else {}
+        if title:
+            values["title"] = PropertyValue.create("title", title).get()
+        page = self.obj if isinstance(self.obj, Page) else None
+        if page is None:
+            # nothing to compare with
+            patch = {"archived": archived}
+            if values:
+                patch["properties"] = values
+            return patch
+        patch = {}
+        changes = page.changes()
+        changes.update(page.changes(values))
+        if changes:
+            patch["properties"] = changes
+        if archived != bool(page.archived):
+            patch["archived"] = archived
+        return patch
+
+    def _block_patch(self, archived: bool) -> Dict:
+        patch = self.obj.changes()
+        if archived != bool(self.obj.archived):
+            patch["archived"] = archived
+        return patch
+
     def block_update(
             self, id_: Optional[str] = None, block_obj: Optional[Block] = None,
             new_text: Optional[str] = None, archived: bool = False
@@ -510,6 +1085,8 @@ class Element(object):
         :param archived:    flag to delete that Block
         :return:            self.obj -> Block
 
+        Only fields which differ from the received Block are sent, nothing is sent if nothing is changed.
+
         `blocks = no.blocks.get_block_children("PAGE ID")`
         `for b in blocks.obj:`
             `no.blocks.block_update(block_obj=b, new_text="OH YEEEAHH")`
@@ -517,24 +1094,31 @@ class Element(object):
             `b.text = "ALL IS DONE"`
             `no.blocks.block_update(block_obj=b)`
         """
+        return self._run(self._block_update(id_, block_obj, new_text, archived))
+
+    def _block_update(
+            self, id_: Optional[str] = None, block_obj: Optional[Block] = None,
+            new_text: Optional[str] = None, archived: bool = False
+    ) -> Calls:
         if self.name != "blocks":
             logger.warning("Method supports `blocks` only")
             return None
         if isinstance(id_, str) and "-" in id_:
             id_ = id_.replace("-", "")
-        if self.obj:
-            id_ = self.obj.id
-        else:
-            self.get(id_)
         if block_obj:
             self.obj = block_obj
+        elif not self.obj:
+            yield from self._get(id_)
+        id_ = self.obj.id
         if not self.obj.get():
             return None
         if new_text:
             self.obj.text = new_text
-        patch = {"archived": archived}
-        patch.update(self.obj.get())
-        updated_block = self.api.session.method(method="patch", path=self.name, id_=id_, data=patch)
+        patch = self._block_patch(archived)
+        if not patch:
+            logger.debug(f"Block {id_} is not changed")
+            return self
+        updated_block = yield dict(method="patch", path=self.name, id_=id_, data=patch)
         self.obj = Block(**updated_block)
         return self
 
@@ -544,23 +1128,66 @@ class Element(object):
             block: Optional[Block] = None,
             blocks: Optional[Union[BlockArray, List[Block]]] = None,
             after: Optional[Union[Block, str]] = None,
+            workers: int = 0,
     ) -> Optional[Element]:
         """
-        Append block or blocks children
+        Append block or blocks children.
+        Blocks with `_level` > 0 (`Block.create("text", level=1)`) are appended as children of the previous block.
+        Any number of blocks can be provided: they are split into requests by API limits (`envs.BLOCK_CHILDREN_MAX`
+        per list, `envs.BLOCK_NESTING_MAX` levels of nesting) chained by `after` to keep the order.
+        Children nested deeper are appended to their created parents by follow-up requests.
 
         :param id_:         provide id of block or page if `self.obj` is empty
 
         :param block:       Block to append OR
         :param blocks:          List[Block] or BlockArray to append
         :param after:       the existing block that the new block should be appended after (Block or ID)
+        :param workers:     number of threads to append children of different blocks concurrently (0 = one by one)
 
-        :return:            self.obj -> BlockArray
+        :return:            self.obj -> BlockArray of appended top level blocks
 
         `p1 = no.pages.get("PAGE ID")`
         `p1.block_append(block=Block.create("SOMETHING NEW YO"))`
 
         `no.blocks.block_append("BLOCK OR PAGE ID", blocks=blocks)`
         """
+        args = self._append_args(id_, block, blocks, after)
+        if args is None:
+            return None
+        result = {"object": "list", "results": []}
+        if workers <= 1:
+            try:
+                self._run(self._append_all(*args, result["results"]))
+            except Exception as e:
+                e.partial_result = result
+                raise
+            return self._element("blocks", BlockArray(result["results"]))
+
+        def append(*child) -> List[tuple]:
+            return self._run(self._append_children(*child))
+
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            pending = set()
+            try:
+                for child in append(*args, result["results"]):
+                    pending.add(self._submit(pool, append, *child))
+                # independent subtrees go in parallel, every one submits its own follow-ups
+                while pending:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        for child in future.result():
+                            pending.add(self._submit(pool, append, *child))
+            except Exception as e:
+                for future in pending:
+                    future.cancel()
+                e.partial_result = result
+                raise
+        return self._element("blocks", BlockArray(result["results"]))
+
+    def _append_args(
+            self, id_: Optional[str], block: Optional[Block], blocks: Optional[Union[BlockArray, List[Block]]],
+            after: Optional[Union[Block, str]],
+    ) -> Optional[Tuple[str, BlockArray, Optional[str]]]:
         if self.name not in ["blocks", "pages"]:
             logger.warning("Method supports `blocks` or `pages` only")
             return None
@@ -572,17 +1199,90 @@ class Element(object):
             blocks = BlockArray(blocks, create=True)
         if isinstance(block, Block):
             blocks = BlockArray([block], create=True)
-        data = {"children": blocks.get()}
-        if after:
-            if isinstance(after, Block):
-                data["after"] = after.id
-            else:
+        if isinstance(after, Block):
+            after = after.id
+        return id_, blocks, after
+
+    def _append_children(
+            self, id_: str, blocks: BlockArray, after: Optional[str] = None, results: Optional[List[Dict]] = None
+    ) -> Calls:
+        """
+        Appends the blocks to one parent by ordered batches.
+
+        :param results: list to collect created blocks
+        :return:        follow-ups [(ID of created block, its children BlockArray)]
+        """
+        follow_ups = []
+        for batch in blocks.batches():
+            data = {"children": [d for d, _ in batch]}
+            if after:
                 data["after"] = after
+            created = (yield dict(method="patch", path="blocks", id_=id_, after_path="children", data=data))["results"]
+            if results is not None:
+                results.extend(created)
+            follow_ups.extend((raw["id"], later) for raw, (_, later) in zip(created, batch) if later)
+            if created:
+                after = created[-1]["id"]
+        return follow_ups
+
+    def _append_all(
+            self, id_: str, blocks: BlockArray, after: Optional[str] = None, results: Optional[List[Dict]] = None
+    ) -> Calls:
+        # the blocks and all their follow-ups one by one
+        queue = deque([(id_, blocks, after, results)])
+        while queue:
+            queue.extend((yield from self._append_children(*queue.popleft())))
+
+    def block_sync(
+            self,
+            id_: Optional[str] = None,
+            blocks: Union[BlockArray, List[Block], None] = None,
+            max_depth: int = 10,
+            dry_run: bool = False,
+    ) -> Optional[List[BlockOp]]:
+        """
+        Makes the content of the page or the block equal to `blocks` by the smallest number of requests:
+        live tree is received by `.get_block_children_recursive()` and compared with the desired one,
+        changed blocks are updated in place (IDs and links are kept), new blocks are appended after their
+        neighbours, the rest are archived. Subpages and child databases are never archived.
+
+        :param id_:         ID of the page or the block (or `self.obj`)
+        :param blocks:      desired content: `Block.create()` objects with `level` for nesting
+        :param max_depth:   how deep the trees are compared
+        :param dry_run:     only return the operations
+        :return:            list of `BlockOp` (done or planned)
+
+        `blocks = [Block.create("Status", type_="heading_2"), Block.create("All systems operational")]`
+        `ops = no.pages.block_sync("PAGE ID", blocks=blocks)  # one request if only the status line is changed`
+        """
+        return self._run(self._block_sync(id_, blocks, max_depth, dry_run))
 
-        new_blocks = self.api.session.method(
-            method="patch", path="blocks", id_=id_, after_path="children", data=data
-        )
-        return Element(api=self.api, name="blocks", obj=BlockArray(new_blocks["results"]))
+    def _block_sync(
+            self, id_: Optional[str], blocks: Union[BlockArray, List[Block], None], max_depth: int, dry_run: bool
+    ) -> Calls:
+        if self.name not in ["blocks", "pages"]:
+            logger.warning("Method supports `blocks` or `pages` only")
+            return None
+        if isinstance(id_, str) and "-" in id_:
+            id_ = id_.replace("-", "")
+        if self.obj:
+            id_ = self.obj.id
+        if not isinstance(blocks, BlockArray):
+            blocks = BlockArray(blocks or [], create=True)
+        live = yield from self._get_block_tree_by_one(id_, None, max_depth, 0, 0, False)
+        ops = diff_blocks(id_, live.tree(), blocks.tree())
+        logger.info(f"{len(ops)} operations to sync {id_}")
+        if not dry_run:
+            for op in ops:
+                yield from self._run_block_op(op)
+        return ops
+
+    def _run_block_op(self, op: BlockOp) -> Calls:
+        if op.action == "append":
+            yield from self._append_all(op.id, op.blocks, op.after)
+        else:
+            patch = op.patch if op.action == "update" else {"archived": True}
+            yield dict(method="patch", path="blocks", id_=op.id, data=patch)
 
     def get_myself(self) -> Element:
         """
@@ -592,22 +1292,23 @@ class Element(object):
 
         `me = no.users.get_myself()`
         """
-        new_object = Element(self.api, name="users")
-        new_object.get("me")
-        return new_object
+        return self._run(self._element("users")._get("me"))
 
     def from_linkto(self, linkto: LinkTo, limit: int = 0) -> Optional[Element]:
+        return self._run(self._from_linkto(linkto, limit))
+
+    def _from_linkto(self, linkto: LinkTo, limit: int = 0) -> Calls:
         if not linkto:
             logger.error("LinkTo must be provided!")
             return None
         if not linkto.uri:
             logger.error("LinkTo.uri must be provided!")
             return None
-        new_element = Element(self.api, name=linkto.uri)
-        return new_element.get(linkto.id, getattr(linkto, "after_path", None), limit)
+        new_element = self._element(linkto.uri)
+        return (yield from new_element._get(linkto.id, getattr(linkto, "after_path", None), limit))
 
     def from_object(self, model: Union[Database, Page, Block]):
-        return Element(self.api, model.path, model)
+        return self._element(model.path, model)
 
     def __repr__(self):
         if not self.obj:
@@ -616,3 +1317,332 @@ class Element(object):
 
     def __str__(self):
         return self.__repr__()
+
+
+class AsyncNotion(Notion):
+    def __init__(
+            self, token: Optional[str] = None, version: Optional[str] = None,
+            rate_limit: Optional[float] = None, rate_burst: Optional[int] = None,
+            max_retries: Optional[int] = None, cache: Optional[ResponseCache] = None,
+            store: Optional[SQLiteStore] = None, pool_size: Optional[int] = None, keep_alive: Optional[bool] = None,
+            connect_timeout: Optional[float] = None, read_timeout: Optional[float] = None, warm_up: int = 0,
+            hooks: Optional[Hooks] = None,
+    ):
+        """
+        Creates main asynchronous API object. Requires `aiohttp` (`pip install pytion[async]`)
+        Any Element created from this object is `AsyncElement` and its API methods are coroutines.
+
+        :param token:       provide your integration API token. If None - find the file `token`
+        :param version:     provide non hardcoded API version
+        :param rate_limit:  max requests per second (0 = no limit)
+        :param rate_burst:  how many requests can be sent at once
+        :param max_retries: how many times to repeat a request failed with 429, 5xx or connection error
+        :param cache:       `pytion.cache.ResponseCache` object to keep GET answers in memory (disabled by default)
+        :param store:       `pytion.cache.SQLiteStore` object (local queries are run in the event loop)
+        :param pool_size:   max number of open connections (default is `envs.POOL_SIZE`)
+        :param keep_alive:  reuse connections between requests (default is `envs.KEEP_ALIVE`)
+        :param connect_timeout: seconds to wait for the connection (default is `envs.CONNECT_TIMEOUT`)
+        :param read_timeout:    seconds to wait for the answer (default is `envs.READ_TIMEOUT`)
+        :param warm_up:     number of connections to open by `async with` (see `AsyncRequest.warm_up()`)
+        :param hooks:       `pytion.hooks.Hooks` object with functions called on every request (`.hooks` attr)
+
+        `async with AsyncNotion(token) as no:`
+            `page, db = await asyncio.gather(no.pages.get("PAGE ID"), no.databases.get("DATABASE ID"))`
+        """
+        self.version = version if version else envs.NOTION_VERSION
+        self.session = AsyncRequest(
+            api=self, token=token, rate_limit=rate_limit, rate_burst=rate_burst, max_retries=max_retries,
+            cache=cache, pool_size=pool_size, keep_alive=keep_alive, connect_timeout=connect_timeout,
+            read_timeout=read_timeout, hooks=hooks,
+        )
+        self.hooks = self.session.hooks
+        self._warm_up = warm_up
+        self.store = store
+        logger.debug(f"Async API object created. Version {envs.NOTION_VERSION}")
+
+    async def _run(self, calls: Calls) -> Any:
+        """
+        Async version of `Notion._run()`
+        """
+        answer, error = None, None
+        while True:
+            try:
+                request = calls.throw(error) if error is not None else calls.send(answer)
+            except StopIteration as e:
+                return e.value
+            answer, error = None, None
+            try:
+                answer = await self.session.method(**request)
+            except Exception as e:
+                error = e
+
+    def _element(self, name: str, obj: Optional[Models] = None) -> AsyncElement:
+        return AsyncElement(self, name, obj)
+
+    async def search(
+            self, query: Optional[str] = None, limit: int = 0,
+            object_type: Optional[str] = None, sort_last_edited_time: Optional[str] = None
+    ) -> Optional[AsyncElement]:
+        return await self._run(self._search(query, limit, object_type, sort_last_edited_time))
+
+    async def iter_search(
+            self, query: Optional[str] = None, page_size: int = 0,
+            object_type: Optional[str] = None, sort_last_edited_time: Optional[str] = None
+    ) -> AsyncIterator[Union[Page, Database]]:
+        args = self._search_args(query, object_type, sort_last_edited_time)
+        async for result in self.session.iterate("post", "search", page_size=page_size, **args):
+            for item in ElementArray(result.get("results", [])):
+                if isinstance(item, Page):
+                    await self.pages.get_page_properties(title_only=True, obj=item)
+                yield item
+
+    async def close(self) -> None:
+        await self.session.close()
+
+    async def __aenter__(self):
+        if self._warm_up:
+            await self.session.warm_up(self._warm_up)
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
+
+    def __repr__(self):
+        return "AsyncNotionAPI"
+
+
+class AsyncElement(Element):
+    """
+    Asynchronous twin of `Element`. Every API method has the same arguments and returns the same result,
+    but it must be awaited. Bodies of methods are shared with `Element`, only concurrency differs:
+    `workers` are asyncio tasks instead of threads. Models, `Filter` and `Sort` are shared with the sync client.
+    """
+
+    async def get(
+            self, id_: str, _after_path: str = None, limit: int = 0, properties: Optional[List[str]] = None
+    ) -> AsyncElement:
+        return await self._run(self._get(id_, _after_path, limit, properties))
+
+    async def get_parent(self, id_: Optional[str] = None) -> Optional[AsyncElement]:
+        return await self._run(self._get_parent(id_))
+
+    async def get_block_children(
+            self, id_: Optional[str] = None, block: Optional[Block] = None, limit: int = 0
+    ) -> Optional[AsyncElement]:
+        return await self._run(self._get_block_children(id_, block, limit))
+
+    async def iter_block_children(
+            self, id_: Optional[str] = None, block: Optional[Block] = None, page_size: int = 0
+    ) -> AsyncIterator[Block]:
+        args = self._iter_children_args(id_, block, page_size)
+        if args is None:
+            return
+        async for child in self.api.session.iterate(**args):
+            for b in child.get("results", []):
+                yield Block(**b)
+
+    async def iter_block_children_recursive(
+            self, id_: Optional[str] = None, max_depth: int = 10, block: Optional[Block] = None,
+            force: bool = False, _cur_depth: int = 0,
+    ) -> AsyncIterator[Block]:
+        if self.name not in ("blocks", "pages"):
+            logger.warning("Only `blocks` or `pages` can have children")
+            return
+        parent = block if block else (self.obj if isinstance(self.obj, (Page, Block)) else None)
+        async for b in self._element("blocks").iter_block_children(id_, block=parent):
+            b._level = _cur_depth
+            yield b
+            if self._expandable(b, _cur_depth, max_depth, force) and b.type != "child_database":
+                async for child in self.iter_block_children_recursive(
+                        block=b, max_depth=max_depth, force=force, _cur_depth=_cur_depth + 1
+                ):
+                    yield child
+
+    async def get_block_children_recursive(
+        self, id_: Optional[str] = None, max_depth: int = 10, block: Optional[Block] = None,
+        _cur_depth: int = 0, limit: int = 0, force: bool = False, workers: int = 0
+    ) -> Optional[AsyncElement]:
+        parent = self._children_parent(id_, block)
+        if parent is None:
+            return None
+        if isinstance(parent, LinkTo):
+            return await self.from_linkto(parent)
+        if workers > 1:
+            ba = await self._get_block_tree(*parent, max_depth, _cur_depth, limit, force, workers)
+        else:
+            ba = await self._run(self._get_block_tree_by_one(*parent, max_depth, _cur_depth, limit, force))
+        return self._element("blocks", ba)
+
+    async def _get_block_tree(
+            self, id_: str, last_edited_time: Optional[str], max_depth: int, cur_depth: int, limit: int,
+            force: bool, workers: int
+    ) -> BlockArray:
+        semaphore = asyncio.Semaphore(workers)
+
+        async def fetch(block: Block) -> List[Dict]:
+            async with semaphore:
+                return await self._run(self._get_children_raw(block.id, block.raw.get("last_edited_time"), limit))
+
+        children = {}
+        raw = await self._run(self._get_children_raw(id_, last_edited_time, limit))
+        top = [Block(level=cur_depth, **b) for b in raw]
+        with self._caller_context():
+            pending = {
+                asyncio.ensure_future(fetch(b)): (b, cur_depth)
+                for b in top if self._expandable(b, cur_depth, max_depth, force)
+            }
+            try:
+                while pending:
+                    done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                    for task in done:
+                        parent, depth = pending.pop(task)
+                        blocks = [Block(level=depth + 1, **b) for b in task.result()]
+                        children[parent.id] = blocks
+                        for b in blocks:
+                            if self._expandable(b, depth + 1, max_depth, force):
+                                pending[asyncio.ensure_future(fetch(b))] = (b, depth + 1)
+            except BaseException:
+                for task in pending:
+                    task.cancel()
+                raise
+        return self._flatten_tree(top, children)
+
+    async def get_page_property(
+            self, property_id: str, id_: Optional[str] = None, limit: int = 0
+    ) -> Optional[AsyncElement]:
+        return await self._run(self._get_page_property(property_id, id_, limit))
+
+    async def get_page_properties(self, title_only: bool = False, obj: Optional[Page] = None) -> None:
+        return await self._run(self._get_page_properties(title_only, obj))
+
+    async def db_query(
+            self,
+            id_: Optional[str] = None,
+            limit: int = 0,
+            filter_: Optional[Filter] = None,
+            sorts: Optional[Sort] = None,
+            properties: Optional[List[str]] = None,
+            **kwargs,
+    ) -> Optional[AsyncElement]:
+        return await self._run(self._db_query(id_, limit, filter_, sorts, properties))
+
+    async def iter_db_query(
+            self,
+            id_: Optional[str] = None,
+            page_size: int = 0,
+            filter_: Optional[Filter] = None,
+            sorts: Optional[Sort] = None,
+            properties: Optional[List[str]] = None,
+    ) -> AsyncIterator[Page]:
+        args = self._query_args(id_, filter_, sorts, properties)
+        if args is None:
+            return
+        async for r in self.api.session.iterate(page_size=page_size, **args):
+            for p in r.get("results", []):
+                yield Page(**p)
+
+    async def db_sync(self, id_: Optional[str] = None, since: Optional[str] = None) -> Optional[AsyncElement]:
+        return await self._run(self._db_sync(id_, since))
+
+    async def db_filter(self, title: str = None, **kwargs) -> Optional[AsyncElement]:
+        return await self._run(self._db_filter(title, **kwargs))
+
+    async def db_create(
+            self,
+            database_obj: Optional[Database] = None,
+            parent: Optional[LinkTo] = None,
+            properties: Optional[Dict[str, Property]] = None,
+            title: Optional[Union[str, RichTextArray]] = None,
+            description: Optional[Union[str, RichTextArray]] = None,
+    ) -> Optional[AsyncElement]:
+        return await self._run(self._db_create(database_obj, parent, properties, title, description))
+
+    async def db_update(
+            self, id_: Optional[str] = None, title: Optional[Union[str, RichTextArray]] = None,
+            properties: Optional[Dict[str, Property]] = None
+    ) -> Optional[AsyncElement]:
+        return await self._run(self._db_update(id_, title, properties))
+
+    async def page_create(
+            self,
+            page_obj: Optional[Page] = None,
+            parent: Optional[LinkTo] = None,
+            properties: Optional[Dict[str, PropertyValue]] = None,
+            title: Optional[Union[str, RichTextArray]] = None,
+            children: Union[BlockArray, List[Block], None] = None,
+    ) -> Optional[AsyncElement]:
+        return await self._run(self._page_create(page_obj, parent, properties, title, children))
+
+    async def page_create_many(
+            self,
+            rows: Iterable[Union[Dict[str, Any], Page]],
+            parent: Optional[LinkTo] = None,
+            workers: int = envs.BULK_WORKERS,
+    ) -> Optional[List[BulkResult]]:
+        if self.name not in ("pages", "databases"):
+            logger.warning("Method supports `pages` and `databases` only")
+            return None
+        parent = self._bulk_parent(parent)
+        semaphore = asyncio.Semaphore(max(workers, 1))
+
+        async def create(result: BulkResult) -> BulkResult:
+            async with semaphore:
+                return await self._run(self._bulk_create(result, parent))
+
+        with self._caller_context():
+            results = await asyncio.gather(*(create(BulkResult(i, row)) for i, row in enumerate(rows)))
+        return self._bulk_done(list(results))
+
+    async def page_update(
+            self, id_: Optional[str] = None, properties: Optional[Dict[str, PropertyValue]] = None,
+            title: Optional[Union[str, RichTextArray]] = None, archived: bool = False
+    ) -> Optional[AsyncElement]:
+        return await self._run(self._page_update(id_, properties, title, archived))
+
+    async def block_update(
+            self, id_: Optional[str] = None, block_obj: Optional[Block] = None,
+            new_text: Optional[str] = None, archived: bool = False
+    ) -> Optional[AsyncElement]:
+        return await self._run(self._block_update(id_, block_obj, new_text, archived))
+
+    async def block_append(
+            self,
+            id_: Optional[str] = None,
+            block: Optional[Block] = None,
+            blocks: Optional[Union[BlockArray, List[Block]]] = None,
+            after: Optional[Union[Block, str]] = None,
+            workers: int = 0,
+    ) -> Optional[AsyncElement]:
+        args = self._append_args(id_, block, blocks, after)
+        if args is None:
+            return None
+        result = {"object": "list", "results": []}
+        semaphore = asyncio.Semaphore(max(workers, 1))
+
+        async def append(*child) -> None:
+            async with semaphore:
+                follow_ups = await self._run(self._append_children(*child))
+            await asyncio.gather(*(append(*follow_up) for follow_up in follow_ups))
+
+        try:
+            with self._caller_context():
+                await append(*args, result["results"])
+        except Exception as e:
+            e.partial_result = result
+            raise
+        return self._element("blocks", BlockArray(result["results"]))
+
+    async def block_sync(
+            self,
+            id_: Optional[str] = None,
+            blocks: Union[BlockArray, List[Block], None] = None,
+            max_depth: int = 10,
+            dry_run: bool = False,
+    ) -> Optional[List[BlockOp]]:
+        return await self._run(self._block_sync(id_, blocks, max_depth, dry_run))
+
+    async def get_myself(self) -> AsyncElement:
+        return await self._run(self._element("users")._get("me"))
+
+    async def from_linkto(self, linkto: LinkTo, limit: int = 0) -> Optional[AsyncElement]:
+        return await self._run(self._from_linkto(linkto, limit))
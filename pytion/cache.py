@@ -0,0 +1,247 @@
+# -*- coding: utf-8 -*-
+
+import copy
+import json
+import logging
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Dict, Optional, Tuple, List
+
+import pytion.envs as envs
+
+
+logger = logging.getLogger(__name__)
+
+
+class ResponseCache(object):
+    def __init__(self, max_size: int = envs.CACHE_SIZE, ttl: Optional[Dict[str, float]] = None):
+        """
+        In-memory cache of GET answers with LRU eviction. Thread-safe.
+        Entries are keyed by (path, id, after_path, limit) and expire after TTL of their resource type.
+        Every `patch`/`delete` request (page_update, block_update, db_update, block_append...)
+        invalidates all entries of its object and of the parent of that object.
+
+        :param max_size:    max number of cached answers
+        :param ttl:         seconds to keep answers per resource type (path), for ex. `{"users": 3600}`
+                            missed types get `envs.CACHE_TTL` values or `envs.CACHE_TTL_DEFAULT`
+
+        `no = Notion(token, cache=ResponseCache(max_size=512, ttl={"databases": 600}))`
+        `no.databases.get("1234")  # request`
+        `no.databases.get("1234")  # from cache`
+        `print(no.session.cache)`
+        ResponseCache(1/512, hits 1, misses 1)
+        """
+        self.max_size = max_size
+        self.ttl = dict(envs.CACHE_TTL)
+        if ttl:
+            self.ttl.update(ttl)
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.RLock()
+
+    @staticmethod
+    def key(path: str, id_: str = "", after_path: Optional[str] = None, limit: int = 0) -> Tuple:
+        return path, (id_ or "").replace("-", ""), after_path or "", limit
+
+    def get(self, path: str, id_: str = "", after_path: Optional[str] = None, limit: int = 0) -> Optional[Dict]:
+        key = self.key(path, id_, after_path, limit)
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    del self.entries[key]
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            value = entry[1]
+        logger.debug(f"Cache hit {key}")
+        return copy.deepcopy(value)
+
+    def set(self, path: str, id_: str, after_path: Optional[str], limit: int, value: Dict) -> None:
+        ttl = self.ttl.get(path, envs.CACHE_TTL_DEFAULT)
+        if not self.max_size or not ttl:
+            return
+        key = self.key(path, id_, after_path, limit)
+        value = copy.deepcopy(value)
+        with self.lock:
+            self.entries[key] = (time.monotonic() + ttl, value)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+
+    def invalidate(self, id_: str) -> int:
+        """
+        Removes all answers about the object (itself, its children, its properties)
+
+        :return:    number of removed entries
+        """
+        id_ = id_.replace("-", "")
+        with self.lock:
+            keys = [key for key in self.entries if key[1] == id_]
+            for key in keys:
+                del self.entries[key]
+        if keys:
+            logger.debug(f"Cache invalidated {id_} ({len(keys)} entries)")
+        return len(keys)
+
+    def clear(self) -> None:
+        with self.lock:
+            self.entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __repr__(self):
+        return f"ResponseCache({len(self)}/{self.max_size}, hits {self.hits}, misses {self.misses})"
+
+
+class SQLiteStore(object):
+    def __init__(self, path: str = envs.STORE_PATH, max_age: float = 0, edit_window: float = envs.STORE_EDIT_WINDOW):
+        """
+        Persistent store of raw API objects (pages, databases, blocks) and lists of block children.
+        Thread-safe. Survives restarts, so only changed content is requested again.
+
+        Children of a block or a page are served from the store if the parent's `last_edited_time`
+        is the same as when they were stored.
+        API rounds `last_edited_time` to minutes: the parent changed again in the same minute keeps the value,
+        so children of the parent edited less than `edit_window` seconds before the request are not stored.
+        Objects itself are served by `.get()` only if they are not older than `max_age`.
+
+        :param path:    SQLite database file (":memory:" for tests)
+        :param max_age: seconds to trust stored objects without request (0 = always request, just save)
+        :param edit_window: seconds after the last edit of the parent to do not store its children
+                            (default is `envs.STORE_EDIT_WINDOW`)
+
+        `no = Notion(token, store=SQLiteStore("notion.db"))`
+        `page = no.pages.get("PAGE ID")`
+        `blocks = page.get_block_children_recursive()  # only changed subtrees are requested`
+        """
+        self.path = path
+        self.max_age = max_age
+        self.edit_window = edit_window
+        self.lock = threading.RLock()
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        with self.lock, self.connection:
+            self.connection.execute(
+                "CREATE TABLE IF NOT EXISTS objects "
+                "(id TEXT PRIMARY KEY, object TEXT, last_edited_time TEXT, fetched REAL, raw TEXT)"
+            )
+            self.connection.execute(
+                "CREATE TABLE IF NOT EXISTS children "
+                "(parent_id TEXT PRIMARY KEY, parent_last_edited_time TEXT, ids TEXT)"
+            )
+            self.connection.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+
+    @staticmethod
+    def _id(id_: str) -> str:
+        return id_.replace("-", "")
+
+    def _rows(self, raws: List[Dict]) -> List[Tuple]:
+        now = time.time()
+        return [
+            (self._id(raw["id"]), raw.get("object"), raw.get("last_edited_time"), now, json.dumps(raw))
+            for raw in raws
+        ]
+
+    def put(self, raw: Dict) -> None:
+        self.put_many([raw])
+
+    def put_many(self, raws: List[Dict]) -> None:
+        with self.lock, self.connection:
+            self.connection.executemany(
+                "INSERT OR REPLACE INTO objects (id, object, last_edited_time, fetched, raw) VALUES (?, ?, ?, ?, ?)",
+                self._rows([raw for raw in raws if raw.get("id")]),
+            )
+
+    def get(self, id_: str, max_age: Optional[float] = None) -> Optional[Dict]:
+        """
+        :param max_age: seconds (`self.max_age` by default). 0 - return stored object of any age
+        """
+        with self.lock:
+            row = self.connection.execute(
+                "SELECT fetched, raw FROM objects WHERE id = ?", (self._id(id_),)
+            ).fetchone()
+        if not row:
+            return None
+        max_age = self.max_age if max_age is None else max_age
+        if max_age and row[0] + max_age < time.time():
+            return None
+        return json.loads(row[1])
+
+    def settled(self, last_edited_time: Optional[str]) -> bool:
+        """
+        True if the object can not be changed again without the change of its `last_edited_time`
+        (the minute of the last edit is passed, see `edit_window`)
+        """
+        if not last_edited_time:
+            return False
+        try:
+            edited = datetime.fromisoformat(last_edited_time.replace("Z", "+00:00")).timestamp()
+        except ValueError:
+            return False
+        return edited + self.edit_window <= time.time()
+
+    def put_children(self, parent_id: str, parent_last_edited_time: Optional[str], raws: List[Dict]) -> None:
+        if not parent_last_edited_time:
+            return
+        with self.lock, self.connection:
+            self.connection.executemany(
+                "INSERT OR REPLACE INTO objects (id, object, last_edited_time, fetched, raw) VALUES (?, ?, ?, ?, ?)",
+                self._rows(raws),
+            )
+            if not self.settled(parent_last_edited_time):
+                logger.debug(f"Children of {parent_id} are not stored: the parent is edited just now")
+                return
+            self.connection.execute(
+                "INSERT OR REPLACE INTO children (parent_id, parent_last_edited_time, ids) VALUES (?, ?, ?)",
+                (self._id(parent_id), parent_last_edited_time, json.dumps([self._id(raw["id"]) for raw in raws])),
+            )
+
+    def get_children(self, parent_id: str, parent_last_edited_time: Optional[str]) -> Optional[List[Dict]]:
+        """
+        :return:    list of raw children objects or None if the parent is changed or unknown
+        """
+        if not parent_last_edited_time:
+            return None
+        with self.lock:
+            row = self.connection.execute(
+                "SELECT ids FROM children WHERE parent_id = ? AND parent_last_edited_time = ?",
+                (self._id(parent_id), parent_last_edited_time),
+            ).fetchone()
+            if not row:
+                return None
+            ids = json.loads(row[0])
+            raws = {}
+            # old SQLite versions support 999 variables per query
+            for i in range(0, len(ids), 500):
+                chunk = ids[i:i + 500]
+                raws.update(self.connection.execute(
+                    f"SELECT id, raw FROM objects WHERE id IN ({', '.join('?' * len(chunk))})", chunk
+                ))
+        if len(raws) != len(ids):
+            return None
+        logger.debug(f"Children of {parent_id} are found in store")
+        return [json.loads(raws[id_]) for id_ in ids]
+
+    def get_meta(self, key: str) -> Optional[str]:
+        with self.lock:
+            row = self.connection.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def set_meta(self, key: str, value: str) -> None:
+        with self.lock, self.connection:
+            self.connection.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, value))
+
+    def close(self) -> None:
+        with self.lock:
+            self.connection.close()
+
+    def __repr__(self):
+        return f"SQLiteStore({self.path})"
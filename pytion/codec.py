@@ -0,0 +1,91 @@
+# -*- coding: utf-8 -*-
+
+import json
+import logging
+from typing import Any, Optional, Union
+
+try:
+    import orjson
+except ImportError:  # optional dependency (`pip install pytion[fast]`)
+    orjson = None
+
+import pytion.envs as envs
+
+
+logger = logging.getLogger(__name__)
+
+
+class JSONCodec(object):
+    """
+    Encodes request bodies and decodes response bodies. Subclass it to plug another JSON library:
+
+    `class MyCodec(JSONCodec):`
+        `name = "my"`
+        `def dumps(self, obj): return mylib.dumps(obj).encode()`
+        `def loads(self, data): return mylib.loads(data)`
+    `pytion.codec.set_codec(MyCodec())`
+
+    `.loads()` must raise `ValueError` (or its subclass) for invalid data.
+    """
+    name = "json"
+
+    def dumps(self, obj: Any) -> bytes:
+        return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+    def loads(self, data: Union[bytes, str]) -> Any:
+        # stdlib detects utf-8/16/32 of bytes itself, so there is no intermediate str
+        return json.loads(data)
+
+    def __repr__(self):
+        return f"JSONCodec({self.name})"
+
+
+class OrjsonCodec(JSONCodec):
+    name = "orjson"
+
+    def __init__(self):
+        if orjson is None:
+            raise ImportError("`orjson` is not installed. Install it by `pip install pytion[fast]`")
+
+    def dumps(self, obj: Any) -> bytes:
+        return orjson.dumps(obj)
+
+    def loads(self, data: Union[bytes, str]) -> Any:
+        return orjson.loads(data)
+
+
+codecs = {"json": JSONCodec, "orjson": OrjsonCodec}
+
+
+def get_codec(name: Optional[str] = None) -> JSONCodec:
+    """
+    :param name:    `auto` (the fastest installed), `orjson` or `json`. Default is `envs.JSON_CODEC`
+    """
+    name = name or envs.JSON_CODEC
+    if name == "auto":
+        name = "orjson" if orjson is not None else "json"
+    if name not in codecs:
+        raise ValueError(f"Allowed codecs auto, {', '.join(codecs)} ({name} provided)")
+    return codecs[name]()
+
+
+codec = get_codec()
+
+
+def set_codec(new_codec: Union[JSONCodec, str]) -> JSONCodec:
+    """
+    Replaces the codec of all requests. Returns the previous one.
+    """
+    global codec
+    previous = codec
+    codec = new_codec if isinstance(new_codec, JSONCodec) else get_codec(new_codec)
+    logger.debug(f"{codec!r} is used")
+    return previous
+
+
+def dumps(obj: Any) -> bytes:
+    return codec.dumps(obj)
+
+
+def loads(data: Union[bytes, str]) -> Any:
+    return codec.loads(data)
@@ -0,0 +1,157 @@
+# -*- coding: utf-8 -*-
+from __future__ import annotations
+from array import array
+from datetime import datetime, timedelta, timezone
+from typing import Optional, Dict, List, Any, Iterable
+
+try:
+    import numpy
+except ImportError:  # optional dependency for `Column.to_numpy()`
+    numpy = None
+
+
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+MICROSECOND = timedelta(microseconds=1)
+
+
+class Column(object):
+    # property type -> column kind
+    kinds = {
+        "number": "number",
+        "checkbox": "bool",
+        "date": "datetime", "created_time": "datetime", "last_edited_time": "datetime",
+        "select": "category", "status": "category",
+    }
+
+    def __init__(self, name: str, type_: str, values: Iterable[Any]):
+        """
+        Typed values of one property of many pages. Storage depends on the kind of the column:
+        - number:   `array("d")`, None is NaN
+        - bool:     `array("b")`
+        - datetime: `array("q")` of microseconds since epoch (UTC), None is 0
+        - category: `array("i")` of codes in `.categories`, None is -1
+        - object:   list of values (any other property type, texts are `str`)
+        `.mask` is `array("b")` with 1 for empty values (None for bool and object columns).
+
+        :param name:    property name
+        :param type_:   property type
+        :param values:  `PropertyValue.value` (or `.start` for dates) of every page
+
+        `columns = pages.to_columns(["Price", "Due"])`
+        `total = sum(columns["Price"].values)`
+        `prices = columns["Price"].to_numpy()  # numpy is optional`
+        """
+        self.name = name
+        self.type = type_
+        self.kind = self.kinds.get(type_, "object")
+        self.categories: Optional[List[str]] = None
+        self.mask: Optional[array] = None
+        if self.kind == "number":
+            self.values = array("d")
+            self.mask = array("b")
+            for v in values:
+                self.values.append(float("nan") if v is None else v)
+                self.mask.append(v is None)
+        elif self.kind == "bool":
+            self.values = array("b", (bool(v) for v in values))
+        elif self.kind == "datetime":
+            self.values = array("q")
+            self.mask = array("b")
+            for v in values:
+                self.values.append(0 if v is None else self.to_microseconds(v))
+                self.mask.append(v is None)
+        elif self.kind == "category":
+            self.values = array("i")
+            self.mask = array("b")
+            self.categories = []
+            codes = {}
+            for v in values:
+                if v is None:
+                    self.values.append(-1)
+                else:
+                    if v not in codes:
+                        codes[v] = len(self.categories)
+                        self.categories.append(v)
+                    self.values.append(codes[v])
+                self.mask.append(v is None)
+        else:
+            self.values = list(values)
+
+    @staticmethod
+    def to_microseconds(value: datetime) -> int:
+        if not value.tzinfo:
+            value = value.replace(tzinfo=timezone.utc)
+        return (value - EPOCH) // MICROSECOND
+
+    def __len__(self):
+        return len(self.values)
+
+    def __getitem__(self, item: int) -> Any:
+        """
+        Python value of the row
+        """
+        if self.mask is not None and self.mask[item]:
+            return None
+        value = self.values[item]
+        if self.kind == "bool":
+            return bool(value)
+        if self.kind == "datetime":
+            return EPOCH + value * MICROSECOND
+        if self.kind == "category":
+            return self.categories[value]
+        return value
+
+    def __iter__(self):
+        return (self[i] for i in range(len(self)))
+
+    def to_numpy(self):
+        """
+        Converts the column to numpy array (requires `numpy`):
+        float64 with NaN, bool, datetime64[us] with NaT, int32 codes with -1, object
+        """
+        if numpy is None:
+            raise ImportError("`numpy` is required for this method. Install it by `pip install pytion[numpy]`")
+        if self.kind == "number":
+            return numpy.frombuffer(self.values, dtype=numpy.float64).copy()
+        if self.kind == "bool":
+            return numpy.frombuffer(self.values, dtype=numpy.int8).astype(bool)
+        if self.kind == "datetime":
+            result = numpy.frombuffer(self.values, dtype=numpy.int64).astype("datetime64[us]")
+            result[numpy.frombuffer(self.mask, dtype=numpy.int8).astype(bool)] = numpy.datetime64("NaT")
+            return result
+        if self.kind == "category":
+            return numpy.frombuffer(self.values, dtype=numpy.int32).copy()
+        result = numpy.empty(len(self.values), dtype=object)
+        result[:] = self.values
+        return result
+
+    def __repr__(self):
+        return f"Column({self.name}, {self.kind}, {len(self)} rows)"
+
+
+def to_columns(pages: Iterable[Any], names: Optional[List[str]] = None) -> Dict[str, Column]:
+    """
+    Columnar view of pages: {property name: Column}. Pages without the property get empty values.
+
+    :param pages:   Page objects of one database
+    :param names:   property names (all properties of the first page by default)
+    """
+    pages = list(pages)
+    if names is None:
+        names = list(pages[0].properties) if pages else []
+    columns = {}
+    for name in names:
+        type_ = next((p.properties[name].type for p in pages if name in p.properties), "")
+        values = []
+        for page in pages:
+            prop = page.properties[name] if name in page.properties else None
+            if prop is None:
+                values.append(None)
+            elif type_ == "date":
+                values.append(getattr(prop, "start", None))
+            elif type_ in ("title", "rich_text"):
+                values.append(str(prop.value) if prop.value is not None else None)
+            else:
+                values.append(prop.value)
+        columns[name] = Column(name, type_, values)
+    return columns
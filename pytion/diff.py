@@ -0,0 +1,194 @@
+# -*- coding: utf-8 -*-
+
+import logging
+from difflib import SequenceMatcher
+from typing import Any, Dict, List, Optional, Tuple
+
+from pytion.models import Block, BlockArray, BlockNode
+
+
+logger = logging.getLogger(__name__)
+
+# block types which can be created and updated (see `Block.get()`)
+WRITABLE_TYPES = (
+    "paragraph", "quote", "heading_1", "heading_2", "heading_3", "to_do",
+    "bulleted_list_item", "numbered_list_item", "toggle", "callout", "code",
+)
+# live blocks of these types are never archived or matched (subpages and databases are kept in place)
+PROTECTED_TYPES = ("child_page", "child_database")
+# compared fields besides the text and their values if missed
+FIELDS = {
+    "to_do": {"checked": False},
+    "code": {"language": "plain text"},
+    "heading_1": {"is_toggleable": False},
+    "heading_2": {"is_toggleable": False},
+    "heading_3": {"is_toggleable": False},
+}
+
+
+class BlockOp(object):
+    def __init__(
+            self, action: str, id_: str, patch: Optional[Dict] = None, after: Optional[str] = None,
+            blocks: Optional[BlockArray] = None,
+    ):
+        """
+        One write operation of `Element.block_sync()`
+
+        :param action:  `update`, `append` or `archive`
+        :param id_:     ID of the updated/archived block or of the parent of appended blocks
+        :param patch:   changed fields (update)
+        :param after:   ID of the block to append after, None - to the end (append)
+        :param blocks:  new blocks with their children (append)
+        """
+        self.action = action
+        self.id = id_
+        self.patch = patch
+        self.after = after
+        self.blocks = blocks
+
+    def __repr__(self):
+        if self.action == "append":
+            return f"BlockOp(append {len(self.blocks)} to {self.id} after {self.after})"
+        return f"BlockOp({self.action} {self.id})"
+
+
+def _content(block: Block) -> Optional[Dict[str, Any]]:
+    """
+    API content of the block type: received one for live blocks, `.get()` for created ones
+    """
+    if block.type not in WRITABLE_TYPES:
+        return None
+    if block.create_mode:
+        return (block.get() or {}).get(block.type)
+    return block.raw.get(block.type)
+
+
+def _text(content: Dict[str, Any]) -> str:
+    # only plain text can be written (see `RichText.get()`), so formatting and mentions are not compared
+    return "".join(
+        item.get("plain_text") if "plain_text" in item else item.get("text", {}).get("content", "")
+        for item in content.get("rich_text") or []
+    )
+
+
+def block_key(block: Block) -> Tuple:
+    """
+    Comparable content of the block: blocks with equal keys do not need updates
+    """
+    content = _content(block)
+    if content is None:
+        return (block.type,)
+    fields = FIELDS.get(block.type, {})
+    return (block.type, _text(content)) + tuple(
+        content.get(name) if content.get(name) is not None else default for name, default in fields.items()
+    )
+
+
+def block_patch(live: Block, desired: Block) -> Dict[str, Dict]:
+    """
+    Fields of the desired block which differ from the live one (both of the same type)
+    """
+    before, after = _content(live) or {}, _content(desired) or {}
+    patch = {}
+    if _text(before) != _text(after):
+        patch["rich_text"] = after.get("rich_text", [])
+    for name, default in FIELDS.get(desired.type, {}).items():
+        value = after.get(name) if after.get(name) is not None else default
+        if (before.get(name) if before.get(name) is not None else default) != value:
+            patch[name] = value
+    return {desired.type: patch} if patch else {}
+
+
+def diff_blocks(parent_id: str, live: List[BlockNode], desired: List[BlockNode]) -> List[BlockOp]:
+    """
+    The smallest list of operations to turn live children of the parent into desired ones.
+    Equal blocks are kept (with their IDs), changed blocks of the same type are updated,
+    new blocks are appended after the previous kept block, the rest are archived.
+    Children of kept and updated blocks are compared recursively.
+
+    :param parent_id:   ID of the page or the block
+    :param live:        `BlockArray.tree()` of received blocks (`get_block_children_recursive`)
+    :param desired:     `BlockArray.tree()` of created blocks (`Block.create()`)
+    """
+    live = [node for node in live if node[0].type not in PROTECTED_TYPES]
+    opcodes = SequenceMatcher(
+        None, [block_key(b) for b, _ in live], [block_key(b) for b, _ in desired], autojunk=False
+    ).get_opcodes()
+    # steps: (action, live node, desired node)
+    steps = []
+    for tag, i1, i2, j1, j2 in opcodes:
+        if tag == "equal":
+            steps.extend(("keep", live[i], desired[j]) for i, j in zip(range(i1, i2), range(j1, j2)))
+            continue
+        old, new = live[i1:i2], desired[j1:j2]
+        # changed blocks of the same type are updated in place
+        while old and new and old[0][0].type == new[0][0].type and old[0][0].type in WRITABLE_TYPES:
+            steps.append(("update", old.pop(0), new.pop(0)))
+        steps.extend(("archive", node, None) for node in old)
+        steps.extend(("insert", None, node) for node in new)
+    steps = _anchor_leading(steps)
+
+    ops = []
+    after, pending = None, []
+
+    def flush():
+        if pending:
+            blocks = BlockArray([], create=True)
+
+            def add(nodes: List[BlockNode]) -> None:
+                for block, children in nodes:
+                    blocks.append(block)
+                    add(children)
+
+            add(pending)
+            ops.append(BlockOp("append", parent_id, after=after, blocks=blocks))
+            pending.clear()
+
+    for action, live_node, desired_node in steps:
+        if action == "insert":
+            if _content(desired_node[0]) is None:
+                raise ValueError(f"`{desired_node[0].type}` blocks can not be created")
+            pending.append(desired_node)
+        elif action == "archive":
+            ops.append(BlockOp("archive", live_node[0].id))
+        else:
+            # new blocks can be placed only after existing ones
+            flush()
+            after = live_node[0].id
+            if action == "update":
+                patch = block_patch(live_node[0], desired_node[0])
+                if patch:
+                    ops.append(BlockOp("update", live_node[0].id, patch=patch))
+            ops.extend(diff_blocks(live_node[0].id, live_node[1], desired_node[1]))
+    flush()
+    return ops
+
+
+def _anchor_leading(steps: List[Tuple]) -> List[Tuple]:
+    """
+    API appends only after existing blocks, so blocks inserted before the first kept one need an anchor:
+    the first kept block of the same type becomes the first inserted block (update) and its content is inserted,
+    otherwise all blocks are archived and appended again.
+    """
+    leading = 0
+    while leading < len(steps) and steps[leading][0] in ("insert", "archive"):
+        leading += 1
+    inserted = [step for step in steps[:leading] if step[0] == "insert"]
+    if not inserted or leading == len(steps):
+        return steps
+    first = inserted[0][2]
+    action, live_node, desired_node = steps[leading]
+    if live_node[0].type == first[0].type and first[0].type in WRITABLE_TYPES:
+        archived = [step for step in steps[:leading] if step[0] == "archive"]
+        return (
+            archived + [("update", live_node, first)] + inserted[1:] + [("insert", None, desired_node)]
+            + steps[leading + 1:]
+        )
+    logger.debug("Blocks can not be inserted before the first block. All blocks are appended again")
+    result = []
+    for action, live_node, desired_node in steps:
+        if live_node is not None:
+            result.append(("archive", live_node, None))
+        if desired_node is not None:
+            result.append(("insert", None, desired_node))
+    return [step for step in result if step[0] == "archive"] + [step for step in result if step[0] == "insert"]
@@ -16,6 +16,63 @@ except FileNotFoundError:
 # Current API Version (mandatory)
 NOTION_VERSION = "2022-06-28"
 
+# Requests rate limit of one `Notion` object (requests per second). Set `0` to disable
+RATE_LIMIT = 3
+# How many requests can be sent at once before the rate limit applies
+RATE_LIMIT_BURST = 3
+
+# Retries of requests failed with 429, 5xx or connection errors. Set `0` to disable
+RETRY_MAX = 3
+# Exponential backoff: random delay up to `RETRY_BACKOFF * 2 ** attempt` seconds, but not more than `RETRY_BACKOFF_MAX`
+RETRY_BACKOFF = 0.5
+RETRY_BACKOFF_MAX = 30
+
+# HTTP connections of one `Notion` object kept open for reuse. Should not be less than the number of threads
+# sending requests at once (`workers`), otherwise extra connections are closed after every request
+POOL_SIZE = 10
+# Keep connections open between requests. `False` - new connection (and TLS handshake) for every request
+KEEP_ALIVE = True
+# Seconds to wait for the connection and for the answer (between received bytes). Set `None` to wait forever
+CONNECT_TIMEOUT = 10
+READ_TIMEOUT = 60
+
+# Concurrent requests of `Element.page_create_many()`. Should exceed `RATE_LIMIT` * request time (~1s)
+# to keep the rate limit saturated
+BULK_WORKERS = 6
+
+# API limits of one `block_append` request: children in one list, levels of nesting, blocks in total.
+# Bigger inputs are split into several requests
+BLOCK_CHILDREN_MAX = 100
+BLOCK_NESTING_MAX = 2
+BLOCK_REQUEST_MAX = 1000
+# API limits of rich text: characters in one rich text object, objects in one array
+RICH_TEXT_MAX = 2000
+RICH_TEXT_ITEMS_MAX = 100
+
+# Response cache (optional, `Notion(cache=ResponseCache())`). Max number of cached GET answers
+CACHE_SIZE = 1024
+# Seconds to keep cached answers per resource type. Set `0` to do not cache the type
+CACHE_TTL = {"users": 3600, "databases": 300, "pages": 60, "blocks": 60}
+CACHE_TTL_DEFAULT = 60
+
+# Decode Page properties and Block content on the first access only (`Page(lazy=True)`, `Block(lazy=True)`)
+LAZY_DECODING = False
+
+# Max nesting of `and`/`or` filter groups supported by API
+FILTER_MAX_DEPTH = 2
+
+# JSON library for request and response bodies: "auto" (orjson if installed), "orjson" or "json"
+JSON_CODEC = "auto"
+
+# Persistent store file (optional, `Notion(store=SQLiteStore())`)
+STORE_PATH = "pytion.db"
+# API rounds `last_edited_time` to minutes, so the parent edited again in the same minute keeps the same value.
+# Children of the parent edited less than this seconds before the request are not stored (with clock skew margin)
+STORE_EDIT_WINDOW = 120
+
+# Seconds between background refreshes of `pytion.mirror.DatabaseMirror`
+MIRROR_REFRESH = 60
+
 # Logging settings (mandatory)
 LOGGING_BASE_LEVEL = logging.WARNING
 LOGGING_TO_CONSOLE = False
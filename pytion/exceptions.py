@@ -1,11 +1,14 @@
 # -*- coding: utf-8 -*-
 
 import logging
-import json
-from typing import Dict
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Dict, Optional
 
 from requests import Response
 
+import pytion.codec as codec
+
 
 logger = logging.getLogger(__name__)
 
@@ -99,9 +102,11 @@ class ConflictError(ClientError):
 
 
 class RateLimited(ClientError):
-    def __init__(self, *args):
+    def __init__(self, req: Optional[Response] = None):
         message = "This request exceeds the number of requests allowed. Slow down and try again."
         Exception.__init__(self, message)
+        self.req = req
+        self.retry_after = retry_after(req)
 
 
 class InternalServerError(ServerError):
@@ -116,15 +121,18 @@ class InternalServerError(ServerError):
 
 
 class ServiceUnavailable(ServerError):
-    def __init__(self, *args):
+    def __init__(self, req: Optional[Response] = None):
         message = "Notion is unavailable. Try again later."
         Exception.__init__(self, message)
+        self.req = req
+        self.retry_after = retry_after(req)
 
 
 class DatabaseConnectionUnavailable(ServerError):
-    def __init__(self, *args):
+    def __init__(self, req: Optional[Response] = None):
         message = "Notion's database is unavailable or in an unqueryable state. Try again later."
         Exception.__init__(self, message)
+        self.req = req
 
 
 class ContentError(Exception):
@@ -148,10 +156,31 @@ class ContentError(Exception):
         self.error = message
 
 
+def retry_after(req: Optional[Response]) -> Optional[float]:
+    """
+    Seconds from `Retry-After` header (delay-seconds or HTTP-date format) or None
+    """
+    if req is None or not req.headers.get("Retry-After"):
+        return None
+    value = req.headers["Retry-After"].strip()
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        date = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if date.tzinfo is None:
+        date = date.replace(tzinfo=timezone.utc)
+    return max((date - datetime.now(timezone.utc)).total_seconds(), 0.0)
+
+
 def find_response_error(req: Response) -> Dict:
     try:
-        content = req.json()
-    except json.JSONDecodeError:
+        # bytes are decoded by `pytion.codec` directly, without `requests` charset detection
+        content = codec.loads(req.content)
+    except ValueError:
         logger.error(f"Result is not OK. JSON decoding fail\n{req.content}")
         raise ContentError(req)
     if req.ok:
@@ -181,13 +210,13 @@ def find_response_error(req: Response) -> Dict:
         elif error_code == "conflict_error":
             raise ConflictError()
         elif error_code == "rate_limited":
-            raise RateLimited()
+            raise RateLimited(req)
         elif error_code == "internal_server_error":
             raise InternalServerError(req)
         elif error_code == "service_unavailable":
-            raise ServiceUnavailable()
+            raise ServiceUnavailable(req)
         elif error_code == "database_connection_unavailable":
-            raise DatabaseConnectionUnavailable()
+            raise DatabaseConnectionUnavailable(req)
     if 400 <= status_code < 500:
         raise ClientError(req)
     elif 500 <= status_code < 600:
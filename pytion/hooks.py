@@ -0,0 +1,150 @@
+# -*- coding: utf-8 -*-
+
+import contextvars
+import logging
+import sys
+from concurrent.futures import Executor, Future
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional
+
+
+logger = logging.getLogger(__name__)
+
+# before_request:   the request is about to be sent (every attempt)
+# after_response:   the answer is received (any status, before it is checked for errors)
+# on_retry:         the attempt failed and the request is repeated after `delay` seconds
+# on_error:         the request failed finally, the exception is raised after the hook
+HOOKS = ("before_request", "after_response", "on_retry", "on_error")
+
+# the method called by user, set for the threads and tasks started by it (see `submit()` and `caller_context()`)
+CALLER: contextvars.ContextVar = contextvars.ContextVar("pytion_caller", default=None)
+
+
+class RequestEvent(object):
+    __slots__ = (
+        "method", "path", "caller", "page", "attempt", "request_bytes", "status", "latency", "response_bytes",
+        "error", "delay", "started",
+    )
+
+    def __init__(
+            self, method: str, path: str, caller: Optional[str] = None, page: int = 0, attempt: int = 0,
+            request_bytes: int = 0,
+    ):
+        """
+        One attempt of the request passed to hooks
+
+        :param method:          HTTP method (`get`, `post`, `patch`, `delete`)
+        :param path:            URL without API base, with the query string (`blocks/ID/children?page_size=10`)
+        :param caller:          the method of `Notion` or `Element` which sends the request (`block_append`)
+        :param page:            index of the page of the paginated answer (0 - the first request)
+        :param attempt:         number of retries done before this attempt
+        :param request_bytes:   size of the body
+
+        Filled after the answer:
+        `status` (None if there is no answer), `latency` (seconds), `response_bytes`,
+        `error` (the exception for `on_retry` and `on_error`), `delay` (seconds before the retry)
+        """
+        self.method = method
+        self.path = path
+        self.caller = caller
+        self.page = page
+        self.attempt = attempt
+        self.request_bytes = request_bytes
+        self.status: Optional[int] = None
+        self.latency: Optional[float] = None
+        self.response_bytes = 0
+        self.error: Optional[Exception] = None
+        self.delay: Optional[float] = None
+        self.started = 0.0
+
+    def __repr__(self):
+        return f"RequestEvent({self.method} {self.path} {self.status})"
+
+
+class Hooks(object):
+    def __init__(self):
+        """
+        Functions called on every request of a `Notion` object with `RequestEvent` (`Notion.hooks`).
+        Hooks are called in the thread (or event loop) of the request, so they should be fast.
+        Errors of hooks are logged and do not break requests. Nothing is done if no hooks are added.
+
+        `no.hooks.add("after_response", lambda e: print(e.caller, e.path, e.status, e.latency))`
+        """
+        self.hooks: Dict[str, List[Callable]] = {name: [] for name in HOOKS}
+        self.count = 0
+
+    def __bool__(self):
+        return self.count > 0
+
+    def __repr__(self):
+        return f"Hooks({', '.join(f'{name}: {len(funcs)}' for name, funcs in self.hooks.items() if funcs)})"
+
+    def add(self, name: str, func: Callable[[RequestEvent], None]) -> Callable[[RequestEvent], None]:
+        """
+        :param name:    one of `HOOKS`
+        :param func:    callable(event)
+        :return:        func (to be removed later)
+        """
+        if name not in self.hooks:
+            raise ValueError(f"Allowed hooks {', '.join(HOOKS)} ({name} provided)")
+        self.hooks[name].append(func)
+        self.count += 1
+        return func
+
+    def remove(self, name: str, func: Callable[[RequestEvent], None]) -> None:
+        self.hooks[name].remove(func)
+        self.count -= 1
+
+    def emit(self, name: str, event: RequestEvent) -> None:
+        for func in self.hooks[name]:
+            try:
+                func(event)
+            except Exception as e:
+                logger.warning(f"Hook {name} {func} failed: {e!r}")
+
+
+def find_caller() -> Optional[str]:
+    """
+    Name of the outermost `Notion`/`Element` method in the current stack (the one called by user).
+    Nested functions and private helpers are skipped. Threads and tasks started by the method
+    see their own stack only, so it is passed to them by `CALLER` (see `current_caller()`).
+    """
+    frame = sys._getframe(1)
+    caller = None
+    while frame is not None:
+        code = frame.f_code
+        if (
+                frame.f_globals.get("__name__") == "pytion.api" and code.co_argcount
+                and code.co_varnames[0] == "self" and not code.co_name.startswith("_")
+        ):
+            caller = code.co_name
+        frame = frame.f_back
+    return caller
+
+
+def current_caller() -> Optional[str]:
+    """
+    The method which started the current thread or task (`CALLER`) or the one found in the stack
+    """
+    return CALLER.get() or find_caller()
+
+
+def submit(pool: Executor, func: Callable, *args) -> Future:
+    """
+    `pool.submit()` with `CALLER` of the current thread, so requests of the worker are reported with it
+    """
+    context = contextvars.copy_context()
+    context.run(CALLER.set, current_caller())
+    return pool.submit(context.run, func, *args)
+
+
+@contextmanager
+def caller_context() -> Iterator[None]:
+    """
+    Sets `CALLER` for asyncio tasks created inside (they copy the context of the current task)
+    """
+    token = CALLER.set(current_caller())
+    try:
+        yield
+    finally:
+        CALLER.reset(token)
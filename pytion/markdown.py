@@ -0,0 +1,211 @@
+# -*- coding: utf-8 -*-
+
+import logging
+import re
+from typing import Any, List, Optional, Union
+
+from pytion import envs
+from pytion.models import Block, BlockArray, RichTextArray
+
+
+logger = logging.getLogger(__name__)
+
+HEADING = re.compile(r"^(#{1,6})[ \t]+(.*?)(?:[ \t]+#+)?[ \t]*$")
+DIVIDER = re.compile(r"^(?:(?:-[ \t]*){3,}|(?:\*[ \t]*){3,}|(?:_[ \t]*){3,})$")
+TO_DO = re.compile(r"^[-*+][ \t]+\[([ xX])\](?:[ \t]+(.*))?$")
+BULLET = re.compile(r"^[-*+](?:[ \t]+(.*))?$")
+NUMBERED = re.compile(r"^\d{1,9}[.)](?:[ \t]+(.*))?$")
+QUOTE = re.compile(r"^>[ \t]?(.*)$")
+FENCE = re.compile(r"^(`{3,}|~{3,})[ \t]*([^`\s]*)")
+DETAILS_OPEN = re.compile(r"^<details[^>]*>[ \t]*(?:<summary>(.*?)</summary>)?[ \t]*$", re.IGNORECASE)
+DETAILS_CLOSE = re.compile(r"^</details>[ \t]*$", re.IGNORECASE)
+SUMMARY = re.compile(r"^<summary>(.*?)</summary>[ \t]*$", re.IGNORECASE)
+# common names of fenced code languages which differ from API ones
+LANGUAGES = {
+    "": "plain text", "text": "plain text", "txt": "plain text", "plaintext": "plain text",
+    "py": "python", "python3": "python", "js": "javascript", "ts": "typescript", "sh": "shell", "zsh": "shell",
+    "yml": "yaml", "rb": "ruby", "rs": "rust", "kt": "kotlin", "golang": "go", "md": "markdown",
+    "cpp": "c++", "cs": "c#", "csharp": "c#", "ps1": "powershell", "dockerfile": "docker",
+}
+
+
+def rich_text(text: str) -> Union[str, RichTextArray]:
+    """
+    Text as is or split into pieces of `envs.RICH_TEXT_MAX` characters (API limit of one rich text object)
+    """
+    if len(text) <= envs.RICH_TEXT_MAX:
+        return text
+    return RichTextArray([
+        {"type": "text", "plain_text": text[i:i + envs.RICH_TEXT_MAX], "text": {}}
+        for i in range(0, len(text), envs.RICH_TEXT_MAX)
+    ])
+
+
+def text_blocks(text: str, type_: str = "paragraph", level: int = 0, **kwargs) -> List[Block]:
+    """
+    Blocks of the type with the text. Text longer than `envs.RICH_TEXT_ITEMS_MAX` rich text objects
+    is continued by the next blocks of the same type
+
+    :param text:    Block content of any length
+    :param type_:   Block type (API)
+    :param level:   nesting level (`Block.create()`)
+    :param kwargs:  see `Block.create()`
+    """
+    size = envs.RICH_TEXT_MAX * envs.RICH_TEXT_ITEMS_MAX
+    parts = [text[i:i + size] for i in range(0, len(text), size)] or [""]
+    return [Block.create(rich_text(part), type_, level=level, **kwargs) for part in parts]
+
+
+def _join(lines: List[str]) -> str:
+    # soft line breaks are spaces, hard ones (two trailing spaces or backslash) are kept
+    parts = []
+    for i, line in enumerate(lines):
+        text = line.strip()
+        if i == len(lines) - 1:
+            parts.append(text)
+        elif text.endswith("\\"):
+            parts.append(text[:-1].rstrip() + "\n")
+        else:
+            parts.append(text + ("\n" if line.endswith("  ") else " "))
+    return "".join(parts)
+
+
+class _Parser(object):
+    def __init__(self):
+        self.blocks: List[Block] = []
+        # open containers: (indent of list item or -1 for <details>) - level of the line is their number
+        self.stack: List[int] = []
+        # block with text lines which may be continued: (type, level, lines, kwargs)
+        self.current: Optional[List[Any]] = None
+        # code fence: (fence, indent, language, level, lines)
+        self.fence: Optional[List[Any]] = None
+        # toggle waiting for <summary> line
+        self.summary: Optional[Block] = None
+
+    def close(self) -> None:
+        if self.current:
+            type_, level, lines, kwargs = self.current
+            if type_ == "quote":
+                text = "\n".join(line.strip() for line in lines)
+            else:
+                text = _join(lines)
+            self.blocks.extend(text_blocks(text, type_, level, **kwargs))
+            self.current = None
+
+    def open(self, type_: str, indent: int, text: Optional[str], **kwargs) -> None:
+        self.close()
+        level = self.level(indent)
+        self.current = [type_, level, [text or ""], kwargs]
+        if type_ in ("bulleted_list_item", "numbered_list_item", "to_do"):
+            self.stack.append(indent)
+
+    def level(self, indent: int) -> int:
+        # list items with the same or bigger indent are closed, <details> are closed by tag only
+        while self.stack and 0 <= self.stack[-1] and indent <= self.stack[-1]:
+            self.stack.pop()
+        return len(self.stack)
+
+    def code(self, line: str) -> None:
+        fence, indent, language, level, lines = self.fence
+        stripped = line.strip()
+        if stripped.startswith(fence) and not stripped.strip(fence[0]):
+            self.blocks.extend(text_blocks("\n".join(lines), "code", level, language=language))
+            self.fence = None
+            return
+        # remove the indent of the fence only
+        width = len(line) - len(line.lstrip(" "))
+        lines.append(line[min(width, indent):])
+
+    def feed(self, line: str) -> None:
+        line = line.rstrip("\n").expandtabs(4)
+        if self.fence:
+            return self.code(line)
+        content = line.lstrip(" ")
+        indent = len(line) - len(content)
+        if not content:
+            self.close()
+            return
+        summary = self.summary
+        self.summary = None
+        if summary is not None and SUMMARY.match(content):
+            summary.text = rich_text(SUMMARY.match(content).group(1).strip())
+            return
+
+        match = FENCE.match(content)
+        if match:
+            self.close()
+            language = match.group(2).lower()
+            self.fence = [match.group(1), indent, LANGUAGES.get(language, language), self.level(indent), []]
+            return
+        match = DETAILS_OPEN.match(content)
+        if match:
+            self.close()
+            toggle = Block.create(rich_text((match.group(1) or "").strip()), "toggle", level=self.level(indent))
+            self.blocks.append(toggle)
+            self.stack.append(-1)
+            if match.group(1) is None:
+                self.summary = toggle
+            return
+        if DETAILS_CLOSE.match(content):
+            self.close()
+            while self.stack and self.stack.pop() >= 0:
+                pass
+            return
+        match = HEADING.match(content)
+        if match:
+            self.close()
+            level = self.level(indent)
+            type_ = f"heading_{min(len(match.group(1)), 3)}"
+            self.blocks.extend(text_blocks(match.group(2), type_, level))
+            return
+        if DIVIDER.match(content):
+            # dividers can not be created (see `Block.get()`)
+            self.close()
+            logger.debug("Markdown divider is skipped")
+            return
+        match = TO_DO.match(content)
+        if match:
+            return self.open("to_do", indent, match.group(2), checked=match.group(1) != " ")
+        match = BULLET.match(content)
+        if match:
+            return self.open("bulleted_list_item", indent, match.group(1))
+        match = NUMBERED.match(content)
+        if match:
+            return self.open("numbered_list_item", indent, match.group(1))
+        match = QUOTE.match(content)
+        if match:
+            if self.current and self.current[0] == "quote":
+                self.current[2].append(match.group(1))
+            else:
+                self.open("quote", indent, match.group(1))
+            return
+        # lazy continuation of the open paragraph, list item or quote
+        if self.current:
+            self.current[2].append(line)
+            return
+        self.open("paragraph", indent, content)
+
+    def finish(self) -> BlockArray:
+        if self.fence:
+            fence, indent, language, level, lines = self.fence
+            self.blocks.extend(text_blocks("\n".join(lines), "code", level, language=language))
+            self.fence = None
+        self.close()
+        return BlockArray(self.blocks, create=True)
+
+
+def parse(text: str) -> BlockArray:
+    """
+    Markdown to the blocks ready to `block_append()`: headings, bulleted and numbered lists, to_do (`- [ ]`),
+    fenced code with the language, quotes and toggles (`<details><summary>`). Nesting is taken from the indent
+    of list items and from `<details>`. Inline formatting is kept as written (created rich text is plain).
+    Text longer than the API limits is split (see `text_blocks()`). Dividers are skipped.
+
+    `with open("doc.md") as f:`
+        `blocks = parse(f.read())`
+    `no.pages.block_append("PAGE ID", blocks=blocks, workers=4)`
+    """
+    parser = _Parser()
+    for line in text.splitlines():
+        parser.feed(line)
+    return parser.finish()
@@ -0,0 +1,241 @@
+# -*- coding: utf-8 -*-
+
+import json
+import logging
+import sqlite3
+import threading
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+import pytion.envs as envs
+from pytion.api import Element
+from pytion.models import Database, LinkTo, Page, PageArray, PropertyValue, User
+
+
+logger = logging.getLogger(__name__)
+
+
+class DatabaseMirror(object):
+    # SQLite column types by Notion property type. Other types are stored as TEXT
+    column_types = {"number": "REAL", "checkbox": "INTEGER", "formula": "", "rollup": ""}
+
+    def __init__(self, database: Element, path: str = ":memory:", indexes: Optional[List[str]] = None):
+        """
+        Local copy of the database in a SQLite table: one column per property (from `Database.properties`),
+        one row per page (values from `PropertyValue.value`). Lookups and range scans do not send requests.
+        Columns are named `p_<property name>` (see `.columns`), so any property name can be stored.
+        Lists (multi_select, people, relation) are stored as JSON arrays, users and relations as IDs.
+
+        Pages removed from the database are kept until `.refresh(full=True)`.
+
+        :param database:    database Element (`no.databases.get("DATABASE ID")`)
+        :param path:        SQLite database file
+        :param indexes:     names of properties to create secondary indexes on
+
+        `mirror = DatabaseMirror(no.databases.get("DATABASE ID"), indexes=["Status", "Due"])`
+        `mirror.refresh()`
+        `mirror.start(interval=60)  # refresh in background thread`
+        `print(mirror.get("Status", "Done"))`
+        `print(mirror.range("Due", "2022-05-01", "2022-05-31"))`
+        """
+        if not isinstance(database.obj, Database):
+            raise ValueError("Database Element is expected. Use `no.databases.get()` before")
+        self.element = database
+        self.database: Database = database.obj
+        self.path = path
+        self.table = f"db_{self.database.id}"
+        self.indexes = indexes or []
+        self.watermark: Optional[str] = None
+        self.lock = threading.RLock()
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.columns = self._column_names()
+        self._create_table()
+
+    @staticmethod
+    def quote(name: str) -> str:
+        return '"' + name.replace('"', '""') + '"'
+
+    def _column_names(self) -> Dict[str, str]:
+        """
+        Column of every property: `p_<name>`. SQLite names are case-insensitive,
+        so names which differ only in case get the suffix (`p_Status`, `p_status_2`)
+        """
+        columns, used = {}, {"id", "last_edited_time", "raw"}
+        for name in self.database.properties:
+            column, n = f"p_{name}", 1
+            while column.lower() in used:
+                n += 1
+                column = f"p_{name}_{n}"
+            used.add(column.lower())
+            columns[name] = column
+        return columns
+
+    def _column(self, property_name: str) -> str:
+        if property_name not in self.columns:
+            raise ValueError(f"Database has no property `{property_name}`")
+        return self.quote(self.columns[property_name])
+
+    def _create_table(self) -> None:
+        table = self.quote(self.table)
+        with self.lock, self.connection:
+            self.connection.execute(
+                f"CREATE TABLE IF NOT EXISTS {table} (id TEXT PRIMARY KEY, last_edited_time TEXT, raw TEXT)"
+            )
+            self.connection.execute("CREATE TABLE IF NOT EXISTS mirror_meta (tbl TEXT PRIMARY KEY, watermark TEXT)")
+            existing = {row[1].lower() for row in self.connection.execute(f"PRAGMA table_info({table})")}
+            for name, prop in self.database.properties.items():
+                if self.columns[name].lower() not in existing:
+                    type_ = self.column_types.get(prop.type, "TEXT")
+                    self.connection.execute(f"ALTER TABLE {table} ADD COLUMN {self.quote(self.columns[name])} {type_}")
+            for name in self.indexes:
+                if name not in self.columns:
+                    raise ValueError(f"Database has no property `{name}` to index")
+                index = self.quote(f"{self.table}_{self.columns[name]}")
+                self.connection.execute(f"CREATE INDEX IF NOT EXISTS {index} ON {table} ({self._column(name)})")
+            row = self.connection.execute("SELECT watermark FROM mirror_meta WHERE tbl = ?", (self.table,)).fetchone()
+            self.watermark = row[0] if row else None
+
+    @classmethod
+    def sql_value(cls, value: Any) -> Any:
+        """
+        Converts `PropertyValue.value` to SQLite value
+        """
+        if value is None or isinstance(value, (int, float, str)):
+            return int(value) if isinstance(value, bool) else value
+        if isinstance(value, PropertyValue):
+            return cls.sql_value(value.value)
+        if isinstance(value, datetime):
+            return value.isoformat()
+        if isinstance(value, (User, LinkTo)):
+            return value.id
+        if isinstance(value, list):
+            return json.dumps([cls.sql_value(v) for v in value], ensure_ascii=False)
+        return str(value)
+
+    def _row(self, page: Page) -> List[Any]:
+        return [page.id, page.raw.get("last_edited_time"), json.dumps(page.raw, ensure_ascii=False)] + [
+            self.sql_value(page.properties[name].value) if name in page.properties else None
+            for name in self.database.properties
+        ]
+
+    def put(self, pages: PageArray) -> None:
+        names = ["id", "last_edited_time", "raw"] + [self.columns[name] for name in self.database.properties]
+        sql = (
+            f"INSERT OR REPLACE INTO {self.quote(self.table)} ({', '.join(map(self.quote, names))}) "
+            f"VALUES ({', '.join('?' * len(names))})"
+        )
+        with self.lock, self.connection:
+            self.connection.executemany(sql, [self._row(page) for page in pages])
+
+    def refresh(self, full: bool = False) -> int:
+        """
+        Requests pages changed since the last refresh (`Element.db_sync`) or all pages if `full`.
+        Full refresh removes the pages which are not in the database anymore.
+
+        :return:    number of received pages
+        """
+        if full or not self.watermark:
+            pages = self.element.db_query().obj
+        else:
+            pages = self.element.db_sync(since=self.watermark).obj
+        watermark = max([self.watermark or ""] + [p.raw.get("last_edited_time") or "" for p in pages])
+        with self.lock, self.connection:
+            self.put(pages)
+            if full or not self.watermark:
+                ids = {p.id for p in pages}
+                removed = [
+                    (id_,) for id_, in self.connection.execute(f"SELECT id FROM {self.quote(self.table)}")
+                    if id_ not in ids
+                ]
+                self.connection.executemany(f"DELETE FROM {self.quote(self.table)} WHERE id = ?", removed)
+            if watermark:
+                self.connection.execute(
+                    "INSERT OR REPLACE INTO mirror_meta (tbl, watermark) VALUES (?, ?)", (self.table, watermark)
+                )
+                self.watermark = watermark
+        logger.debug(f"Mirror of {self.database.id} is refreshed: {len(pages)} pages received")
+        return len(pages)
+
+    def start(self, interval: float = envs.MIRROR_REFRESH) -> None:
+        """
+        Starts the daemon thread to refresh the mirror every `interval` seconds
+        """
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, args=(interval,), daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+
+    def _loop(self, interval: float) -> None:
+        while True:
+            try:
+                self.refresh()
+            except Exception as e:
+                logger.warning(f"Mirror of {self.database.id} is not refreshed: {e!r}")
+            if self._stop.wait(interval):
+                return
+
+    def _select(self, where: str = "", params: tuple = (), order: str = "", limit: int = 0) -> PageArray:
+        sql = f"SELECT raw FROM {self.quote(self.table)}"
+        if where:
+            sql += f" WHERE {where}"
+        if order:
+            sql += f" ORDER BY {order}"
+        if limit:
+            sql += f" LIMIT {int(limit)}"
+        with self.lock:
+            rows = self.connection.execute(sql, params).fetchall()
+        return PageArray([json.loads(row[0]) for row in rows])
+
+    def get(self, property_name: str, value: Any) -> PageArray:
+        """
+        Pages with the property equal to the value
+
+        `mirror.get("Done", True)`
+        """
+        return self._select(f"{self._column(property_name)} = ?", (self.sql_value(value),))
+
+    def range(
+            self, property_name: str, start: Any = None, end: Any = None, limit: int = 0, descending: bool = False
+    ) -> PageArray:
+        """
+        Pages with the property value between `start` and `end` (both included), sorted by this property
+
+        `mirror.range("Due", "2022-05-01", "2022-05-31T23:59")`
+        `mirror.range("Price", start=100, limit=10)`
+        """
+        column = self._column(property_name)
+        conditions, params = [], []
+        if start is not None:
+            conditions.append(f"{column} >= ?")
+            params.append(self.sql_value(start))
+        if end is not None:
+            conditions.append(f"{column} <= ?")
+            params.append(self.sql_value(end))
+        if start is None and end is None:
+            conditions.append(f"{column} IS NOT NULL")
+        order = f"{column} {'DESC' if descending else 'ASC'}"
+        return self._select(" AND ".join(conditions), tuple(params), order, limit)
+
+    def all(self) -> PageArray:
+        return self._select()
+
+    def close(self) -> None:
+        self.stop()
+        with self.lock:
+            self.connection.close()
+
+    def __len__(self):
+        with self.lock:
+            return self.connection.execute(f"SELECT COUNT(*) FROM {self.quote(self.table)}").fetchone()[0]
+
+    def __repr__(self):
+        return f"DatabaseMirror({self.database}, {len(self)} pages)"
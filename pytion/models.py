@@ -1,15 +1,48 @@
 # -*- coding: utf-8 -*-
 from __future__ import annotations
+import weakref
 from datetime import datetime
-from typing import Optional, Dict, Union, List, Any
-from collections.abc import MutableSequence
+from typing import Optional, Dict, Union, List, Any, Tuple, TextIO
+from collections.abc import MutableSequence, MutableMapping
 
+import pytion.envs as envs
+from pytion.columns import Column, to_columns
+from pytion.render import render
 from pytion.envs import NOTION_URL
 
 
 # I wanna use pydantic, but API provide variable names of property
 
+# Every distinct annotations dict is kept once and shared by received rich text objects (do not modify them).
+# The number of combinations is small, the cache is limited anyway
+_annotations: Dict[tuple, Dict[str, Union[bool, str]]] = {}
+_ANNOTATIONS_MAX = 4096
+
+
+def intern_annotations(rich_text: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Replaces `annotations` of the raw rich text object (in place) by the shared equal dict,
+    so the copy decoded from every answer is freed
+    """
+    annotations = rich_text.get("annotations")
+    if not annotations:
+        return rich_text
+    try:
+        key = tuple(annotations.items())
+        shared = _annotations.get(key)
+    except TypeError:  # unhashable values
+        return rich_text
+    if shared is None:
+        if len(_annotations) >= _ANNOTATIONS_MAX:
+            return rich_text
+        shared = _annotations.setdefault(key, dict(annotations))
+    rich_text["annotations"] = shared
+    return rich_text
+
+
 class RichText(object):
+    __slots__ = ("plain_text", "href", "annotations", "type", "simple", "data")
+
     def __init__(self, **kwargs) -> None:
         self.plain_text: str = kwargs.get("plain_text")
         self.href: Optional[str] = kwargs.get("href")
@@ -21,7 +54,7 @@ class RichText(object):
         if self.type == "mention":
             subtype = kwargs[self.type].get("type")
             if subtype == "user":
-                self.data = User(**kwargs[self.type].get(subtype))
+                self.data = User.intern(kwargs[self.type].get(subtype))
                 self.plain_text = str(self.data)
                 self.simple = LinkTo(from_object=self.data).link
             elif subtype == "page":
@@ -85,8 +118,10 @@ class RichText(object):
 
 
 class RichTextArray(MutableSequence):
+    __slots__ = ("array",)
+
     def __init__(self, array: List[Dict]) -> None:
-        self.array = [RichText(**rt) for rt in array]
+        self.array = [RichText(**intern_annotations(rt)) for rt in array]
 
     def __getitem__(self, item):
         return self.array[item]
@@ -134,7 +169,10 @@ class User(object):
     """
     The User object represents a user in a Notion workspace.
     """
+    __slots__ = ("id", "object", "type", "name", "avatar_url", "email", "workspace_name", "raw", "__weakref__")
     path = "users"
+    # partial users (`created_by`, `last_edited_by`) by ID, shared while any object refers to them
+    _interned = weakref.WeakValueDictionary()
 
     def __init__(self, **kwargs) -> None:
         """
@@ -190,6 +228,20 @@ class User(object):
     def create(cls, id: str):
         return cls(object="user", id=id)
 
+    @classmethod
+    def intern(cls, data: Dict[str, Any]) -> User:
+        """
+        User object from API dict. Partial users (only `object` and `id`) are repeated in every Page and Block,
+        so they are created once and shared.
+        """
+        if data.keys() - {"object", "id"}:
+            return cls(**data)
+        user = cls._interned.get(data.get("id"))
+        if user is None:
+            user = cls(**data)
+            cls._interned[data.get("id")] = user
+        return user
+
 
 class Model(object):
     """
@@ -201,14 +253,15 @@ class Model(object):
     :param last_edited_by:
     :param raw:
     """
+    __slots__ = ("id", "object", "created_time", "last_edited_time", "created_by", "last_edited_by", "raw")
 
     def __init__(self, **kwargs) -> None:
         self.id = kwargs.get("id", "").replace("-", "")
         self.object = kwargs.get("object")
         self.created_time = self.format_iso_time(kwargs.get("created_time"))
         self.last_edited_time = self.format_iso_time(kwargs.get("last_edited_time"))
-        self.created_by = User(**kwargs["created_by"]) if kwargs.get("created_by") else None
-        self.last_edited_by = User(**kwargs["last_edited_by"]) if kwargs.get("last_edited_by") else None
+        self.created_by = User.intern(kwargs["created_by"]) if kwargs.get("created_by") else None
+        self.last_edited_by = User.intern(kwargs["last_edited_by"]) if kwargs.get("last_edited_by") else None
         self.raw = kwargs
 
     @classmethod
@@ -219,6 +272,12 @@ class Model(object):
 
 
 class Property(object):
+    __slots__ = (
+        "to_delete", "id", "type", "name", "raw", "subtype", "relation", "relation_property_id",
+        "relation_property_name", "options", "groups", "function", "rollup_property_id", "rollup_property_name",
+        "prefix",
+    )
+
     def __init__(self, data: Dict[str, Any]):
         self.to_delete = True if data.get("type", False) is None else False
         self.id: str = data.get("id")
@@ -332,17 +391,32 @@ class Property(object):
 
 
 class PropertyValue(Property):
+    __slots__ = ("value", "truncated", "start", "end", "has_more")
+    # Page object contains only first 25 references of these types. (c)
+    # the rest can be retrieved by page property endpoint only
+    inline_limit = 25
+    inline_limited_types = ("title", "rich_text", "relation", "people", "rollup")
+
     def __init__(self, data: Dict, name: str, **kwargs):
         super().__init__(data)
         # getting Paginated Properties (for retrieving property item)
         # *Pagination
-        if data.get("object") and data["object"] == "list":
+        paginated = data.get("object") == "list"
+        if paginated:
             if data.get("results"):
                 self.type = data["results"][0].get("type")
                 data[self.type] = [sub_dict.get(sub_dict.get("type")) for sub_dict in data["results"]]
 
         self.name = name
         self.value = None
+        # True if the value from Page object may be incomplete
+        self.truncated = False
+        if not paginated and self.id and self.type in self.inline_limited_types:
+            items = data.get(self.type)
+            if self.type == "rollup":
+                items = items.get("array") if isinstance(items, dict) else None
+            if isinstance(items, list):
+                self.truncated = len(items) >= self.inline_limit
 
         if self.type in ["title", "rich_text"]:
             if isinstance(data[self.type], list):
@@ -401,13 +475,13 @@ class PropertyValue(Property):
                 self.value: Union[str, int, float, bool] = data["formula"][formula_type]
 
         if self.type == "created_by":
-            self.value = User(**data.get(self.type))
+            self.value = User.intern(data.get(self.type))
 
         if self.type == "last_edited_by":
-            self.value = User(**data.get(self.type))
+            self.value = User.intern(data.get(self.type))
 
         if self.type == "people":
-            self.value = [user if isinstance(user, User) else User(**user) for user in data[self.type]]
+            self.value = [user if isinstance(user, User) else User.intern(user) for user in data[self.type]]
 
         if self.type == "relation":
             self.value: List[LinkTo] = [
@@ -415,6 +489,8 @@ class PropertyValue(Property):
                 for item in data[self.type]
             ]
             self.has_more = data["has_more"] if "has_more" in data else False
+            if "has_more" in data and not paginated:
+                self.truncated = bool(self.has_more)
 
         if self.type == "status":
             self.value = data[self.type].get("name") if isinstance(data[self.type], dict) else data[self.type]
@@ -470,8 +546,8 @@ class PropertyValue(Property):
         if self.type in ["checkbox"]:
             return {self.type: self.value}
 
-        # empty values
-        elif not self.value:
+        # empty values (zero is a number)
+        elif not self.value and not (self.type == "number" and self.value == 0):
             if self.type in ["multi_select", "relation", "rich_text", "people", "files"]:
                 return {self.type: []}
             return {self.type: None}
@@ -545,6 +621,46 @@ class PropertyValue(Property):
         return cls({"type": type_, type_: value, **kwargs}, name="")
 
 
+class PropertyMap(MutableMapping):
+    """
+    Properties of the Page in lazy mode: `PropertyValue` is created on the first access of the property
+    and is kept for the next ones. Unused properties stay raw dicts.
+    """
+
+    def __init__(self, raw: Dict[str, Any]):
+        self.raw = dict(raw)
+        self.decoded: Dict[str, PropertyValue] = {}
+
+    def __getitem__(self, name: str) -> PropertyValue:
+        value = self.decoded.get(name)
+        if value is None:
+            data = self.raw[name]
+            value = data if isinstance(data, PropertyValue) else PropertyValue(data, name)
+            self.decoded[name] = value
+        return value
+
+    def __setitem__(self, name: str, value: PropertyValue) -> None:
+        self.raw[name] = value
+        self.decoded[name] = value
+
+    def __delitem__(self, name: str) -> None:
+        del self.raw[name]
+        self.decoded.pop(name, None)
+
+    def __iter__(self):
+        return iter(self.raw)
+
+    def __len__(self):
+        return len(self.raw)
+
+    def type_of(self, name: str) -> str:
+        data = self.raw[name]
+        return data.type if isinstance(data, PropertyValue) else data.get("type", "")
+
+    def __repr__(self):
+        return f"PropertyMap({', '.join(self.raw)})"
+
+
 class Database(Model):
     object = "database"
     path = "databases"
@@ -619,7 +735,9 @@ class Page(Model):
         :param archived:
         :param properties:
         :param url:
+        :param lazy:        decode properties on the first access only (default is `envs.LAZY_DECODING`)
         """
+        lazy = kwargs.pop("lazy", None)
         super().__init__(**kwargs)
         self.cover: Optional[Dict] = kwargs.get("cover")
         self.icon: Optional[Dict] = kwargs.get("icon")
@@ -628,6 +746,10 @@ class Page(Model):
         self.url: str = kwargs.get("url")
         self.public_url = kwargs.get("public_url")
         self.children = kwargs["children"] if "children" in kwargs else LinkTo(block=self)
+        if envs.LAZY_DECODING if lazy is None else lazy:
+            # the title is decoded on the first access too (see __getattr__)
+            self.properties = PropertyMap(kwargs["properties"])
+            return
         self.properties = {
             name: (PropertyValue(data, name) if not isinstance(data, PropertyValue) else data)
             for name, data in kwargs["properties"].items()
@@ -639,12 +761,63 @@ class Page(Model):
         else:
             self.title = None
 
+    def __getattr__(self, name: str):
+        properties = self.__dict__.get("properties")
+        if name != "title" or not isinstance(properties, PropertyMap):
+            raise AttributeError(f"'{type(self).__name__}' object has no attribute '{name}'")
+        for prop in properties:
+            if "title" in properties.type_of(prop):
+                self.title = properties[prop].value
+                break
+        else:
+            self.title = None
+        return self.title
+
     def __str__(self):
         return str(self.title)
 
     def __repr__(self):
         return f"Page({self.title})"
 
+    def changes(self, values: Optional[Dict[str, Dict]] = None) -> Dict[str, Dict]:
+        """
+        API values of the properties which differ from the received ones (`.raw` is the snapshot).
+        Read-only properties are skipped. In lazy mode only accessed properties can be changed.
+
+        :param values:  {name or ID: API value} to check (current values of `.properties` by default)
+
+        `page.properties["Price"].value = 10`
+        `print(page.changes())`
+        {'Price': {'number': 10}}
+        """
+        if values is None:
+            names = self.properties.decoded if isinstance(self.properties, PropertyMap) else self.properties
+            values = {name: self.properties[name].get() for name in names}
+        original = self.raw.get("properties") or {}
+        changed = {}
+        for name, value in values.items():
+            if value is None:
+                continue
+            data = original.get(name)
+            if data is None:
+                # the title can be set by its ID
+                data = next((d for d in original.values() if self._prop_id(d) == name), None)
+            if data is None:
+                changed[name] = value
+                continue
+            before = (data if isinstance(data, PropertyValue) else PropertyValue(data, name)).get()
+            if before != value:
+                changed[name] = value
+        return changed
+
+    @staticmethod
+    def _prop_id(data: Union[Dict, PropertyValue]) -> Optional[str]:
+        return data.id if isinstance(data, PropertyValue) else data.get("id")
+
+    @property
+    def dirty(self) -> bool:
+        return bool(self.changes())
+
     def get(self):
         new_dict = {
             "parent": self.parent.get(without_type=True),
@@ -669,7 +842,12 @@ class Page(Model):
 
 
 class Block(Model):
-    object = "block"
+    # `object` is an instance attr (slot of Model) here
+    __slots__ = (
+        "type", "has_children", "archived", "_level", "create_mode", "_pending", "children", "parent",
+        "_plain_text", "text", "checked", "language", "caption", "is_toggleable", "icon", "expiry_time", "link",
+        "synced_from", "table_width",
+    )
     path = "blocks"
 
     def __init__(self, **kwargs):
@@ -679,14 +857,33 @@ class Block(Model):
         :param type:
         :param archived:
         :param create_mode:
+        :param lazy:        decode the content (`text`, `simple`, `parent` etc.) on the first access only
+                            (default is `envs.LAZY_DECODING`)
         """
+        lazy = kwargs.pop("lazy", None)
         super().__init__(**kwargs)
         self.type: str = kwargs.get("type")
         self.has_children: bool = kwargs.get("has_children")
         self.archived: bool = kwargs.get("archived")
-        self.children = LinkTo(block=self)
         self._level = kwargs["level"] if kwargs.get("level") else 0
         self.create_mode: bool = kwargs["create_mode"] if "create_mode" in kwargs else False
+        self._pending = None
+        if not self.create_mode and (envs.LAZY_DECODING if lazy is None else lazy):
+            self._pending = kwargs
+            return
+        self._decode(kwargs)
+
+    def __getattr__(self, name: str):
+        # lazy mode: any missing attribute decodes the whole block once
+        pending = self._pending if name != "_pending" else None
+        if pending is None:
+            raise AttributeError(f"'{type(self).__name__}' object has no attribute '{name}'")
+        self._pending = None
+        self._decode(pending)
+        return getattr(self, name)
+
+    def _decode(self, kwargs: Dict[str, Any]) -> None:
+        self.children = LinkTo(block=self)
         self.parent = None
         self._plain_text = ""
 
@@ -970,6 +1167,25 @@ class Block(Model):
             return new_dict
         return None
 
+    def changes(self) -> Dict[str, Dict]:
+        """
+        Fields of `.get()` which differ from the received block (`.raw` is the snapshot)
+
+        `block.checked = True`
+        `print(block.changes())`
+        {'to_do': {'checked': True}}
+        """
+        current = self.get()
+        if not current:
+            return {}
+        before = (Block(**self.raw).get() or {}).get(self.type, {})
+        fields = {key: value for key, value in current[self.type].items() if before.get(key) != value}
+        return {self.type: fields} if fields else {}
+
+    @property
+    def dirty(self) -> bool:
+        return bool(self.changes())
+
     @property
     def simple(self) -> str:
         if self._plain_text:
@@ -1000,7 +1216,11 @@ class Block(Model):
 class ElementArray(MutableSequence):
     class_map = {"page": Page, "database": Database, "block": Block}
 
-    def __init__(self, array, create: bool = False):
+    def __init__(self, array, create: bool = False, lazy: Optional[bool] = None):
+        """
+        :param array:   list of API dicts (or list of objects if `create`)
+        :param lazy:    create Pages and Blocks in lazy mode (default is `envs.LAZY_DECODING`)
+        """
         if create:
             self.array = array
             return
@@ -1008,7 +1228,10 @@ class ElementArray(MutableSequence):
         self.array = []
         for ele in array:
             if ele.get("object") and ele["object"] in self.class_map:
-                self.array.append(self.class_map[ele["object"]](**ele))
+                if lazy is not None and ele["object"] != "database":
+                    self.array.append(self.class_map[ele["object"]](lazy=lazy, **ele))
+                else:
+                    self.array.append(self.class_map[ele["object"]](**ele))
 
     def __getitem__(self, item):
         return self.array[item]
@@ -1033,6 +1256,10 @@ class ElementArray(MutableSequence):
         return f"ElementArray({r})"
 
 
+# (block, its children nodes)
+BlockNode = Tuple[Block, list]
+
+
 class BlockArray(ElementArray):
     def __str__(self):
         return "\n".join(b._level * "\t" + str(b) for b in self)
@@ -1044,16 +1271,119 @@ class BlockArray(ElementArray):
     def get(self):
         return [b.get() for b in self]
 
+    def get_nested(self) -> List[Dict]:
+        """
+        API dicts of blocks nested by `tree()`: every block of a deeper level goes to `children` of the previous one.
+        ValueError is raised if a block which can not be created (`Block.get()` is None) has children
+
+        `BlockArray([Block.create("toggle", "toggle"), Block.create("inside", level=1)], create=True).get_nested()`
+        """
+        return [self._get_node(node) for node in self.tree()]
+
+    def tree(self) -> List[BlockNode]:
+        """
+        Blocks nested by `_level`: [(block, [(child, [...]), ...]), ...]
+        """
+        nodes = []
+        stack = []  # (level, children of the block)
+        for b in self:
+            while stack and stack[-1][0] >= b._level:
+                stack.pop()
+            node = (b, [])
+            (stack[-1][1] if stack else nodes).append(node)
+            stack.append((b._level, node[1]))
+        return nodes
+
+    def batches(
+            self, size: int = envs.BLOCK_CHILDREN_MAX, depth: int = envs.BLOCK_NESTING_MAX,
+            total: int = envs.BLOCK_REQUEST_MAX,
+    ) -> List[List[Tuple[Optional[Dict], Optional[BlockArray]]]]:
+        """
+        Splits the blocks into the lists of children accepted by one API request, in the original order.
+        Children of a block are nested into it only if the whole subtree fits the limits,
+        otherwise they are returned to be appended to the created block by follow-up requests.
+
+        :param size:    max number of children in one list
+        :param depth:   max levels of nesting in one request
+        :param total:   max number of blocks in one request
+        :return:        [[(block API dict, children BlockArray to append later or None), ...], ...]
+
+        ValueError is raised if a block which can not be created (`Block.get()` is None) has children
+        """
+        result, batch, count = [], [], 0
+        for node in self.tree():
+            block, children = node
+            data, later, n = self._get_node(node, depth), None, self._size(node)
+            if children and (n > total or not self._fits(children, depth, size)):
+                data, later, n = self._get_node((block, [])), BlockArray(self._flatten(children), create=True), 1
+            if batch and (len(batch) >= size or count + n > total):
+                result.append(batch)
+                batch, count = [], 0
+            batch.append((data, later))
+            count += n
+        if batch:
+            result.append(batch)
+        return result
+
+    @classmethod
+    def _get_node(cls, node: BlockNode, depth: int = -1) -> Optional[Dict]:
+        block, children = node
+        data = block.get()
+        if data is None and children:
+            raise ValueError(f"Block `{block.type}` can not be created, so its {len(children)} children are lost")
+        if children and depth:
+            data[block.type]["children"] = [cls._get_node(child, depth - 1) for child in children]
+        return data
+
+    @classmethod
+    def _fits(cls, nodes: List[BlockNode], depth: int, size: int) -> bool:
+        if not depth or len(nodes) > size:
+            return False
+        return all(not children or cls._fits(children, depth - 1, size) for _, children in nodes)
+
+    @classmethod
+    def _size(cls, node: BlockNode) -> int:
+        return 1 + sum(cls._size(child) for child in node[1])
+
+    @classmethod
+    def _flatten(cls, nodes: List[BlockNode]) -> List[Block]:
+        blocks = []
+        for block, children in nodes:
+            blocks.append(block)
+            blocks.extend(cls._flatten(children))
+        return blocks
+
     @property
     def simple(self) -> str:
         return "\n".join(b._level * "\t" + b.simple for b in self)
 
+    def render(self, out: Optional[TextIO] = None, fmt: str = "markdown") -> Optional[str]:
+        """
+        Writes the blocks as Markdown, plain text or HTML to the file-like object in one pass
+        (see `pytion.render.Renderer`). Returns the string if `out` is not provided.
+
+        `with open("page.md", "w") as f:`
+            `page.get_block_children_recursive().obj.render(f)`
+        """
+        return render(self, out, fmt)
+
 
 class PageArray(ElementArray):
     def __repr__(self):
         r = str(self)[:30].replace("\n", " ")
         return f"PageArray({r})"
 
+    def to_columns(self, names: Optional[List[str]] = None) -> Dict[str, Column]:
+        """
+        Typed array-backed columns of the properties (see `pytion.columns.Column`)
+
+        :param names:   property names (all properties of the first page by default)
+
+        `columns = pages.to_columns(["Price", "Done", "Status"])`
+        `print(sum(columns["Price"].values), columns["Status"].categories)`
+        """
+        return to_columns(self, names)
+
 
 class LinkTo(object):
     """
@@ -1064,6 +1394,7 @@ class LinkTo(object):
     .get() - return API like style
     .create() - create in format `(page_id="123412341234")` or (database_id="13412341234")`
     """
+    __slots__ = ("type", "id", "after_path", "uri")
 
     def __init__(
             self, block: Optional[Model] = None, from_object: Union[Block, Page, Database, None] = None, **kwargs
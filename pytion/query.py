@@ -1,15 +1,32 @@
 # -*- coding: utf-8 -*-
+from __future__ import annotations
 
+import asyncio
 import logging
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from urllib.parse import urlencode
-from typing import Dict, Optional, Any, Union
-from datetime import datetime
+from typing import Dict, Optional, Any, Union, Mapping, Iterator, AsyncIterator
+from datetime import datetime, timedelta, timezone
 
 import requests
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+from urllib3.exceptions import MaxRetryError, NewConnectionError
+try:
+    import aiohttp
+except ImportError:  # optional dependency for the async client
+    aiohttp = None
 
+import pytion.codec as codec
 import pytion.envs as envs
-from pytion.models import Property, PropertyValue, User
-from pytion.exceptions import find_response_error
+from pytion.cache import ResponseCache
+from pytion.hooks import Hooks, RequestEvent, current_caller
+from pytion.models import Property, PropertyValue, User, Page, PageArray, RichTextArray, LinkTo
+from pytion.exceptions import find_response_error, ClientError, ServerError, ContentError
+from pytion.exceptions import RateLimited, ServiceUnavailable, InternalServerError, DatabaseConnectionUnavailable
 
 
 logger = logging.getLogger(__name__)
@@ -122,8 +139,64 @@ class Filter(object):
     def allowed_condition_types(self):
         return ", ".join(self._filter_condition_types)
 
+    @property
+    def depth(self) -> int:
+        """
+        Nesting level of `and`/`or` groups (0 for a single condition)
+        """
+        def depth(filter_: Dict) -> int:
+            for operator in ("and", "or"):
+                if operator in filter_:
+                    return 1 + max((depth(f) for f in filter_[operator]), default=0)
+            return 0
+
+        return depth(self.filter)
+
+    def _combine(self, other: Filter, operator: str) -> Filter:
+        if not isinstance(other, Filter):
+            return NotImplemented
+        filters = []
+        for f in (self, other):
+            # (a & b) & c -> and[a, b, c]
+            if list(f.filter) == [operator]:
+                filters.extend(f.filter[operator])
+            else:
+                filters.append(f.filter)
+        combined = Filter(raw={operator: filters})
+        if combined.depth > envs.FILTER_MAX_DEPTH:
+            raise ValueError(f"Filter groups can be nested up to {envs.FILTER_MAX_DEPTH} levels ({combined} provided)")
+        return combined
+
+    def __and__(self, other: Filter) -> Filter:
+        """
+        `f = Filter(property_name="Done", property_type="checkbox") & Filter(property_name="Tags", ...)`
+        """
+        return self._combine(other, "and")
+
+    def __or__(self, other: Filter) -> Filter:
+        """
+        `f = done & (Filter(property_name="Digit", ...) | Filter(property_name="Tags", ...))`
+        """
+        return self._combine(other, "or")
+
+    def match(self, page: Page) -> bool:
+        """
+        Checks the filter locally against decoded property values of the Page (no requests are sent).
+        Text conditions are case-insensitive like API ones.
+        """
+        return match_filter(self.filter, page)
+
+    def apply(self, pages: PageArray) -> PageArray:
+        """
+        Local version of the database query: returns the pages matching the filter
+
+        `pages = database.db_query().obj`
+        `done = Filter(property_name="Done", property_type="checkbox", value=True).apply(pages)`
+        """
+        return PageArray([page for page in pages if self.match(page)], create=True)
+
     def __repr__(self):
-        if not getattr(self, "property_type"):
+        if not getattr(self, "property_type", None):
             return f"Filter({str(self.filter)})"
         return f"Filter({self.property_name} {self.condition} {self.value})"
 
@@ -152,12 +225,348 @@ class Sort(object):
         self.sort = {"property": property_name, "direction": direction}
         self.sorts.append(self.sort)
 
+    def apply(self, pages: PageArray) -> PageArray:
+        """
+        Sorts the pages locally by all criteria. Empty values are placed at the end in both directions.
+
+        `pages = Sort("Price", "descending").apply(pages)`
+        """
+        result = list(pages)
+        # stable sort by the least significant criterion first
+        for sort in reversed(self.sorts):
+            name = sort.get("property") or sort.get("timestamp")
+            descending = sort["direction"] == "descending"
+
+            def key(page: Page):
+                value = _sort_value(_page_value(page, name))
+                if value is None:
+                    return (0, 0) if descending else (1, 0)
+                return (1, value) if descending else (0, value)
+
+            result.sort(key=key, reverse=descending)
+        return PageArray(result, create=True)
+
     def __repr__(self):
         r = [e.values() for e in self.sorts]
         return f"Sorts({r})"
 
 
+_relative_dates = {
+    "past_week": -7, "past_month": -30, "past_year": -365, "next_week": 7, "next_month": 30, "next_year": 365,
+}
+
+
+def _page_value(page: Page, name: str) -> Any:
+    """
+    Decoded value of the Page property by its name or ID (or `created_time`, `last_edited_time`)
+    """
+    if name in page.properties:
+        return page.properties[name].value
+    for prop in page.properties.values():
+        if prop.id == name:
+            return prop.value
+    if name in ("created_time", "last_edited_time"):
+        return getattr(page, name)
+    raise ValueError(f"Page {page.id} has no property `{name}`")
+
+
+def _to_datetime(value: Any) -> Optional[datetime]:
+    if isinstance(value, PropertyValue):
+        value = value.value
+    if not value:
+        return None
+    if not isinstance(value, datetime):
+        value = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+    return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+
+
+def _is_date_only(value: Any) -> bool:
+    return isinstance(value, str) and len(value) == 10
+
+
+def _text(value: Any) -> str:
+    if isinstance(value, PropertyValue):
+        value = value.value
+    return "" if value is None else str(value)
+
+
+def _ids(value: Any) -> list:
+    if not value:
+        return []
+    if not isinstance(value, list):
+        value = [value]
+    return [(v.id if isinstance(v, (User, LinkTo)) else str(v)).replace("-", "") for v in value]
+
+
+def _sort_value(value: Any) -> Any:
+    if isinstance(value, PropertyValue):
+        value = value.value
+    if isinstance(value, (RichTextArray, User, LinkTo)):
+        return str(value) or None
+    if isinstance(value, list):
+        return ", ".join(str(v) for v in value) or None
+    if isinstance(value, datetime):
+        return _to_datetime(value)
+    return value
+
+
+def _match_date(value: Any, condition: str, target: Any) -> bool:
+    moment = _to_datetime(value)
+    if moment is None:
+        return False
+    if condition in _relative_dates:
+        now = datetime.now(timezone.utc)
+        days = _relative_dates[condition]
+        start, end = (now + timedelta(days=days), now) if days < 0 else (now, now + timedelta(days=days))
+        return start <= moment <= end
+    if condition == "this_week":
+        start = datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
+        start -= timedelta(days=start.weekday())
+        return start <= moment < start + timedelta(days=7)
+    target_moment = _to_datetime(target)
+    if _is_date_only(target):
+        # the day is compared without time
+        moment, target_moment = moment.date(), target_moment.date()
+    if condition == "equals":
+        return moment == target_moment
+    if condition == "before":
+        return moment < target_moment
+    if condition == "after":
+        return moment > target_moment
+    if condition == "on_or_before":
+        return moment <= target_moment
+    if condition == "on_or_after":
+        return moment >= target_moment
+    raise ValueError(f"Unsupported date condition `{condition}`")
+
+
+def _match_condition(type_: str, condition: str, target: Any, value: Any) -> bool:
+    if condition == "is_empty":
+        return value is None or value == [] or (type_ not in ("number", "checkbox") and not _text(value))
+    if condition == "is_not_empty":
+        return not _match_condition(type_, "is_empty", target, value)
+    if type_ in ("date", "timestamp", "created_time", "last_edited_time"):
+        return _match_date(value, condition, target)
+    if type_ in ("rich_text", "title", "url", "email", "phone_number", "select", "status", "string"):
+        text, target = _text(value).casefold(), str(target).casefold()
+        if condition == "equals":
+            return text == target
+        if condition == "does_not_equal":
+            return text != target
+        if condition == "contains":
+            return target in text
+        if condition == "does_not_contain":
+            return target not in text
+        if condition == "starts_with":
+            return text.startswith(target)
+        if condition == "ends_with":
+            return text.endswith(target)
+    if type_ in ("multi_select", "people", "relation"):
+        if type_ == "multi_select":
+            items, target = [i.casefold() for i in value or []], str(target).casefold()
+        else:
+            items, target = _ids(value), _ids(target)[0]
+        if condition == "contains":
+            return target in items
+        if condition == "does_not_contain":
+            return target not in items
+    if type_ == "checkbox":
+        if condition == "equals":
+            return bool(value) == bool(target)
+        if condition == "does_not_equal":
+            return bool(value) != bool(target)
+    if type_ == "number":
+        if value is None:
+            return False
+        if condition == "equals":
+            return value == target
+        if condition == "does_not_equal":
+            return value != target
+        if condition == "greater_than":
+            return value > target
+        if condition == "less_than":
+            return value < target
+        if condition == "greater_than_or_equal_to":
+            return value >= target
+        if condition == "less_than_or_equal_to":
+            return value <= target
+    raise ValueError(f"Unsupported condition `{condition}` of `{type_}` filter")
+
+
+def match_filter(filter_: Dict, page: Page) -> bool:
+    """
+    Local evaluation of the API filter object (including `and`/`or` groups) against the Page
+    """
+    if "and" in filter_:
+        return all(match_filter(f, page) for f in filter_["and"])
+    if "or" in filter_:
+        return any(match_filter(f, page) for f in filter_["or"])
+    if "timestamp" in filter_:
+        name = type_ = filter_["timestamp"]
+    else:
+        name = filter_["property"]
+        type_ = next(key for key in filter_ if key != "property")
+    value = _page_value(page, name)
+    conditions = filter_[type_]
+    if type_ == "formula":
+        # {"formula": {"number": {"greater_than": 1}}}
+        type_, conditions = next(iter(conditions.items()))
+    condition, target = next(iter(conditions.items()))
+    return _match_condition(type_, condition, target, value)
+
+
+class RateLimiter(object):
+    def __init__(self, rate: float = envs.RATE_LIMIT, burst: int = envs.RATE_LIMIT_BURST):
+        """
+        Token bucket shared by all requests of one `Notion` object. Thread-safe.
+        Every request takes a token, tokens are refilled with `rate` per second up to `burst`.
+
+        :param rate:    requests per second (0 = no limit)
+        :param burst:   max number of requests which can be sent without waiting
+        """
+        self.rate = rate
+        self.capacity = max(burst, 1)
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def reserve(self) -> float:
+        """
+        Takes a token (reserves it in the future if the bucket is empty)
+
+        :return:    seconds to wait before sending the request
+        """
+        if not self.rate:
+            return 0.0
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= 1
+            if self.tokens >= 0:
+                return 0.0
+            return -self.tokens / self.rate
+
+    def acquire(self) -> None:
+        wait = self.reserve()
+        if wait:
+            logger.debug(f"Rate limit. Waiting {wait:.3f}s")
+            time.sleep(wait)
+
+    def __repr__(self):
+        return f"RateLimiter({self.rate}/s, burst {self.capacity})"
+
+
+class RetryPolicy(object):
+    retry_errors = (RateLimited, ServiceUnavailable, InternalServerError, DatabaseConnectionUnavailable)
+    connection_errors = (requests.ConnectionError, requests.Timeout)
+    # the request has not reached the server
+    connect_errors = (requests.ConnectTimeout,)
+    if aiohttp:
+        connection_errors += (aiohttp.ClientConnectionError, asyncio.TimeoutError)
+        connect_errors += (aiohttp.ClientConnectorError,) + (
+            (aiohttp.ConnectionTimeoutError,) if hasattr(aiohttp, "ConnectionTimeoutError") else ()
+        )
+    retry_statuses = (429, 500, 502, 503, 504)
+
+    def __init__(
+            self, max_retries: int = envs.RETRY_MAX, backoff: float = envs.RETRY_BACKOFF,
+            max_backoff: float = envs.RETRY_BACKOFF_MAX,
+    ):
+        """
+        Decides if the failed request should be repeated and when.
+        `Retry-After` header is respected, otherwise "full jitter" exponential backoff is used.
+        Requests which are not idempotent (see `is_idempotent()`) are repeated only if they were not processed:
+        connection is not established, 429 or 503 with `Retry-After`. Read timeouts, broken connections
+        and other 5xx answers may come after the object is created, so such requests are not repeated.
+
+        :param max_retries: max number of retries of one request (0 = no retries)
+        :param backoff:     base delay in seconds
+        :param max_backoff: max delay in seconds
+        """
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+
+    @staticmethod
+    def is_idempotent(method: str, url: str) -> bool:
+        """
+        True if the request can be sent twice without side effects: GET, PATCH or DELETE of one object
+        and read-only POST (`search` and database `query`). Creation of pages and databases (POST)
+        and appending of children (PATCH `blocks/ID/children`) are not idempotent.
+        """
+        method = method.lower()
+        path = url.split("?", 1)[0].rstrip("/")
+        if method in ("get", "delete"):
+            return True
+        if method == "patch":
+            return not path.endswith("/children")
+        if method == "post":
+            return path.endswith("/query") or path.endswith("/search")
+        return False
+
+    @classmethod
+    def is_not_sent(cls, error: Exception) -> bool:
+        """
+        True if the request failed before it was sent (connection is not established)
+        """
+        if isinstance(error, cls.connect_errors):
+            return True
+        if isinstance(error, requests.ConnectionError) and error.args:
+            reason = error.args[0]
+            return isinstance(reason, MaxRetryError) and isinstance(reason.reason, NewConnectionError)
+        return False
+
+    @classmethod
+    def is_ambiguous(cls, error: Exception) -> bool:
+        """
+        True if the request failed after it was sent, so it may be processed (read timeout, broken connection, 5xx)
+        """
+        if isinstance(error, cls.connection_errors):
+            return not cls.is_not_sent(error)
+        if isinstance(error, RateLimited) or getattr(error, "retry_after", None) is not None:
+            return False
+        status = getattr(getattr(error, "req", None), "status_code", None)
+        if isinstance(error, ContentError):
+            # not JSON answer of the gateway or broken answer of the server
+            return status is None or not 400 <= status < 500
+        return isinstance(error, ServerError)
+
+    def is_retryable(self, error: Exception, idempotent: bool = True) -> bool:
+        status = getattr(getattr(error, "req", None), "status_code", None)
+        if not idempotent:
+            if isinstance(error, ServiceUnavailable):
+                return error.retry_after is not None
+            return isinstance(error, RateLimited) or status == 429 or self.is_not_sent(error)
+        if isinstance(error, self.retry_errors + self.connection_errors):
+            return True
+        # errors without API code (for ex. gateway HTML page)
+        if isinstance(error, (ClientError, ServerError, ContentError)):
+            return status in self.retry_statuses
+        return False
+
+    def delay(self, attempt: int, error: Exception, idempotent: bool = True) -> Optional[float]:
+        """
+        :param attempt:     number of retries already done
+        :param error:       the exception raised by the last try
+        :param idempotent:  the request can be repeated after it was processed (see `is_idempotent()`)
+        :return:            seconds to wait before the next try or None to give up
+        """
+        if attempt >= self.max_retries or not self.is_retryable(error, idempotent):
+            return None
+        retry_after = getattr(error, "retry_after", None)
+        if retry_after is not None:
+            return retry_after
+        return random.uniform(0, min(self.max_backoff, self.backoff * 2 ** attempt))
+
+    def __repr__(self):
+        return f"RetryPolicy({self.max_retries} retries)"
+
+
 class Request(object):
+    # bodies are encoded by `pytion.codec`
+    body_headers = {"Content-Type": "application/json"}
+
     def __init__(
             self,
             api: object,  # Notion object
@@ -171,9 +580,31 @@ class Request(object):
             limit: int = 0,
             filter_: Optional[Filter] = None,
             sorts: Optional[Sort] = None,
+            rate_limit: Optional[float] = None,
+            rate_burst: Optional[int] = None,
+            max_retries: Optional[int] = None,
+            cache: Optional[ResponseCache] = None,
+            pool_size: Optional[int] = None,
+            keep_alive: Optional[bool] = None,
+            connect_timeout: Optional[float] = None,
+            read_timeout: Optional[float] = None,
+            hooks: Optional[Hooks] = None,
     ):
         self.session = requests.Session()
         self.session.headers["accept"] = "application/json"
+        self.pool_size = envs.POOL_SIZE if pool_size is None else pool_size
+        self.keep_alive = envs.KEEP_ALIVE if keep_alive is None else keep_alive
+        # (connect, read) seconds of `requests`, None - wait forever
+        self.timeout = (
+            envs.CONNECT_TIMEOUT if connect_timeout is None else connect_timeout,
+            envs.READ_TIMEOUT if read_timeout is None else read_timeout,
+        )
+        # one pool per host is enough (API only), its size limits kept-alive connections shared by threads
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        if not self.keep_alive:
+            self.session.headers["Connection"] = "close"
         self.base = base if base else envs.NOTION_URL
         self._token = token if token else envs.NOTION_SECRET
         if not self._token:
@@ -181,6 +612,13 @@ class Request(object):
         self.version = getattr(api, "version")
         self.auth = {"Authorization": "Bearer " + self._token}
         self.session.headers.update({"Notion-Version": self.version, **self.auth})
+        self.limiter = RateLimiter(
+            envs.RATE_LIMIT if rate_limit is None else rate_limit,
+            envs.RATE_LIMIT_BURST if rate_burst is None else rate_burst,
+        )
+        self.retry = RetryPolicy(envs.RETRY_MAX if max_retries is None else max_retries)
+        self.cache = cache
+        self.hooks = hooks if hooks is not None else Hooks()
         self.result = None
 
         if method:
@@ -190,7 +628,65 @@ class Request(object):
             self, method: str, path: str, id_: str = "", data: Optional[Dict] = None,
             after_path: Optional[str] = None, limit: int = 0, filter_: Optional[Filter] = None,
             sorts: Optional[Sort] = None, pagination_loop: bool = False, sort: Optional[Sort] = None,
+            start_cursor: Optional[str] = None, params: Optional[Dict] = None, page: int = 0,
     ):
+        # answers with extra query params (projections) are not cached
+        cacheable = not pagination_loop and not params
+        cached = self.cache_get(method, path, id_, after_path, limit, not cacheable)
+        if cached is not None:
+            return cached
+        data = self.prepare_data(data, filter_, sorts, sort)
+        url, data = self.prepare_url(method, path, id_, data, after_path, limit, start_cursor, params)
+        r = self.send(method, url, data, page)
+
+        # pagination section
+        if not limit and not pagination_loop:
+            self.paginate(r, method, path, id_, data, after_path, params)
+
+        self.cache_update(method, path, id_, after_path, limit, not cacheable, r, data)
+        return r
+
+    def cache_get(
+            self, method: str, path: str, id_: str, after_path: Optional[str], limit: int, pagination_loop: bool
+    ) -> Optional[Dict]:
+        if self.cache is None or method != "get" or pagination_loop:
+            return None
+        return self.cache.get(path, id_, after_path, limit)
+
+    def cache_update(
+            self, method: str, path: str, id_: str, after_path: Optional[str], limit: int, pagination_loop: bool,
+            r: Dict, data: Optional[Dict] = None,
+    ) -> None:
+        """
+        Saves GET answers. Changes drop cached answers about the changed object (including its `children` list)
+        and the children list of its parent: updated or archived object (`parent` of the answer),
+        created page or database (`parent` of the request body), appended blocks (`id_` is the parent)
+        """
+        if self.cache is None or pagination_loop:
+            return
+        if method == "get":
+            self.cache.set(path, id_, after_path, limit, r)
+        elif method in ("patch", "delete"):
+            if id_:
+                self.cache.invalidate(id_)
+            self.cache_invalidate_parent(r.get("parent"))
+        elif method == "post" and not id_:
+            # creation (query and search have ID or are not cached)
+            self.cache_invalidate_parent((data or {}).get("parent"))
+            self.cache_invalidate_parent(r.get("parent"))
+
+    def cache_invalidate_parent(self, parent: Optional[Dict]) -> None:
+        if not isinstance(parent, dict):
+            return
+        for key in ("page_id", "database_id", "block_id"):
+            if isinstance(parent.get(key), str):
+                self.cache.invalidate(parent[key])
+
+    @staticmethod
+    def prepare_data(
+            data: Optional[Dict] = None, filter_: Optional[Filter] = None,
+            sorts: Optional[Sort] = None, sort: Optional[Sort] = None,
+    ) -> Optional[Dict]:
         if filter_:
             if data:
                 data["filter"] = filter_.filter
@@ -206,62 +702,393 @@ class Request(object):
                 data["sort"] = sort.sort
             else:
                 data = {"sort": sort.sort}
+        return data
+
+    def prepare_url(
+            self, method: str, path: str, id_: str = "", data: Optional[Dict] = None,
+            after_path: Optional[str] = None, limit: int = 0, start_cursor: Optional[str] = None,
+            params: Optional[Dict] = None,
+    ):
+        """
+        Builds the final URL and body of the request.
+        if GET method then pagination parameters are in request string
+        if POST method then pagination parameters are in body
+
+        :param params:  extra query string parameters, list values are repeated
+                        (`filter_properties=a&filter_properties=b`)
+        :return:        (url, data)
+        """
         url = self.base + path + "/" + id_
-        if limit and method == "get":
-            if after_path:
-                after_path += "?" + urlencode({"page_size": limit})
-            else:
-                path += "?" + urlencode({"page_size": limit})
-        if limit and method == "post":
-            if not data:
-                data = {}
-            data.update({"page_size": limit})
         if after_path:
             url += "/" + after_path
+        params = dict(params) if params else {}
+        if method == "get":
+            # single objects (pages/ID) do not accept paging parameters
+            if limit and (after_path or not id_):
+                params["page_size"] = limit
+            if start_cursor:
+                params["start_cursor"] = start_cursor
+        elif method == "post":
+            if limit or start_cursor:
+                data = dict(data) if data else {}
+            if limit:
+                data["page_size"] = limit
+            if start_cursor:
+                data["start_cursor"] = start_cursor
+        if params:
+            url += ("&" if "?" in url else "?") + urlencode(params, doseq=True)
+        return url, data
+
+    def send(self, method: str, url: str, data: Optional[Dict] = None, page: int = 0) -> Dict:
+        """
+        Sends the request with retries. Registered `hooks` get `RequestEvent` of every attempt
+
+        :param page:    index of the page of the paginated answer (for hooks)
+        """
         logger.info(f"Request {method} {url}")
-        logger.debug(f"METHOD: {method.upper()}")
-        logger.debug(f"URL: {url}")
-        logger.debug(f"DATA: {data}")
-        result = self.session.request(method=method, url=url, json=data)
-        logger.debug(f"STATUS CODE: {result.status_code}")
-        logger.debug(f"CONTENT: {result.content}")
-        logger.info(f"{result.status_code} Received")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"METHOD: {method.upper()}")
+            logger.debug(f"URL: {url}")
+            logger.debug(f"DATA: {data}")
+        body = codec.dumps(data) if data is not None else None
+        caller = current_caller() if self.hooks else None
+        idempotent = self.retry.is_idempotent(method, url)
+        attempt = 0
+        while True:
+            self.limiter.acquire()
+            event = self.event(method, url, body, caller, page, attempt)
+            try:
+                result = self.session.request(
+                    method=method, url=url, data=body, headers=self.body_headers if data is not None else None,
+                    timeout=self.timeout,
+                )
+                if event:
+                    self.received(event, result.status_code, len(result.content))
+                if logger.isEnabledFor(logging.DEBUG):
+                    logger.debug(f"STATUS CODE: {result.status_code}")
+                    logger.debug(f"CONTENT: {result.content}")
+                logger.info(f"{result.status_code} Received")
+                return find_response_error(result)
+            except (ClientError, ServerError, ContentError, requests.RequestException) as e:
+                delay = self.retry.delay(attempt, e, idempotent)
+                if event:
+                    self.failed(event, e, delay)
+                if delay is None:
+                    raise
+                attempt += 1
+                logger.warning(f"Retry {attempt}/{self.retry.max_retries} of {method} {url} in {delay:.2f}s: {e}")
+                time.sleep(delay)
+
+    def event(
+            self, method: str, url: str, body: Optional[bytes], caller: Optional[str], page: int, attempt: int
+    ) -> Optional[RequestEvent]:
+        """
+        `RequestEvent` of the attempt passed to `before_request` hooks. None if there are no hooks
+        """
+        if not self.hooks:
+            return None
+        event = RequestEvent(method, url[len(self.base):], caller, page, attempt, len(body) if body else 0)
+        self.hooks.emit("before_request", event)
+        event.started = time.perf_counter()
+        return event
+
+    def received(self, event: RequestEvent, status: int, size: int) -> None:
+        event.latency = time.perf_counter() - event.started
+        event.status = status
+        event.response_bytes = size
+        self.hooks.emit("after_response", event)
+
+    def failed(self, event: RequestEvent, error: Exception, delay: Optional[float]) -> None:
+        if event.status is None:
+            # no answer: latency is the time until the connection error
+            event.latency = time.perf_counter() - event.started
+        event.error = error
+        event.delay = delay
+        self.hooks.emit("on_error" if delay is None else "on_retry", event)
+
+    def warm_up(self, connections: int = 1) -> int:
+        """
+        Opens connections to API in parallel by `HEAD` requests, so they are kept in the pool
+        and the first requests of every thread do not wait for TCP and TLS handshakes.
+        Answers are held until all requests are done, so every request opens its own connection.
+        Failed connections are logged only (they are opened again by requests)
+
+        :param connections: number of connections (not more than `pool_size`)
+        :return:            number of opened connections
+        """
+        connections = min(connections, self.pool_size)
+        if connections < 1:
+            return 0
+
+        def connect(_) -> Optional[requests.Response]:
+            try:
+                # the connection is not returned to the pool until the answer is closed
+                return self.session.head(self.base, timeout=self.timeout, stream=True)
+            except requests.RequestException as e:
+                logger.warning(f"Warm-up connection to {self.base} failed: {e}")
+                return None
+
+        with ThreadPoolExecutor(max_workers=connections) as executor:
+            answers = [r for r in executor.map(connect, range(connections)) if r is not None]
+        for r in answers:
+            # the answer is read (no body), so the connection is released into the pool, `.close()` would drop it
+            r.content
+        logger.info(f"{len(answers)} connections to {self.base} are opened")
+        return len(answers)
+
+    def paginate(self, result, method, path, id_, data, after_path, params=None):
+        """
+        Requests the rest pages of the list and extends `result`.
+        Every page is retried by itself. If it finally fails, the exception gets `partial_result` attr
+        with all results received before (and its `next_cursor` to continue from)
+        """
+        if (result.get("has_more", False) is True) and (result.get("object", "") == "list"):
+            next_start = result.get("next_cursor")
+            logger.info(f"Paginated answer. Repeat with offset {next_start}")
+
+            page = 0
+            while next_start:
+                page += 1
+                try:
+                    r = self.method(
+                        method, path, id_, data, after_path, pagination_loop=True, start_cursor=next_start,
+                        params=params, page=page,
+                    )
+                except Exception as e:
+                    e.partial_result = result
+                    raise
+                self.extend_result(result, r)
+                next_start = r.get("next_cursor") if r.get("has_more") else None
 
-        r = find_response_error(result)
+    def iterate(
+            self, method: str, path: str, id_: str = "", data: Optional[Dict] = None,
+            after_path: Optional[str] = None, page_size: int = 0, filter_: Optional[Filter] = None,
+            sorts: Optional[Sort] = None, sort: Optional[Sort] = None, params: Optional[Dict] = None,
+    ) -> Iterator[Dict]:
+        """
+        Generator of paginated answers. Yields every list answer as soon as it is received.
+
+        :param page_size:   0 < int < 100 - number of items in every answer (0 = API default)
+        """
+        next_start = None
+        page = 0
+        while True:
+            r = self.method(
+                method, path, id_, data, after_path, page_size, filter_, sorts,
+                pagination_loop=True, sort=sort, start_cursor=next_start, params=params, page=page,
+            )
+            yield r
+            page += 1
+            if r.get("object", "") != "list" or not r.get("has_more"):
+                return
+            next_start = r.get("next_cursor")
+            logger.info(f"Paginated answer. Repeat with offset {next_start}")
+
+    @staticmethod
+    def extend_result(result: Dict, r: Dict) -> None:
+        if r.get("object", "") == "list" and r.get("results"):
+            result["results"].extend(r["results"])
+        result["has_more"] = r.get("has_more")
+        result["next_cursor"] = r.get("next_cursor")
+
+
+class AsyncRequest(Request):
+    """
+    Asynchronous transport built on `aiohttp` (optional dependency: `pip install pytion[async]`).
+    Builds requests exactly like `Request` but sends them without blocking the event loop.
+    Must be closed by `await .close()` (or by `async with AsyncNotion(...)`)
+    """
+
+    def __init__(
+            self, api: object, base: Optional[str] = None, token: Optional[str] = None,
+            rate_limit: Optional[float] = None, rate_burst: Optional[int] = None,
+            max_retries: Optional[int] = None, cache: Optional[ResponseCache] = None,
+            pool_size: Optional[int] = None, keep_alive: Optional[bool] = None,
+            connect_timeout: Optional[float] = None, read_timeout: Optional[float] = None,
+            hooks: Optional[Hooks] = None,
+    ):
+        if aiohttp is None:
+            raise ImportError("`aiohttp` is required for the async client. Install it by `pip install pytion[async]`")
+        self.base = base if base else envs.NOTION_URL
+        self._token = token if token else envs.NOTION_SECRET
+        if not self._token:
+            logger.error("Token is not provided or file `token` is not found!")
+        self.version = getattr(api, "version")
+        self.auth = {"Authorization": "Bearer " + self._token}
+        self.headers = {"accept": "application/json", "Notion-Version": self.version, **self.auth}
+        self.limiter = RateLimiter(
+            envs.RATE_LIMIT if rate_limit is None else rate_limit,
+            envs.RATE_LIMIT_BURST if rate_burst is None else rate_burst,
+        )
+        self.retry = RetryPolicy(envs.RETRY_MAX if max_retries is None else max_retries)
+        self.cache = cache
+        self.hooks = hooks if hooks is not None else Hooks()
+        self.pool_size = envs.POOL_SIZE if pool_size is None else pool_size
+        self.keep_alive = envs.KEEP_ALIVE if keep_alive is None else keep_alive
+        self.timeout = (
+            envs.CONNECT_TIMEOUT if connect_timeout is None else connect_timeout,
+            envs.READ_TIMEOUT if read_timeout is None else read_timeout,
+        )
+        self.session = None  # aiohttp.ClientSession must be created inside the running event loop
+        self.result = None
+
+    async def method(
+            self, method: str, path: str, id_: str = "", data: Optional[Dict] = None,
+            after_path: Optional[str] = None, limit: int = 0, filter_: Optional[Filter] = None,
+            sorts: Optional[Sort] = None, pagination_loop: bool = False, sort: Optional[Sort] = None,
+            start_cursor: Optional[str] = None, params: Optional[Dict] = None, page: int = 0,
+    ):
+        # answers with extra query params (projections) are not cached
+        cacheable = not pagination_loop and not params
+        cached = self.cache_get(method, path, id_, after_path, limit, not cacheable)
+        if cached is not None:
+            return cached
+        data = self.prepare_data(data, filter_, sorts, sort)
+        url, data = self.prepare_url(method, path, id_, data, after_path, limit, start_cursor, params)
+        r = await self.send(method, url, data, page)
 
         # pagination section
         if not limit and not pagination_loop:
-            self.paginate(r, method, path, id_, data, after_path)
+            await self.paginate(r, method, path, id_, data, after_path, params)
 
+        self.cache_update(method, path, id_, after_path, limit, not cacheable, r, data)
         return r
 
-    def paginate(self, result, method, path, id_, data, after_path):
+    def open(self):
+        """
+        `aiohttp.ClientSession` of this object (created on the first call, so it belongs to the running event loop)
+        """
+        if self.session is None or self.session.closed:
+            self.session = aiohttp.ClientSession(
+                headers=self.headers,
+                connector=aiohttp.TCPConnector(limit=self.pool_size, force_close=not self.keep_alive),
+                timeout=aiohttp.ClientTimeout(total=None, connect=self.timeout[0], sock_read=self.timeout[1]),
+            )
+        return self.session
+
+    async def warm_up(self, connections: int = 1) -> int:
+        """
+        Async version of `Request.warm_up()`: sends `HEAD` requests to API at once,
+        so the opened connections stay in the pool of the session.
+        Failed connections are logged only (they are opened again by requests)
+
+        :param connections: number of connections (not more than `pool_size`)
+        :return:            number of opened connections
+        """
+        session = self.open()
+
+        async def connect() -> bool:
+            try:
+                async with session.head(self.base) as resp:
+                    await resp.read()
+                return True
+            except Exception as e:
+                logger.warning(f"Warm-up connection to {self.base} failed: {e}")
+                return False
+
+        opened = sum(await asyncio.gather(*(connect() for _ in range(min(connections, self.pool_size)))))
+        logger.info(f"{opened} connections to {self.base} are opened")
+        return opened
+
+    async def send(self, method: str, url: str, data: Optional[Dict] = None, page: int = 0) -> Dict:
+        self.open()
+        logger.info(f"Request {method} {url}")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"DATA: {data}")
+        body = codec.dumps(data) if data is not None else None
+        caller = current_caller() if self.hooks else None
+        idempotent = self.retry.is_idempotent(method, url)
+        attempt = 0
+        while True:
+            wait = self.limiter.reserve()
+            if wait:
+                logger.debug(f"Rate limit. Waiting {wait:.3f}s")
+                await asyncio.sleep(wait)
+            event = self.event(method, url, body, caller, page, attempt)
+            try:
+                async with self.session.request(
+                        method=method, url=url, data=body, headers=self.body_headers if data is not None else None,
+                ) as resp:
+                    content = await resp.read()
+                    result = make_response(method, url, body, resp.status, resp.reason, resp.headers, content)
+                if event:
+                    self.received(event, result.status_code, len(content))
+                if logger.isEnabledFor(logging.DEBUG):
+                    logger.debug(f"STATUS CODE: {result.status_code}")
+                    logger.debug(f"CONTENT: {result.content}")
+                logger.info(f"{result.status_code} Received")
+                return find_response_error(result)
+            except (ClientError, ServerError, ContentError) + RetryPolicy.connection_errors as e:
+                delay = self.retry.delay(attempt, e, idempotent)
+                if event:
+                    self.failed(event, e, delay)
+                if delay is None:
+                    raise
+                attempt += 1
+                logger.warning(f"Retry {attempt}/{self.retry.max_retries} of {method} {url} in {delay:.2f}s: {e}")
+                await asyncio.sleep(delay)
+
+    async def paginate(self, result, method, path, id_, data, after_path, params=None):
         if (result.get("has_more", False) is True) and (result.get("object", "") == "list"):
             next_start = result.get("next_cursor")
             logger.info(f"Paginated answer. Repeat with offset {next_start}")
 
-            super_after_path = after_path
-            super_path = path
-
+            page = 0
             while next_start:
-                # if GET method then parameters are in request string
-                # if POST method then parameters are in body
-                if method == "get":
-                    if after_path:
-                        super_after_path = after_path + "?" + urlencode({"start_cursor": next_start})
-                    else:
-                        super_path = path + "?" + urlencode({"start_cursor": next_start})
-                elif method == "post":
-                    if not data:
-                        data = {}
-                    data.update({"start_cursor": next_start})
-
-                r = self.method(method, super_path, id_, data, super_after_path, pagination_loop=True)
-                if r.get("object", "") == "list" and r.get("results"):
-                    result["results"].extend(r["results"])
-                if r.get("has_more"):
-                    next_start = r.get("next_cursor")
-                else:
-                    next_start = None
-                result["has_more"] = r.get("has_more")
-                result["next_cursor"] = r.get("next_cursor")
+                page += 1
+                try:
+                    r = await self.method(
+                        method, path, id_, data, after_path, pagination_loop=True, start_cursor=next_start,
+                        params=params, page=page,
+                    )
+                except Exception as e:
+                    e.partial_result = result
+                    raise
+                self.extend_result(result, r)
+                next_start = r.get("next_cursor") if r.get("has_more") else None
+
+    async def iterate(
+            self, method: str, path: str, id_: str = "", data: Optional[Dict] = None,
+            after_path: Optional[str] = None, page_size: int = 0, filter_: Optional[Filter] = None,
+            sorts: Optional[Sort] = None, sort: Optional[Sort] = None, params: Optional[Dict] = None,
+    ) -> AsyncIterator[Dict]:
+        next_start = None
+        page = 0
+        while True:
+            r = await self.method(
+                method, path, id_, data, after_path, page_size, filter_, sorts,
+                pagination_loop=True, sort=sort, start_cursor=next_start, params=params, page=page,
+            )
+            yield r
+            page += 1
+            if r.get("object", "") != "list" or not r.get("has_more"):
+                return
+            next_start = r.get("next_cursor")
+            logger.info(f"Paginated answer. Repeat with offset {next_start}")
+
+    async def close(self) -> None:
+        if self.session is not None and not self.session.closed:
+            await self.session.close()
+
+
+def make_response(
+        method: str, url: str, body: Optional[bytes], status: int, reason: Optional[str],
+        headers: Mapping, content: bytes,
+) -> requests.Response:
+    """
+    Wraps a raw HTTP answer into `requests.Response` so `find_response_error` and exceptions work with any transport.
+    `body` is the encoded request body as it was sent (it is not encoded again)
+    """
+    prepared = requests.PreparedRequest()
+    prepared.method = method.upper()
+    prepared.url = url
+    prepared.body = body
+    response = requests.Response()
+    response.status_code = status
+    response.reason = reason
+    response.headers = CaseInsensitiveDict(headers)
+    response.url = url
+    response.encoding = "utf-8"
+    response._content = content
+    response.request = prepared
+    return response
@@ -0,0 +1,293 @@
+# -*- coding: utf-8 -*-
+
+import html
+import io
+import re
+from typing import Any, Dict, Iterable, List, Optional, TextIO, Tuple
+from urllib.parse import urlsplit
+
+
+FORMATS = ("markdown", "text", "html")
+LIST_TYPES = {"bulleted_list_item": "ul", "numbered_list_item": "ol", "to_do": "ul"}
+FILE_TYPES = ("image", "video", "file", "pdf")
+LINK_TYPES = ("embed", "bookmark", "link_preview")
+# links with other schemes (`javascript:`, `data:`...) are rendered as plain text
+URL_SCHEMES = ("", "http", "https", "mailto")
+
+
+def _content(block: Any) -> Dict[str, Any]:
+    # received blocks are rendered from their API dicts (lazy blocks are not decoded)
+    if block.create_mode:
+        data = block.get()
+        return data.get(block.type, {}) if data else {}
+    return block.raw.get(block.type) or {}
+
+
+def _plain(items: Optional[List[Dict]]) -> str:
+    return "".join(
+        item["plain_text"] if "plain_text" in item else (item.get("text") or {}).get("content", "")
+        for item in items or []
+    )
+
+
+def _safe_url(url: Optional[str]) -> str:
+    """
+    The URL if it is relative or its scheme is allowed (`URL_SCHEMES`), else empty string
+    """
+    if not url:
+        return ""
+    # browsers ignore whitespace and control characters inside the scheme (`java\tscript:`)
+    try:
+        scheme = urlsplit(re.sub(r"[\x00-\x20\x7f]", "", url)).scheme
+    except ValueError:
+        return ""
+    return url if scheme.lower() in URL_SCHEMES else ""
+
+
+def _fence(code: str) -> str:
+    # longer than any backtick run of the code, so it is not closed inside
+    longest = max((len(run) for run in re.findall(r"`+", code)), default=0)
+    return "`" * max(3, longest + 1)
+
+
+def _markdown(items: Optional[List[Dict]]) -> str:
+    parts = []
+    for item in items or []:
+        text = item["plain_text"] if "plain_text" in item else (item.get("text") or {}).get("content", "")
+        annotations = item.get("annotations")
+        if item.get("type") == "equation":
+            text = f"${text}$"
+        elif annotations and text:
+            if annotations.get("code"):
+                text = f"`{text}`"
+            if annotations.get("bold"):
+                text = f"**{text}**"
+            if annotations.get("italic"):
+                text = f"*{text}*"
+            if annotations.get("strikethrough"):
+                text = f"~~{text}~~"
+        href = _safe_url(item.get("href") or ((item.get("text") or {}).get("link") or {}).get("url"))
+        parts.append(f"[{text}]({href})" if href else text)
+    return "".join(parts)
+
+
+def _html(items: Optional[List[Dict]]) -> str:
+    parts = []
+    for item in items or []:
+        text = item["plain_text"] if "plain_text" in item else (item.get("text") or {}).get("content", "")
+        text = html.escape(text)
+        annotations = item.get("annotations")
+        if annotations:
+            if annotations.get("code"):
+                text = f"<code>{text}</code>"
+            if annotations.get("bold"):
+                text = f"<strong>{text}</strong>"
+            if annotations.get("italic"):
+                text = f"<em>{text}</em>"
+            if annotations.get("strikethrough"):
+                text = f"<s>{text}</s>"
+            if annotations.get("underline"):
+                text = f"<u>{text}</u>"
+        href = _safe_url(item.get("href") or ((item.get("text") or {}).get("link") or {}).get("url"))
+        parts.append(f'<a href="{html.escape(href)}">{text}</a>' if href else text)
+    return "".join(parts)
+
+
+def _url(content: Dict[str, Any]) -> str:
+    if "url" in content:
+        return _safe_url(content.get("url"))
+    subtype = content.get("type")
+    return _safe_url((content.get(subtype) or {}).get("url")) if subtype else ""
+
+
+class Renderer(object):
+    def __init__(self, out: TextIO, fmt: str = "markdown"):
+        """
+        Writes blocks to the file-like object one by one: nothing but the current line is kept in memory.
+        Blocks are rendered from their API dicts, so lazy blocks (`envs.LAZY_DECODING`) stay undecoded.
+        Nesting is taken from `Block._level` (as `.get_block_children_recursive()` and
+        `.iter_block_children_recursive()` set it).
+
+        :param out:     file-like object with `.write()`
+        :param fmt:     `markdown`, `text` (plain text with tabs, like `BlockArray.simple`) or `html`
+
+        `with open("page.md", "w") as f:`
+            `renderer = Renderer(f)`
+            `for block in no.pages.iter_block_children_recursive("PAGE ID"):`
+                `renderer.write(block)`
+            `renderer.close()`
+        """
+        if fmt not in FORMATS:
+            raise ValueError(f"Allowed formats {', '.join(FORMATS)} ({fmt} provided)")
+        self.out = out
+        self.fmt = fmt
+        self.count = 0
+        self._table_row = 0  # markdown tables need the separator after the first row
+        self._stack: List[Tuple[int, str]] = []  # html: open (level, tag)
+
+    def write(self, block: Any) -> None:
+        if self.fmt == "html":
+            self.out.write(self._html_block(block))
+        else:
+            line = self._markdown_block(block) if self.fmt == "markdown" else self._text_block(block)
+            if line is not None:
+                self.out.write(line)
+        self.count += 1
+
+    def write_all(self, blocks: Iterable[Any]) -> int:
+        for block in blocks:
+            self.write(block)
+        self.close()
+        return self.count
+
+    def close(self) -> None:
+        if self.fmt == "html":
+            while self._stack:
+                self.out.write(f"</{self._stack.pop()[1]}>\n")
+
+    def _text_block(self, block: Any) -> Optional[str]:
+        content = _content(block)
+        type_ = block.type
+        if "rich_text" in content:
+            text = _plain(content["rich_text"])
+        elif type_ == "table_row":
+            text = ",".join(f'"{_plain(cell)}"' for cell in content.get("cells") or [])
+        elif type_ in FILE_TYPES or type_ in LINK_TYPES:
+            text = _url(content)
+        elif type_ == "equation":
+            text = content.get("expression") or ""
+        elif type_ in ("child_page", "child_database"):
+            text = content.get("title") or ""
+        else:
+            text = ""
+        return "\t" * block._level + text + "\n"
+
+    def _markdown_block(self, block: Any) -> Optional[str]:
+        content = _content(block)
+        type_ = block.type
+        indent = "    " * block._level
+        if type_ != "table_row":
+            self._table_row = 0
+        text = _markdown(content.get("rich_text"))
+        if type_ == "paragraph":
+            line = text
+        elif type_.startswith("heading_"):
+            line = "#" * int(type_[-1]) + " " + text
+        elif type_ == "bulleted_list_item" or type_ == "toggle":
+            line = "- " + text
+        elif type_ == "numbered_list_item":
+            line = "1. " + text
+        elif type_ == "to_do":
+            line = ("- [x] " if content.get("checked") else "- [ ] ") + text
+        elif type_ == "quote" or type_ == "callout":
+            line = "> " + text
+        elif type_ == "code":
+            code = _plain(content.get("rich_text"))
+            fence = _fence(code)
+            code = code.replace("\n", "\n" + indent)
+            line = f"{fence}{content.get('language') or ''}\n{indent}{code}\n{indent}{fence}"
+        elif type_ == "equation":
+            line = f"$${content.get('expression') or ''}$$"
+        elif type_ == "divider":
+            line = "---"
+        elif type_ in FILE_TYPES or type_ in LINK_TYPES:
+            caption = _plain(content.get("caption")) or _url(content)
+            line = f"{'!' if type_ == 'image' else ''}[{caption}]({_url(content)})"
+        elif type_ in ("child_page", "child_database"):
+            line = f"[{content.get('title') or type_}](https://www.notion.so/{block.id})"
+        elif type_ == "table_row":
+            cells = content.get("cells") or []
+            line = "| " + " | ".join(_markdown(cell) for cell in cells) + " |"
+            if self._table_row == 0:
+                line += "\n" + indent + "|" + " --- |" * len(cells)
+            self._table_row += 1
+        elif type_ == "table":
+            return None
+        else:
+            line = text
+        return indent + line + "\n"
+
+    def _html_block(self, block: Any) -> str:
+        content = _content(block)
+        type_ = block.type
+        level = block._level
+        stack = self._stack
+        result = []
+        # close deeper blocks, the previous item of the same level and the list of another type
+        while stack and stack[-1][0] > level:
+            result.append(f"</{stack.pop()[1]}>\n")
+        if stack and stack[-1][0] == level and stack[-1][1] not in ("ul", "ol"):
+            result.append(f"</{stack.pop()[1]}>\n")
+        if stack and stack[-1][0] == level and stack[-1][1] != LIST_TYPES.get(type_):
+            result.append(f"</{stack.pop()[1]}>\n")
+        # children of blocks without own container
+        if level and (not stack or stack[-1][0] < level - 1):
+            result.append('<div class="children">\n')
+            stack.append((level - 1, "div"))
+
+        text = _html(content.get("rich_text"))
+        if type_ in LIST_TYPES:
+            if not stack or stack[-1] != (level, LIST_TYPES[type_]):
+                result.append(f"<{LIST_TYPES[type_]}>\n")
+                stack.append((level, LIST_TYPES[type_]))
+            if type_ == "to_do":
+                checked = " checked" if content.get("checked") else ""
+                text = f'<input type="checkbox" disabled{checked}> {text}'
+            result.append(f"<li>{text}")
+            stack.append((level, "li"))
+            return "".join(result)
+        if type_ == "toggle":
+            result.append(f"<details><summary>{text}</summary>\n")
+            stack.append((level, "details"))
+        elif type_ == "table":
+            result.append("<table>\n")
+            stack.append((level, "table"))
+        elif type_ == "table_row":
+            cells = "".join(f"<td>{_html(cell)}</td>" for cell in content.get("cells") or [])
+            result.append(f"<tr>{cells}</tr>\n")
+        elif type_ == "paragraph":
+            result.append(f"<p>{text}</p>\n")
+        elif type_.startswith("heading_"):
+            result.append(f"<h{type_[-1]}>{text}</h{type_[-1]}>\n")
+        elif type_ == "quote" or type_ == "callout":
+            result.append(f"<blockquote>{text}</blockquote>\n")
+        elif type_ == "code":
+            code = html.escape(_plain(content.get("rich_text")))
+            language = html.escape(content.get("language") or "")
+            result.append(f'<pre><code class="language-{language}">{code}</code></pre>\n')
+        elif type_ == "equation":
+            result.append(f"<p>$${html.escape(content.get('expression') or '')}$$</p>\n")
+        elif type_ == "divider":
+            result.append("<hr>\n")
+        elif type_ == "image":
+            caption = html.escape(_plain(content.get("caption")))
+            result.append(f'<img src="{html.escape(_url(content))}" alt="{caption}">\n')
+        elif type_ in FILE_TYPES or type_ in LINK_TYPES:
+            url = html.escape(_url(content))
+            caption = html.escape(_plain(content.get("caption"))) or url
+            result.append(f'<p><a href="{url}">{caption}</a></p>\n' if url else f"<p>{caption}</p>\n")
+        elif type_ in ("child_page", "child_database"):
+            title = html.escape(content.get("title") or type_)
+            result.append(f'<p><a href="https://www.notion.so/{block.id}">{title}</a></p>\n')
+        elif text:
+            result.append(f"<p>{text}</p>\n")
+        return "".join(result)
+
+
+def render(blocks: Iterable[Any], out: Optional[TextIO] = None, fmt: str = "markdown") -> Optional[str]:
+    """
+    Renders blocks (BlockArray or any iterator of Block objects) in one pass.
+
+    :param out: file-like object to write into. If None, the result is returned as a string
+    :param fmt: `markdown`, `text` or `html`
+
+    `with open("page.md", "w") as f:`
+        `render(no.pages.iter_block_children_recursive("PAGE ID"), f)`
+    `print(render(blocks, fmt="html"))`
+    """
+    if out is None:
+        out = io.StringIO()
+        Renderer(out, fmt).write_all(blocks)
+        return out.getvalue()
+    Renderer(out, fmt).write_all(blocks)
+    return None
@@ -5,7 +5,7 @@ with open("README.md", "r", encoding="utf-8") as fh:
 
 setuptools.setup(
     name="pytion",
-    version="1.3.5",
+    version="1.4.0",
     author="Yegor Gomzin",
     author_email="slezycmex@mail.ru",
     description="Unofficial Python client for official Notion API",
@@ -29,5 +29,10 @@ setuptools.setup(
     python_requires=">=3.7",
     install_requires=[
         "requests>=2.26.0"
-    ]
+    ],
+    extras_require={
+        "async": ["aiohttp>=3.8"],
+        "numpy": ["numpy>=1.17"],
+        "fast": ["orjson>=3.6"],
+    },
 )
@@ -1,5 +1,10 @@
+import json as pyjson
+
 import pytest
 
+import pytion.envs as envs
+from pytion.query import make_response
+
 
 @pytest.fixture(scope="session")
 def root_page(no):
@@ -35,3 +40,167 @@ def page_for_updates(no):
 @pytest.fixture(scope="session")
 def database_for_pages(no):
     return no.databases.get("35f50aa293964b0d93e09338bc980e2e")
+
+
+@pytest.fixture()
+def offline_no():
+    from pytion import Notion
+    no = Notion(token="secret_offline", rate_limit=0)
+    no.session.session = FakeSession()
+    return no
+
+
+# offline helpers: raw API objects and canned transport answers
+
+def raw_user(id_="01c67faf3aba45ffaa022407f87c86a5"):
+    return {"object": "user", "id": id_}
+
+
+def raw_rich_text(text):
+    return {
+        "type": "text",
+        "text": {"content": text, "link": None},
+        "annotations": {
+            "bold": False, "italic": False, "strikethrough": False,
+            "underline": False, "code": False, "color": "default"
+        },
+        "plain_text": text,
+        "href": None,
+    }
+
+
+def raw_block(id_, text="", type_="paragraph", has_children=False, parent_id="878d628488d94894ab14f9b872cd6870"):
+    return {
+        "object": "block",
+        "id": id_,
+        "parent": {"type": "page_id", "page_id": parent_id},
+        "created_time": "2022-05-12T10:00:00.000Z",
+        "last_edited_time": "2022-05-12T10:00:00.000Z",
+        "created_by": raw_user(),
+        "last_edited_by": raw_user(),
+        "has_children": has_children,
+        "archived": False,
+        "type": type_,
+        type_: {"rich_text": [raw_rich_text(text)], "color": "default"},
+    }
+
+
+def raw_page(id_, title="", properties=None, last_edited_time="2022-05-12T10:00:00.000Z"):
+    props = {"Name": {"id": "title", "type": "title", "title": [raw_rich_text(title)] if title else []}}
+    if properties:
+        props.update(properties)
+    return {
+        "object": "page",
+        "id": id_,
+        "created_time": "2022-05-12T10:00:00.000Z",
+        "last_edited_time": last_edited_time,
+        "created_by": raw_user(),
+        "last_edited_by": raw_user(),
+        "cover": None,
+        "icon": None,
+        "parent": {"type": "database_id", "database_id": "0e9539099cff456d89e44684d6b6c701"},
+        "archived": False,
+        "properties": props,
+        "url": "https://www.notion.so/" + id_,
+        "public_url": None,
+    }
+
+
+def raw_database(id_, properties=None):
+    props = {"Name": {"id": "title", "name": "Name", "type": "title", "title": {}}}
+    if properties:
+        props.update(properties)
+    return {
+        "object": "database",
+        "id": id_,
+        "created_time": "2022-05-12T10:00:00.000Z",
+        "last_edited_time": "2022-05-12T10:00:00.000Z",
+        "created_by": raw_user(),
+        "last_edited_by": raw_user(),
+        "title": [raw_rich_text("Tasks")],
+        "description": [],
+        "cover": None,
+        "icon": None,
+        "parent": {"type": "page_id", "page_id": "878d628488d94894ab14f9b872cd6870"},
+        "properties": props,
+        "url": "https://www.notion.so/" + id_,
+        "archived": False,
+        "is_inline": False,
+        "public_url": None,
+    }
+
+
+def raw_list(results, next_cursor=None):
+    return {
+        "object": "list",
+        "results": results,
+        "next_cursor": next_cursor,
+        "has_more": bool(next_cursor),
+        "type": "block",
+        "block": {},
+    }
+
+
+class FakeSession(object):
+    """
+    Replaces `requests.Session` of `Request` to answer from `routes` and record every call.
+    `routes` maps (method, "path/id/after_path?query") to the answer:
+    dict (200 OK), tuple (status, dict, headers), list of answers (one per call) or callable(method, url, body)
+    """
+    closed = False
+
+    def __init__(self, routes=None):
+        self.routes = routes if routes else {}
+        self.calls = []
+        self.headers = {}
+
+    def answer(self, method, url, body):
+        self.calls.append((method.lower(), url[len(envs.NOTION_URL):], body))
+        key = (method.lower(), url[len(envs.NOTION_URL):])
+        answer = self.routes.get(key)
+        if answer is None:
+            answer = (404, {"object": "error", "status": 404, "code": "object_not_found", "message": key}, {})
+        if isinstance(answer, list):
+            answer = answer.pop(0)
+        if callable(answer):
+            answer = answer(method, url, body)
+        if isinstance(answer, dict):
+            answer = (200, answer, {})
+        return answer
+
+    def request(self, method, url, json=None, data=None, **kwargs):
+        body = json if json is not None else (pyjson.loads(data) if data else None)
+        status, payload, headers = self.answer(method, url, body)
+        content = payload if isinstance(payload, bytes) else pyjson.dumps(payload).encode("utf-8")
+        sent = data if data is not None else (pyjson.dumps(json).encode("utf-8") if json is not None else None)
+        return make_response(method, url, sent, status, "reason", headers, content)
+
+
+class FakeAsyncSession(FakeSession):
+    """The same as `FakeSession` but mimics `aiohttp.ClientSession`"""
+
+    def request(self, method, url, json=None, data=None, **kwargs):
+        body = json if json is not None else (pyjson.loads(data) if data else None)
+        status, payload, headers = self.answer(method, url, body)
+        content = payload if isinstance(payload, bytes) else pyjson.dumps(payload).encode("utf-8")
+        return _FakeAsyncResponse(status, headers, content)
+
+    async def close(self):
+        self.closed = True
+
+
+class _FakeAsyncResponse(object):
+    def __init__(self, status, headers, content):
+        self.status = status
+        self.reason = "reason"
+        self.headers = headers
+        self.content = content
+
+    async def read(self):
+        return self.content
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        return False
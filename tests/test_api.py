@@ -1,10 +1,15 @@
+import asyncio
 from datetime import datetime
 
 import pytest
+import requests
 
 from pytion.models import Page, Block, Database, User, RichTextArray, ElementArray
 from pytion.models import BlockArray, PropertyValue, PageArray, LinkTo, Property
-from pytion import InvalidRequestURL, ObjectNotFound, ValidationError
+from pytion import InvalidRequestURL, ObjectNotFound, ValidationError, AsyncNotion
+from pytion.query import aiohttp
+from pytion.render import render
+from tests.fixtures import FakeAsyncSession, offline_no, raw_block, raw_database, raw_list, raw_page
 
 
 def test_notion(no):
@@ -682,3 +687,362 @@ class TestElement:
         assert isinstance(parent.obj, Database)
         assert parent.obj.id == little_database.obj.id
         assert str(parent.obj.title) == str(little_database.obj.title)
+
+
+class TestElementOffline:
+    def test_iter_db_query(self, offline_no):
+        offline_no.session.session.routes[("post", "databases/db1/query")] = [
+            raw_list([raw_page("p1", "one"), raw_page("p2", "two")], next_cursor="c1"),
+            raw_list([raw_page("p3", "three")]),
+        ]
+        pages = offline_no.databases.iter_db_query("db1", page_size=2)
+        first = next(pages)
+        assert isinstance(first, Page)
+        assert str(first) == "one"
+        assert len(offline_no.session.session.calls) == 1, "the next page is not requested before it is needed"
+        assert [str(p) for p in pages] == ["two", "three"]
+        assert offline_no.session.session.calls[1][2] == {"page_size": 2, "start_cursor": "c1"}
+
+    def test_iter_block_children(self, offline_no):
+        offline_no.session.session.routes[("get", "blocks/b1/children")] = raw_list(
+            [raw_block("b11", "first")], next_cursor="c1"
+        )
+        offline_no.session.session.routes[("get", "blocks/b1/children?start_cursor=c1")] = raw_list(
+            [raw_block("b12", "second")]
+        )
+        blocks = list(offline_no.blocks.iter_block_children("b1"))
+        assert all(isinstance(b, Block) for b in blocks)
+        assert [b.simple for b in blocks] == ["first", "second"]
+
+    @pytest.mark.parametrize("workers", (0, 4), ids=("sequential", "concurrent"))
+    def test_get_block_children_recursive(self, offline_no, workers):
+        offline_no.session.session.routes = {
+            ("get", "blocks/root/children"): raw_list([
+                raw_block("b1", "first", has_children=True),
+                raw_block("p1", "subpage", type_="child_page", has_children=True),
+                raw_block("b2", "second", has_children=True),
+            ]),
+            ("get", "blocks/b1/children"): raw_list([raw_block("b11", "nested", has_children=True)]),
+            ("get", "blocks/b11/children"): raw_list([raw_block("b111", "deep", has_children=True)]),
+            ("get", "blocks/b2/children"): raw_list([raw_block("b21", "nested 2"), raw_block("b22", "nested 3")]),
+        }
+        r = offline_no.blocks.get_block_children_recursive("root", max_depth=2, workers=workers)
+        assert isinstance(r.obj, BlockArray)
+        assert [b.id for b in r.obj] == ["b1", "b11", "b111", "p1", "b2", "b21", "b22"]
+        assert [b._level for b in r.obj] == [0, 1, 2, 0, 0, 1, 1]
+        requested = sorted(call[1] for call in offline_no.session.session.calls)
+        assert requested == ["blocks/b1/children", "blocks/b11/children", "blocks/b2/children", "blocks/root/children"]
+
+    def test_get_block_children_recursive__nested_database(self, offline_no):
+        database = raw_block("db1", type_="child_database", has_children=True)
+        database["child_database"] = {"title": "Inline"}
+        offline_no.session.session.routes = {
+            ("get", "blocks/root/children"): raw_list([database]),
+            ("get", "blocks/db1/children"): raw_list([raw_block("b1", "row")]),
+        }
+        r = offline_no.blocks.get_block_children_recursive("root")
+        assert [b.id for b in r.obj] == ["db1", "b1"]
+        assert [call[1] for call in offline_no.session.session.calls] == ["blocks/root/children", "blocks/db1/children"]
+
+    def test_search__inline_titles(self, offline_no):
+        offline_no.session.session.routes[("post", "search/")] = raw_list(
+            [raw_page(f"p{i}", f"page {i}") for i in range(100)]
+        )
+        r = offline_no.search("page")
+        assert len(r.obj) == 100
+        assert str(r.obj[99]) == "page 99"
+        assert len(offline_no.session.session.calls) == 1
+
+    def test_get_page_properties__truncated(self, offline_no):
+        relation = {
+            "id": "rel1", "type": "relation", "has_more": True,
+            "relation": [{"id": f"{i:032}"} for i in range(25)],
+        }
+        tags = {"id": "tag1", "type": "multi_select", "multi_select": [{"name": "a"}]}
+        page = Page(**raw_page("p1", "title", properties={"Links": relation, "Tags": tags}))
+        assert page.properties["Links"].truncated is True
+        assert page.properties["Tags"].truncated is False
+        assert page.properties["Name"].truncated is False
+        offline_no.session.session.routes[("get", "pages/p1/properties/rel1")] = {
+            "object": "list", "type": "property_item", "has_more": False, "next_cursor": None,
+            "results": [{"object": "property_item", "type": "relation", "relation": {"id": f"{i:032}"}}
+                        for i in range(30)],
+        }
+        offline_no.pages.get_page_properties(obj=page)
+        assert [call[1] for call in offline_no.session.session.calls] == ["pages/p1/properties/rel1"]
+        assert len(page.properties["Links"].value) == 30
+        assert page.properties["Links"].truncated is False
+
+    def test_iter_search(self, offline_no):
+        offline_no.session.session.routes[("post", "search/")] = raw_list([raw_page("p1", "found")])
+        items = list(offline_no.iter_search("found", object_type="page"))
+        assert [str(i) for i in items] == ["found"]
+        assert offline_no.session.session.calls[0][2]["filter"] == {"property": "object", "value": "page"}
+
+    def test_get__properties(self, offline_no):
+        offline_no.session.session.routes[("get", "pages/p1?filter_properties=title&filter_properties=%3AUPp")] = (
+            raw_page("p1", "projected")
+        )
+        page = offline_no.pages.get("p1", properties=["title", "%3AUPp"])
+        assert list(page.obj.properties) == ["Name"]
+
+    def test_db_query__properties(self, offline_no):
+        routes = offline_no.session.session.routes
+        routes[("get", "databases/db1")] = raw_database("db1", {
+            "Price": {"id": "%3AUPp", "name": "Price", "type": "number", "number": {"format": "number"}},
+        })
+        routes[("post", "databases/db1/query?filter_properties=%3AUPp&filter_properties=x")] = [
+            raw_list([raw_page("p1", "one")], next_cursor="c1"),
+            raw_list([raw_page("p2", "two")]),
+        ]
+        database = offline_no.databases.get("db1")
+        pages = database.db_query(properties=["Price", "x"])
+        assert len(pages.obj) == 2
+        assert offline_no.session.session.calls[-1][2] == {"start_cursor": "c1"}, "projection is kept while paginating"
+
+    def test_page_create_many(self, offline_no):
+        routes = offline_no.session.session.routes
+        routes[("get", "databases/db1")] = raw_database("db1", {
+            "Price": {"id": "%3AUPp", "name": "Price", "type": "number", "number": {"format": "number"}},
+        })
+        unavailable = {"row 2"}
+
+        def create(method, url, body):
+            title = body["properties"]["Name"]["title"][0]["text"]["content"]
+            if title == "bad":
+                return 400, {"object": "error", "status": 400, "code": "validation_error", "message": "bad"}, {}
+            if title in unavailable:
+                unavailable.discard(title)
+                return 503, {"object": "error", "status": 503, "code": "service_unavailable", "message": ""}, {
+                    "Retry-After": "0"
+                }
+            return raw_page("id-" + title, title)
+
+        routes[("post", "pages/")] = create
+        database = offline_no.databases.get("db1")
+        rows = [{"Name": f"row {i}", "Price": i} for i in range(5)]
+        rows.insert(3, {"Name": "bad"})
+        rows.append({"Unknown": 1})
+        results = database.page_create_many(iter(rows), workers=3)
+        assert [r.index for r in results] == list(range(7))
+        assert [r.id for r in results if r.ok] == [f"id-row {i}" for i in range(5)]
+        assert [r.index for r in results if not r.ok] == [3, 6]
+        assert isinstance(results[3].error, ValidationError)
+        assert isinstance(results[6].error, ValueError), "plain value of unknown property"
+        assert results[0].row is rows[0]
+        bodies = [call[2] for call in offline_no.session.session.calls if call[0] == "post"]
+        assert len(bodies) == 7, "503 is retried"
+        assert bodies[0]["parent"] == {"database_id": "db1"}
+        assert {b["properties"]["Price"]["number"] for b in bodies if "Price" in b["properties"]} == set(range(5))
+
+    def test_page_create_many__ambiguous(self, offline_no):
+        def create(method, url, body):
+            title = body["properties"]["title"]["title"][0]["text"]["content"]
+            if title == "timeout":
+                raise requests.ReadTimeout()
+            if title == "refused":
+                raise requests.ConnectTimeout()
+            if title == "error":
+                return 500, {"object": "error", "status": 500, "code": "internal_server_error", "message": ""}, {}
+            return raw_page("id-" + title, title)
+
+        offline_no.session.session.routes[("post", "pages/")] = create
+        offline_no.session.retry.max_retries = 1
+        offline_no.session.retry.backoff = 0
+        rows = [{"title": PropertyValue.create("title", t)} for t in ("ok", "timeout", "error", "refused")]
+        results = offline_no.pages.page_create_many(rows, parent=LinkTo.create(page_id="root"), workers=2)
+        assert [r.ok for r in results] == [True, False, False, False]
+        assert [r.ambiguous for r in results] == [False, True, True, False]
+        titles = [call[2]["properties"]["title"]["title"][0]["text"]["content"] for call in
+                  offline_no.session.session.calls]
+        assert sorted(titles) == ["error", "ok", "refused", "refused", "timeout"], "only not sent row is repeated"
+
+    def test_page_create_many__parent(self, offline_no):
+        offline_no.session.session.routes[("post", "pages/")] = raw_page("p1", "new")
+        page = Page.create(parent=LinkTo.create(page_id="root"), title="new")
+        results = offline_no.pages.page_create_many([page, {"Name": PropertyValue.create("title", "new")}])
+        assert results[0].ok
+        assert isinstance(results[1].error, ValueError), "parent of dict rows is required"
+        assert offline_no.session.session.calls[0][2]["parent"] == {"page_id": "root"}
+
+    @pytest.mark.parametrize("workers", (0, 4), ids=("sequential", "concurrent"))
+    def test_block_append__chunks(self, offline_no, workers):
+        def append(method, url, body):
+            return raw_list([
+                raw_block("new" + child["paragraph"]["rich_text"][0]["text"]["content"]) for child in body["children"]
+            ])
+
+        routes = offline_no.session.session.routes
+        routes[("patch", "blocks/root/children")] = append
+        routes[("patch", "blocks/newb0/children")] = append
+        routes[("patch", "blocks/newb150/children")] = append
+        blocks = [Block.create(f"b{i}") for i in range(250)]
+        blocks[1:1] = [Block.create("c1", level=1), Block.create("c2", level=2), Block.create("c3", level=3)]
+        blocks[154:154] = [Block.create(f"d{i}", level=1) for i in range(120)]
+        r = offline_no.blocks.block_append("root", blocks=blocks, after="x", workers=workers)
+        assert [b.id for b in r.obj] == [f"newb{i}" for i in range(250)]
+        calls = offline_no.session.session.calls
+        root = [body for _, path, body in calls if path == "blocks/root/children"]
+        assert [len(body["children"]) for body in root] == [100, 100, 50]
+        assert [body["after"] for body in root] == ["x", "newb99", "newb199"]
+        assert "children" not in root[0]["children"][0]["paragraph"], "3 levels are deeper than API allows"
+        follow_up = [body for _, path, body in calls if path == "blocks/newb0/children"]
+        assert follow_up[0]["children"][0]["paragraph"]["children"][0]["paragraph"]["children"]
+        assert [len(body["children"]) for _, path, body in calls if path == "blocks/newb150/children"] == [100, 20]
+
+    def test_page_update__changes_only(self, offline_no):
+        routes = offline_no.session.session.routes
+        props = {
+            "Price": {"id": "%3AUPp", "type": "number", "number": 5},
+            "Done": {"id": "d1", "type": "checkbox", "checkbox": False},
+        }
+        routes[("get", "pages/p1")] = raw_page("p1", "one", properties=props)
+        routes[("patch", "pages/p1")] = raw_page("p1", "one", properties=dict(props, Price={
+            "id": "%3AUPp", "type": "number", "number": 7
+        }))
+        page = offline_no.pages.get("p1")
+        assert page.page_update() is page
+        assert page.page_update(properties={"Done": PropertyValue.create("checkbox", False)}, title="one") is page
+        assert len(offline_no.session.session.calls) == 1, "no-op update sends nothing"
+        page.obj.properties["Price"].value = 7
+        assert page.obj.dirty
+        page.page_update(title="two")
+        body = offline_no.session.session.calls[-1][2]
+        assert list(body) == ["properties"]
+        assert set(body["properties"]) == {"Price", "title"}
+        assert body["properties"]["Price"] == {"number": 7}
+        assert not page.obj.dirty, "the answer is the new snapshot"
+
+    def test_block_update__changes_only(self, offline_no):
+        raw = raw_block("b1", "task", type_="to_do")
+        raw["to_do"]["checked"] = False
+        offline_no.session.session.routes[("patch", "blocks/b1")] = raw
+        block = Block(**raw)
+        r = offline_no.blocks.block_update(block_obj=block)
+        assert r.obj is block
+        assert offline_no.session.session.calls == []
+        block.checked = True
+        offline_no.blocks.block_update(block_obj=block)
+        assert offline_no.session.session.calls[-1][2] == {"to_do": {"checked": True}}
+        offline_no.blocks.block_update(block_obj=Block(**raw), archived=True)
+        assert offline_no.session.session.calls[-1][2] == {"archived": True}
+
+    def test_block_sync(self, offline_no):
+        routes = offline_no.session.session.routes
+        routes[("get", "blocks/root/children")] = raw_list([
+            raw_block("b1", "Status", type_="heading_2"), raw_block("b2", "degraded"), raw_block("b3", "old"),
+        ])
+        routes[("patch", "blocks/b2")] = raw_block("b2", "operational")
+        routes[("patch", "blocks/b3")] = raw_block("b3", "old")
+        blocks = [Block.create("Status", type_="heading_2"), Block.create("operational")]
+        ops = offline_no.pages.block_sync("root", blocks=blocks, dry_run=True)
+        assert [(op.action, op.id) for op in ops] == [("update", "b2"), ("archive", "b3")]
+        assert len(offline_no.session.session.calls) == 1
+        offline_no.pages.block_sync("root", blocks=blocks)
+        writes = [call for call in offline_no.session.session.calls if call[0] == "patch"]
+        assert writes == [
+            ("patch", "blocks/b2", {"paragraph": {"rich_text": [
+                {"type": "text", "text": {"content": "operational", "link": None}}
+            ]}}),
+            ("patch", "blocks/b3", {"archived": True}),
+        ]
+
+    def test_iter_block_children_recursive(self, offline_no):
+        offline_no.session.session.routes = {
+            ("get", "blocks/root/children"): raw_list([
+                raw_block("b1", "first", has_children=True),
+                raw_block("p1", "subpage", type_="child_page", has_children=True),
+                raw_block("b2", "second"),
+            ]),
+            ("get", "blocks/b1/children"): raw_list([raw_block("b11", "nested")]),
+        }
+        blocks = offline_no.blocks.iter_block_children_recursive("root")
+        assert next(blocks).id == "b1"
+        assert len(offline_no.session.session.calls) == 1
+        assert [(b.id, b._level) for b in blocks] == [("b11", 1), ("p1", 0), ("b2", 0)]
+        text = render(offline_no.blocks.iter_block_children_recursive("root"), fmt="text")
+        assert text == "first\n\tnested\nsubpage\nsecond\n"
+
+
+@pytest.fixture()
+def async_no():
+    no = AsyncNotion(token="secret_offline", rate_limit=0)
+    no.session.session = FakeAsyncSession()
+    return no
+
+
+@pytest.mark.skipif(aiohttp is None, reason="aiohttp is not installed")
+class TestAsyncElement:
+    def test_get__page(self, async_no):
+        async_no.session.session.routes[("get", "pages/878d628488d94894ab14f9b872cd6870")] = raw_page(
+            "878d6284-88d9-4894-ab14-f9b872cd6870", "Pytion Tests"
+        )
+        page = asyncio.run(async_no.pages.get("878d6284-88d9-4894-ab14-f9b872cd6870"))
+        assert isinstance(page.obj, Page)
+        assert str(page.obj.title) == "Pytion Tests"
+
+    def test_db_query__paginate(self, async_no):
+        routes = async_no.session.session.routes
+        routes[("post", "databases/db1/query")] = [
+            raw_list([raw_page("p1", "one")], next_cursor="c1"),
+            raw_list([raw_page("p2", "two")]),
+        ]
+        database = async_no.databases
+        database.obj = None
+        r = asyncio.run(database.db_query("db1"))
+        assert isinstance(r.obj, PageArray)
+        assert [str(p) for p in r.obj] == ["one", "two"]
+        assert async_no.session.session.calls[1][2] == {"start_cursor": "c1"}
+
+    def test_page_create_many(self, async_no):
+        async_no.session.session.routes[("post", "pages/")] = lambda method, url, body: raw_page(
+            "id-" + body["properties"]["Name"]["title"][0]["text"]["content"]
+        )
+        rows = [{"Name": PropertyValue.create("title", f"row {i}")} for i in range(4)]
+        rows.append({"Name": "plain"})
+        results = asyncio.run(async_no.pages.page_create_many(rows, parent=LinkTo.create(database_id="db1")))
+        assert [r.id for r in results] == ["id-row 0", "id-row 1", "id-row 2", "id-row 3", None]
+        assert isinstance(results[4].error, ValueError)
+        assert not results[4].ambiguous
+
+    @pytest.mark.parametrize("workers", [0, 4])
+    def test_block_append__chunks(self, async_no, workers):
+        def append(method, url, body):
+            return raw_list([
+                raw_block("new" + child["paragraph"]["rich_text"][0]["text"]["content"]) for child in body["children"]
+            ])
+
+        async_no.session.session.routes[("patch", "blocks/root/children")] = append
+        async_no.session.session.routes[("patch", "blocks/newb1/children")] = append
+        blocks = [Block.create(f"b{i}") for i in range(150)]
+        blocks[2:2] = [Block.create(f"c{i}", level=1) for i in range(101)]
+        r = asyncio.run(async_no.blocks.block_append("root", blocks=blocks, workers=workers))
+        assert len(r.obj) == 150
+        paths = [path for _, path, _ in async_no.session.session.calls]
+        assert paths.count("blocks/root/children") == 2
+        assert paths.count("blocks/newb1/children") == 2
+
+    @pytest.mark.parametrize("workers", [0, 4])
+    def test_get_block_children_recursive(self, async_no, workers):
+        routes = async_no.session.session.routes
+        routes[("get", "blocks/root/children")] = raw_list(
+            [raw_block("b1", "first", has_children=True), raw_block("b2", "second", has_children=True)]
+        )
+        routes[("get", "blocks/b1/children")] = raw_list([raw_block("b11", "nested", has_children=True)])
+        routes[("get", "blocks/b11/children")] = raw_list([raw_block("b111", "deep")])
+        routes[("get", "blocks/b2/children")] = raw_list([raw_block("b21", "nested 2")])
+        r = asyncio.run(async_no.blocks.get_block_children_recursive("root", workers=workers))
+        assert isinstance(r.obj, BlockArray)
+        assert [b.simple for b in r.obj] == ["first", "nested", "deep", "second", "nested 2"]
+        assert [b._level for b in r.obj] == [0, 1, 2, 0, 1]
+
+    def test_iter_db_query(self, async_no):
+        async_no.session.session.routes[("post", "databases/db1/query")] = [
+            raw_list([raw_page("p1", "one")], next_cursor="c1"),
+            raw_list([raw_page("p2", "two")]),
+        ]
+
+        async def collect():
+            return [str(p) async for p in async_no.databases.iter_db_query("db1")]
+
+        assert asyncio.run(collect()) == ["one", "two"]
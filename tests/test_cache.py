@@ -0,0 +1,221 @@
+import asyncio
+import time
+
+import pytest
+
+from pytion import Notion, AsyncNotion
+from pytion.cache import ResponseCache, SQLiteStore
+from pytion.models import Page, Block, LinkTo
+from pytion.query import aiohttp
+from tests.fixtures import FakeAsyncSession, FakeSession, raw_block, raw_list, raw_page
+
+
+@pytest.fixture()
+def cached_no():
+    no = Notion(token="secret_offline", rate_limit=0, cache=ResponseCache(max_size=3))
+    no.session.session = FakeSession()
+    return no
+
+
+@pytest.fixture()
+def stored_no():
+    no = Notion(token="secret_offline", rate_limit=0, store=SQLiteStore(":memory:"))
+    no.session.session = FakeSession()
+    yield no
+    no.store.close()
+
+
+class TestResponseCache:
+    def test_lru(self):
+        cache = ResponseCache(max_size=2)
+        cache.set("pages", "1", None, 0, {"id": "1"})
+        cache.set("pages", "2", None, 0, {"id": "2"})
+        assert cache.get("pages", "1") == {"id": "1"}
+        cache.set("pages", "3", None, 0, {"id": "3"})
+        assert cache.get("pages", "2") is None, "least recently used entry is evicted"
+        assert cache.get("pages", "1") == {"id": "1"}
+        assert cache.hits == 2
+        assert cache.misses == 1
+
+    def test_ttl(self, monkeypatch):
+        cache = ResponseCache(ttl={"users": 10, "blocks": 0})
+        now = time.monotonic()
+        cache.set("users", "1", None, 0, {"id": "1"})
+        cache.set("blocks", "1", None, 0, {"id": "1"})
+        assert cache.get("blocks", "1") is None, "zero TTL disables caching of the type"
+        monkeypatch.setattr(time, "monotonic", lambda: now + 11)
+        assert cache.get("users", "1") is None
+        assert len(cache) == 0
+
+    def test_copies(self):
+        cache = ResponseCache()
+        value = {"id": "1", "results": []}
+        cache.set("pages", "1", None, 0, value)
+        value["results"].append(1)
+        cached = cache.get("pages", "1")
+        cached["results"].append(2)
+        assert cache.get("pages", "1") == {"id": "1", "results": []}
+
+
+class TestCachedRequest:
+    def test_get__hit(self, cached_no):
+        cached_no.session.session.routes[("get", "pages/p1")] = raw_page("p1", "cached")
+        first = cached_no.pages.get("p1")
+        second = cached_no.pages.get("p1")
+        assert isinstance(second.obj, Page)
+        assert str(first.obj) == str(second.obj) == "cached"
+        assert len(cached_no.session.session.calls) == 1
+        assert cached_no.session.cache.hits == 1
+
+    def test_update__invalidates(self, cached_no):
+        routes = cached_no.session.session.routes
+        routes[("get", "blocks/b1")] = [raw_block("b1", "old"), raw_block("b1", "new")]
+        routes[("get", "blocks/878d628488d94894ab14f9b872cd6870/children")] = raw_list([raw_block("b1", "old")])
+        routes[("patch", "blocks/b1")] = raw_block("b1", "new")
+        cached_no.blocks.get_block_children("878d628488d94894ab14f9b872cd6870")
+        block = cached_no.blocks.get("b1")
+        assert len(cached_no.session.cache) == 2
+        block.block_update(new_text="new")
+        assert len(cached_no.session.cache) == 0, "the block and children list of its parent are invalidated"
+        assert isinstance(cached_no.blocks.get("b1").obj, Block)
+        assert cached_no.blocks.get("b1").obj.simple == "new"
+
+    def test_append__invalidates(self, cached_no):
+        routes = cached_no.session.session.routes
+        routes[("get", "blocks/p1/children")] = [raw_list([raw_block("b1", "one")]), raw_list(
+            [raw_block("b1", "one"), raw_block("b2", "two")]
+        )]
+        routes[("patch", "blocks/p1/children")] = raw_list([raw_block("b2", "two")])
+        assert len(cached_no.blocks.get_block_children("p1").obj) == 1
+        cached_no.blocks.block_append("p1", block=Block.create("two"))
+        assert [b.simple for b in cached_no.blocks.get_block_children("p1").obj] == ["one", "two"]
+
+    def test_create__invalidates(self, cached_no):
+        routes = cached_no.session.session.routes
+        routes[("get", "blocks/p1/children")] = raw_list([])
+        routes[("post", "pages/")] = raw_page("p2", "new")
+        cached_no.blocks.get_block_children("p1")
+        cached_no.pages.page_create(parent=LinkTo.create(page_id="p1"), title="new")
+        assert len(cached_no.session.cache) == 0, "children list of the parent page is invalidated"
+
+    def test_post__not_cached(self, cached_no):
+        cached_no.session.session.routes[("post", "databases/db1/query")] = raw_list([raw_page("p1")])
+        cached_no.databases.db_query("db1")
+        cached_no.databases.db_query("db1")
+        assert len(cached_no.session.session.calls) == 2
+
+
+class TestSQLiteStore:
+    def test_children(self):
+        store = SQLiteStore(":memory:")
+        store.put_children("p-1", "2022-05-12T10:00:00.000Z", [raw_block("b1", "one"), raw_block("b2", "two")])
+        children = store.get_children("p1", "2022-05-12T10:00:00.000Z")
+        assert [b["id"] for b in children] == ["b1", "b2"]
+        assert store.get_children("p1", "2022-05-13T10:00:00.000Z") is None, "the parent is changed"
+        assert store.get_children("p1", None) is None
+        assert store.get("b2")["id"] == "b2"
+
+    def test_max_age(self, monkeypatch):
+        store = SQLiteStore(":memory:", max_age=10)
+        now = time.time()
+        store.put(raw_page("p1", "stored"))
+        assert store.get("p1")["id"] == "p1"
+        monkeypatch.setattr(time, "time", lambda: now + 11)
+        assert store.get("p1") is None
+        assert store.get("p1", max_age=0)["id"] == "p1"
+
+
+    def test_children__edited_now(self):
+        store = SQLiteStore(":memory:")
+        now = time.strftime("%Y-%m-%dT%H:%M:00.000Z", time.gmtime())
+        store.put_children("p1", now, [raw_block("b1", "one")])
+        assert store.get_children("p1", now) is None, "the parent may be edited again in the same minute"
+        assert store.get("b1")["id"] == "b1"
+        assert not store.settled(None)
+        assert store.settled("2022-05-12T10:00:00.000Z")
+
+
+class TestStoredRequest:
+    @pytest.mark.parametrize("workers", [0, 4])
+    def test_recursive__unchanged(self, stored_no, workers):
+        routes = stored_no.session.session.routes
+        routes[("get", "pages/p1")] = raw_page("p1", "page")
+        routes[("get", "blocks/p1/children")] = raw_list([raw_block("b1", "one", has_children=True)])
+        routes[("get", "blocks/b1/children")] = raw_list([raw_block("b2", "two")])
+        page = stored_no.pages.get("p1")
+        first = page.get_block_children_recursive(workers=workers)
+        second = page.get_block_children_recursive(workers=workers)
+        assert [b.simple for b in first.obj] == [b.simple for b in second.obj] == ["one", "two"]
+        assert [b._level for b in second.obj] == [0, 1]
+        assert [c[1] for c in stored_no.session.session.calls].count("blocks/b1/children") == 1
+        assert [c[1] for c in stored_no.session.session.calls].count("blocks/p1/children") == 1
+
+    @pytest.mark.skipif(aiohttp is None, reason="aiohttp is not installed")
+    def test_async(self):
+        no = AsyncNotion(token="secret_offline", rate_limit=0, store=SQLiteStore(":memory:"))
+        no.session.session = FakeAsyncSession()
+        routes = no.session.session.routes
+        routes[("get", "pages/p1")] = raw_page("p1", "page")
+        routes[("get", "blocks/p1/children")] = raw_list([raw_block("b1", "one", has_children=True)])
+        routes[("get", "blocks/b1/children")] = raw_list([raw_block("b2", "two")])
+
+        async def sync_twice():
+            page = await no.pages.get("p1")
+            await page.get_block_children_recursive(workers=4)
+            return await page.get_block_children_recursive()
+
+        assert [b.simple for b in asyncio.run(sync_twice()).obj] == ["one", "two"]
+        assert [c[1] for c in no.session.session.calls].count("blocks/b1/children") == 1
+        no.store.close()
+
+    def test_children(self, stored_no):
+        routes = stored_no.session.session.routes
+        routes[("get", "pages/p1")] = raw_page("p1", "page")
+        routes[("get", "blocks/p1/children")] = raw_list([raw_block("b1", "one"), raw_block("b2", "two")])
+        routes[("get", "blocks/p1/children?page_size=1")] = raw_list([raw_block("b1", "one")])
+        page = stored_no.pages.get("p1")
+        assert [b.simple for b in page.get_block_children().obj] == ["one", "two"]
+        assert [b.simple for b in page.get_block_children().obj] == ["one", "two"]
+        assert [c[1] for c in stored_no.session.session.calls].count("blocks/p1/children") == 1
+        assert len(stored_no.blocks.get_block_children("p1", limit=1).obj) == 1, "limited answers are not stored"
+
+    def test_children__edited_now(self, stored_no):
+        routes = stored_no.session.session.routes
+        now = time.strftime("%Y-%m-%dT%H:%M:00.000Z", time.gmtime())
+        routes[("get", "pages/p1")] = raw_page("p1", "page", last_edited_time=now)
+        routes[("get", "blocks/p1/children")] = [raw_list([raw_block("b1", "one")]), raw_list([raw_block("b2", "two")])]
+        page = stored_no.pages.get("p1")
+        assert [b.simple for b in page.get_block_children().obj] == ["one"]
+        assert [b.simple for b in page.get_block_children().obj] == ["two"], "edited in the same minute"
+
+    def test_recursive__changed(self, stored_no):
+        routes = stored_no.session.session.routes
+        edited = raw_page("p1", "page", last_edited_time="2022-05-13T10:00:00.000Z")
+        routes[("get", "pages/p1")] = [raw_page("p1", "page"), edited]
+        routes[("get", "blocks/p1/children")] = [
+            raw_list([raw_block("b1", "one")]), raw_list([raw_block("b1", "one"), raw_block("b3", "three")])
+        ]
+        stored_no.pages.get("p1").get_block_children_recursive()
+        blocks = stored_no.pages.get("p1").get_block_children_recursive()
+        assert [b.simple for b in blocks.obj] == ["one", "three"]
+        assert stored_no.store.get("p1", max_age=0)["last_edited_time"] == "2022-05-13T10:00:00.000Z"
+
+    def test_db_sync(self, stored_no):
+        routes = stored_no.session.session.routes
+        routes[("post", "databases/db1/query")] = [
+            raw_list([raw_page("p1", "one"), raw_page("p2", "two", last_edited_time="2022-05-13T10:00:00.000Z")]),
+            raw_list([raw_page("p3", "three", last_edited_time="2022-05-14T10:00:00.000Z")]),
+            raw_list([]),
+        ]
+        assert [str(p) for p in stored_no.databases.db_sync("db1").obj] == ["one", "two"]
+        assert [str(p) for p in stored_no.databases.db_sync("db1").obj] == ["three"]
+        assert len(stored_no.databases.db_sync("db1").obj) == 0
+        bodies = [c[2] for c in stored_no.session.session.calls]
+        assert "filter" not in bodies[0]
+        assert bodies[0]["sorts"] == [{"timestamp": "last_edited_time", "direction": "ascending"}]
+        assert bodies[1]["filter"] == {
+            "timestamp": "last_edited_time", "last_edited_time": {"on_or_after": "2022-05-13T10:00:00.000Z"}
+        }
+        assert bodies[2]["filter"]["last_edited_time"] == {"on_or_after": "2022-05-14T10:00:00.000Z"}
+        assert stored_no.store.get_meta("watermark:db1") == "2022-05-14T10:00:00.000Z"
+        assert stored_no.store.get("p3", max_age=0)["id"] == "p3"
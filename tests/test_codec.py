@@ -0,0 +1,77 @@
+import asyncio
+
+import pytest
+
+import pytion.codec as codec
+from pytion import AsyncNotion, ContentError
+from pytion.codec import JSONCodec, get_codec, orjson, set_codec
+from pytion.query import aiohttp, make_response
+from tests.fixtures import FakeAsyncSession, offline_no, raw_list, raw_page  # noqa: F401
+
+
+class CountingCodec(JSONCodec):
+    name = "counting"
+
+    def __init__(self):
+        self.calls = []
+
+    def dumps(self, obj):
+        self.calls.append("dumps")
+        return super().dumps(obj)
+
+    def loads(self, data):
+        self.calls.append(type(data).__name__)
+        return super().loads(data)
+
+
+@pytest.fixture()
+def counting_codec():
+    new = CountingCodec()
+    previous = set_codec(new)
+    yield new
+    set_codec(previous)
+
+
+class TestCodec:
+    @pytest.mark.parametrize("name", ["json", "orjson"])
+    def test_round_trip(self, name):
+        if name == "orjson" and orjson is None:
+            pytest.skip("orjson is not installed")
+        c = get_codec(name)
+        data = {"title": "Привет", "n": 1.5, "list": [None, True]}
+        assert isinstance(c.dumps(data), bytes)
+        assert c.loads(c.dumps(data)) == data
+        with pytest.raises(ValueError):
+            c.loads(b"<html>")
+
+    def test_auto(self):
+        assert get_codec("auto").name == ("orjson" if orjson is not None else "json")
+        with pytest.raises(ValueError):
+            get_codec("yaml")
+
+    def test_requests(self, offline_no, counting_codec):
+        offline_no.session.session.routes[("post", "databases/db1/query")] = {"object": "list", "results": [
+            raw_page("p1", "one")
+        ], "has_more": False, "next_cursor": None}
+        pages = offline_no.databases.db_query("db1", limit=1)
+        assert str(pages.obj[0]) == "one"
+        assert "dumps" in counting_codec.calls
+        assert "bytes" in counting_codec.calls, "response bytes are decoded directly"
+        assert codec.codec is counting_codec
+
+    def test_content_error(self, offline_no):
+        offline_no.session.session.routes[("get", "pages/p1")] = lambda *args: (200, b"not json", {})
+        with pytest.raises(ContentError):
+            offline_no.pages.get("p1")
+
+    def test_response_body(self):
+        r = make_response("post", "https://x/pages", b'{"a": 1}', 200, "OK", {}, b"{}")
+        assert r.request.body == b'{"a": 1}' and r.request.method == "POST"
+
+    @pytest.mark.skipif(aiohttp is None, reason="aiohttp is not installed")
+    def test_async_encoded_once(self, counting_codec):
+        no = AsyncNotion(token="secret_offline", rate_limit=0)
+        no.session.session = FakeAsyncSession({("post", "databases/db1/query"): raw_list([raw_page("p1", "one")])})
+        pages = asyncio.run(no.databases.db_query("db1", limit=1))
+        assert str(pages.obj[0]) == "one"
+        assert counting_codec.calls.count("dumps") == 1, "the sent body is not encoded again for the response"
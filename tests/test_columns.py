@@ -0,0 +1,60 @@
+from datetime import datetime, timezone
+
+import pytest
+
+from pytion.columns import Column, numpy
+from pytion.models import PageArray
+from tests.fixtures import raw_page
+
+
+def pages():
+    def page(id_, title, price, done, status, due):
+        return raw_page(id_, title, {
+            "Price": {"id": "pr", "type": "number", "number": price},
+            "Done": {"id": "dn", "type": "checkbox", "checkbox": done},
+            "Status": {"id": "st", "type": "select", "select": {"name": status} if status else None},
+            "Due": {"id": "du", "type": "date", "date": {"start": due, "end": None} if due else None},
+        })
+
+    return PageArray([
+        page("p1", "one", 1.5, True, "Open", "2022-05-01"),
+        page("p2", "two", None, False, "Done", None),
+        page("p3", "three", 3, False, "Open", "2022-05-02T10:00:00.000+03:00"),
+    ])
+
+
+class TestColumns:
+    def test_to_columns(self):
+        columns = pages().to_columns(["Name", "Price", "Done", "Status", "Due", "Unknown"])
+        assert columns["Name"].values == ["one", "two", "three"]
+        assert columns["Price"].values.typecode == "d"
+        assert list(columns["Price"]) == [1.5, None, 3.0]
+        assert list(columns["Price"].mask) == [0, 1, 0]
+        assert list(columns["Done"].values) == [1, 0, 0]
+        assert list(columns["Done"]) == [True, False, False]
+        assert columns["Status"].categories == ["Open", "Done"]
+        assert list(columns["Status"].values) == [0, 1, 0]
+        assert columns["Due"].kind == "datetime"
+        assert columns["Due"][0] == datetime(2022, 5, 1, tzinfo=timezone.utc)
+        assert columns["Due"][1] is None
+        assert columns["Due"][2] == datetime(2022, 5, 2, 7, tzinfo=timezone.utc)
+        assert list(columns["Unknown"]) == [None, None, None]
+
+    def test_to_columns__all(self):
+        assert list(pages().to_columns()) == ["Name", "Price", "Done", "Status", "Due"]
+        assert PageArray([]).to_columns() == {}
+
+    @pytest.mark.skipif(numpy is None, reason="numpy is not installed")
+    def test_to_numpy(self):
+        columns = pages().to_columns()
+        assert numpy.nansum(columns["Price"].to_numpy()) == 4.5
+        assert columns["Done"].to_numpy().dtype == bool
+        due = columns["Due"].to_numpy()
+        assert due.dtype == numpy.dtype("datetime64[us]")
+        assert numpy.isnat(due[1])
+        assert list(columns["Status"].to_numpy()) == [0, 1, 0]
+
+    @pytest.mark.skipif(numpy is not None, reason="numpy is installed")
+    def test_to_numpy__missing(self):
+        with pytest.raises(ImportError):
+            Column("Price", "number", [1]).to_numpy()
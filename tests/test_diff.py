@@ -0,0 +1,71 @@
+import pytest
+
+from pytion.diff import block_key, diff_blocks
+from pytion.models import Block, BlockArray
+from tests.fixtures import raw_block
+
+
+def live(*blocks):
+    """(id, text, level) or (id, text, level, type)"""
+    return BlockArray([
+        Block(level=b[2], **raw_block(b[0], b[1], *b[3:], has_children=False)) for b in blocks
+    ], create=True)
+
+
+def desired(*blocks):
+    """(text, level) or (text, level, type)"""
+    return BlockArray([Block.create(b[0], *b[2:], level=b[1]) for b in blocks], create=True)
+
+
+def diff(live_blocks, desired_blocks):
+    return diff_blocks("root", live_blocks.tree(), desired_blocks.tree())
+
+
+class TestDiff:
+    def test_key(self):
+        assert block_key(Block(**raw_block("b1", "text"))) == block_key(Block.create("text"))
+        assert block_key(Block(**raw_block("b1", "text", "to_do"))) == block_key(Block.create("text", "to_do"))
+        assert block_key(Block.create("text", "to_do")) != block_key(Block.create("text", "to_do", checked=True))
+
+    def test_equal(self):
+        assert diff(live(("a", "A", 0), ("b", "B", 1)), desired(("A", 0), ("B", 1))) == []
+
+    def test_one_line(self):
+        ops = diff(live(("a", "A", 0), ("b", "B", 0), ("c", "C", 0)), desired(("A", 0), ("B2", 0), ("C", 0)))
+        assert [(op.action, op.id) for op in ops] == [("update", "b")]
+        assert ops[0].patch["paragraph"]["rich_text"][0]["text"]["content"] == "B2"
+
+    def test_insert_and_archive(self):
+        ops = diff(
+            live(("a", "A", 0), ("b", "B", 0), ("c", "C", 0)),
+            desired(("A", 0), ("new", 0), ("new child", 1), ("C", 0), ("end", 0, "heading_1")),
+        )
+        assert [(op.action, op.id, op.after) for op in ops] == [
+            ("update", "b", None), ("append", "b", None), ("append", "root", "c"),
+        ]
+        assert [b.simple for b in ops[1].blocks] == ["new child"], "children of the updated block"
+        ops = diff(live(("a", "A", 0), ("b", "B", 0, "to_do"), ("c", "C", 0)), desired(("A", 0), ("C", 0)))
+        assert [(op.action, op.id) for op in ops] == [("archive", "b")]
+
+    def test_nested(self):
+        ops = diff(
+            live(("a", "A", 0, "toggle"), ("a1", "inside", 1), ("a2", "old", 1)),
+            desired(("A", 0, "toggle"), ("inside", 1), ("inside 2", 1)),
+        )
+        assert [(op.action, op.id) for op in ops] == [("update", "a2")]
+
+    def test_insert_first(self):
+        ops = diff(live(("a", "A", 0), ("b", "B", 0)), desired(("new", 0), ("A", 0), ("B", 0)))
+        assert [(op.action, op.id, op.after) for op in ops] == [("update", "a", None), ("append", "root", "a")]
+        assert [b.simple for b in ops[1].blocks] == ["A"]
+        ops = diff(live(("a", "A", 0), ("b", "B", 0)), desired(("new", 0, "heading_1"), ("A", 0), ("B", 0)))
+        assert [(op.action, op.id, op.after) for op in ops] == [
+            ("archive", "a", None), ("archive", "b", None), ("append", "root", None),
+        ]
+        assert len(ops[2].blocks) == 3
+
+    def test_protected(self):
+        ops = diff(live(("a", "A", 0), ("p", "Subpage", 0, "child_page")), desired(("A", 0)))
+        assert ops == []
+        with pytest.raises(ValueError):
+            diff(live(("a", "A", 0)), desired(("A", 0), ("", 0, "divider")))
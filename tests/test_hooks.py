@@ -0,0 +1,116 @@
+import asyncio
+
+import pytest
+
+from pytion import AsyncNotion, ObjectNotFound
+from pytion.hooks import HOOKS, Hooks
+from pytion.models import Block, LinkTo, PropertyValue
+from pytion.query import aiohttp
+from tests.fixtures import FakeAsyncSession, offline_no, raw_block, raw_list, raw_page  # noqa: F401
+
+
+RATE_LIMITED = (429, {"object": "error", "status": 429, "code": "rate_limited", "message": ""}, {"Retry-After": "0"})
+
+
+def record(no):
+    events = []
+    for name in HOOKS:
+        no.hooks.add(name, lambda e, name=name: events.append((name, e)))
+    return events
+
+
+class TestHooks:
+    def test_add(self):
+        hooks = Hooks()
+        assert not hooks
+        func = hooks.add("after_response", print)
+        assert hooks and func is print
+        hooks.remove("after_response", print)
+        assert not hooks
+        with pytest.raises(ValueError):
+            hooks.add("after_request", print)
+
+    def test_no_hooks(self, offline_no):
+        offline_no.session.session.routes[("get", "pages/p1")] = raw_page("p1", "one")
+        assert offline_no.session.event("get", "url", None, None, 0, 0) is None
+        assert str(offline_no.pages.get("p1").obj) == "one"
+
+    def test_events(self, offline_no):
+        offline_no.session.session.routes[("post", "databases/db1/query")] = [
+            raw_list([raw_page("p1", "one")], next_cursor="c1"),
+            raw_list([raw_page("p2", "two")]),
+        ]
+        events = record(offline_no)
+        offline_no.databases.db_query("db1")
+        assert [name for name, _ in events] == ["before_request", "after_response"] * 2
+        assert all(e.caller == "db_query" and e.path == "databases/db1/query" for _, e in events)
+        assert [e.page for _, e in events] == [0, 0, 1, 1]
+        response = events[1][1]
+        assert response.status == 200
+        assert response.latency >= 0
+        assert response.response_bytes > 0
+        assert events[3][1].request_bytes > 0, "the second page sends start_cursor"
+
+    def test_retry_and_error(self, offline_no):
+        routes = offline_no.session.session.routes
+        routes[("get", "pages/p1")] = [RATE_LIMITED, raw_page("p1", "one")]
+        events = record(offline_no)
+        offline_no.pages.get("p1")
+        assert [name for name, _ in events] == [
+            "before_request", "after_response", "on_retry", "before_request", "after_response"
+        ]
+        retry = events[2][1]
+        assert (retry.status, retry.delay, retry.attempt) == (429, 0, 0)
+        assert events[3][1].attempt == 1
+
+        events.clear()
+        with pytest.raises(ObjectNotFound):
+            offline_no.pages.get("p2")
+        assert [name for name, _ in events] == ["before_request", "after_response", "on_error"]
+        assert isinstance(events[2][1].error, ObjectNotFound)
+
+    def test_workers(self, offline_no):
+        routes = offline_no.session.session.routes
+        routes[("post", "pages/")] = lambda method, url, body: raw_page("new")
+        for parent in ("root", "b0", "b1", "b2"):
+            routes[("patch", f"blocks/{parent}/children")] = lambda method, url, body: raw_list(
+                [raw_block(f"b{i}") for i, _ in enumerate(body["children"])]
+            )
+        routes[("get", "blocks/root/children")] = raw_list([raw_block(f"c{i}", has_children=True) for i in range(3)])
+        for i in range(3):
+            routes[("get", f"blocks/c{i}/children")] = raw_list([raw_block(f"c{i}1")])
+        events = record(offline_no)
+        rows = [{"title": PropertyValue.create("title", str(i))} for i in range(4)]
+        offline_no.pages.page_create_many(rows, parent=LinkTo.create(page_id="root"), workers=2)
+        # the 4th level goes by follow-ups in the pool
+        blocks = [Block.create(str(level), level=level) for level in range(4)] * 3
+        offline_no.blocks.block_append("root", blocks=blocks, workers=2)
+        offline_no.blocks.get_block_children_recursive("root", workers=2)
+        callers = [(e.path.split("/")[0], e.caller) for name, e in events if name == "before_request"]
+        assert callers == (
+            [("pages", "page_create_many")] * 4 + [("blocks", "block_append")] * 4
+            + [("blocks", "get_block_children_recursive")] * 4
+        )
+
+    def test_failed_hook(self, offline_no):
+        offline_no.session.session.routes[("get", "pages/p1")] = raw_page("p1", "one")
+        offline_no.hooks.add("before_request", lambda e: 1 / 0)
+        assert str(offline_no.pages.get("p1").obj) == "one"
+
+    @pytest.mark.skipif(aiohttp is None, reason="aiohttp is not installed")
+    def test_async(self):
+        no = AsyncNotion(token="secret_offline", rate_limit=0, hooks=Hooks())
+        no.session.session = FakeAsyncSession({("get", "pages/p1"): raw_page("p1", "one")})
+        events = record(no)
+        asyncio.run(no.pages.get("p1"))
+        assert [(name, e.caller) for name, e in events] == [("before_request", "get"), ("after_response", "get")]
+        assert events[1][1].status == 200
+
+    @pytest.mark.skipif(aiohttp is None, reason="aiohttp is not installed")
+    def test_async_tasks(self):
+        no = AsyncNotion(token="secret_offline", rate_limit=0, hooks=Hooks())
+        no.session.session = FakeAsyncSession({("post", "pages/"): lambda method, url, body: raw_page("new")})
+        events = record(no)
+        rows = [{"title": PropertyValue.create("title", str(i))} for i in range(3)]
+        asyncio.run(no.pages.page_create_many(rows, parent=LinkTo.create(page_id="root"), workers=2))
+        assert [e.caller for name, e in events if name == "before_request"] == ["page_create_many"] * 3
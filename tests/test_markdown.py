@@ -0,0 +1,100 @@
+from pytion import envs
+from pytion.markdown import parse, rich_text, text_blocks
+from pytion.models import RichTextArray
+from tests.fixtures import offline_no, raw_block, raw_list  # noqa: F401
+
+
+DOC = """# Title
+Intro line
+continued\\
+after break
+
+- one
+  - nested
+    1. deep
+- [x] done
+- [ ] open
+
+> quoted
+> twice
+
+```py
+def f():
+    return 1
+```
+
+<details>
+<summary>More</summary>
+
+inside
+</details>
+
+---
+#### Small
+"""
+
+
+def plain(block):
+    return "".join(item["text"]["content"] for item in block.get()[block.type]["rich_text"])
+
+
+class TestParse:
+    def test_types(self):
+        blocks = parse(DOC)
+        assert [(b.type, b._level) for b in blocks] == [
+            ("heading_1", 0), ("paragraph", 0), ("bulleted_list_item", 0), ("bulleted_list_item", 1),
+            ("numbered_list_item", 2), ("to_do", 0), ("to_do", 0), ("quote", 0), ("code", 0),
+            ("toggle", 0), ("paragraph", 1), ("heading_3", 0),
+        ]
+        assert [plain(b) for b in blocks] == [
+            "Title", "Intro line continued\nafter break", "one", "nested", "deep", "done", "open",
+            "quoted\ntwice", "def f():\n    return 1", "More", "inside", "Small",
+        ]
+        assert [b.checked for b in blocks if b.type == "to_do"] == [True, False]
+        assert blocks[8].get()["code"]["language"] == "python"
+
+    def test_nesting(self):
+        blocks = parse("- a\n    - b\n\n      text of b\n- c\n\nparagraph")
+        assert [(plain(b), b._level) for b in blocks] == [
+            ("a", 0), ("b", 1), ("text of b", 2), ("c", 0), ("paragraph", 0)
+        ]
+        assert [b["bulleted_list_item"].get("children") is not None for b in blocks.get_nested()[:2]] == [True, False]
+
+    def test_unclosed(self):
+        blocks = parse("<details><summary>Open</summary>\n- a\n```\ncode")
+        assert [(b.type, b._level, plain(b)) for b in blocks] == [
+            ("toggle", 0, "Open"), ("bulleted_list_item", 1, "a"), ("code", 1, "code")
+        ]
+        assert blocks[2].get()["code"]["language"] == "plain text"
+
+    def test_long_text(self):
+        assert rich_text("short") == "short"
+        text = "x" * (envs.RICH_TEXT_MAX * 2 + 1)
+        r_text = rich_text(text)
+        assert isinstance(r_text, RichTextArray)
+        assert [len(item["text"]["content"]) for item in r_text.get()] == [envs.RICH_TEXT_MAX] * 2 + [1]
+        blocks = text_blocks("y" * (envs.RICH_TEXT_MAX * envs.RICH_TEXT_ITEMS_MAX + 5), "code", language="python")
+        assert [len(b.get()["code"]["rich_text"]) for b in blocks] == [envs.RICH_TEXT_ITEMS_MAX, 1]
+        assert parse("z" * 4500)[0].get()["paragraph"]["rich_text"][2]["text"]["content"] == "z" * 500
+
+
+class TestUpload:
+    def test_large_document(self, offline_no):
+        def append(method, url, body):
+            return raw_list([raw_block(f"new{next(counter)}", "created") for _ in body["children"]])
+
+        counter = iter(range(10 ** 6))
+        lines = []
+        for i in range(1000):
+            lines += [f"## Section {i}", f"- item {i}", f"  - nested {i}", f"    - deep {i}", f"      - deeper {i}"]
+        blocks = parse("\n".join(lines))
+        assert len(blocks) == 5000
+        offline_no.session.session.routes[("patch", "blocks/root/children")] = append
+        for i in range(10 ** 4):
+            offline_no.session.session.routes[("patch", f"blocks/new{i}/children")] = append
+        r = offline_no.blocks.block_append("root", blocks=blocks, workers=4)
+        assert len(r.obj) == 2000
+        paths = [path for _, path, _ in offline_no.session.session.calls]
+        # 2000 top level blocks by 100, the 4th level of every list goes by a follow-up
+        assert paths.count("blocks/root/children") == 20
+        assert len(paths) == 20 + 1000
@@ -0,0 +1,84 @@
+import pytest
+
+from pytion.mirror import DatabaseMirror
+from tests.fixtures import offline_no, raw_database, raw_list, raw_page, raw_rich_text
+
+
+def task(id_, title, price, done, tags, last_edited_time="2022-05-12T10:00:00.000Z"):
+    return raw_page(id_, title, {
+        "Price": {"id": "p", "type": "number", "number": price},
+        "Done": {"id": "d", "type": "checkbox", "checkbox": done},
+        "Tags": {"id": "t", "type": "multi_select", "multi_select": [{"name": tag} for tag in tags]},
+    }, last_edited_time=last_edited_time)
+
+
+@pytest.fixture()
+def mirror(offline_no):
+    offline_no.session.session.routes[("get", "databases/db1")] = raw_database("db1", {
+        "Price": {"id": "p", "name": "Price", "type": "number", "number": {"format": "number"}},
+        "Done": {"id": "d", "name": "Done", "type": "checkbox", "checkbox": {}},
+        "Tags": {"id": "t", "name": "Tags", "type": "multi_select", "multi_select": {"options": []}},
+    })
+    offline_no.session.session.routes[("post", "databases/db1/query")] = [
+        raw_list([task("p1", "one", 10, False, ["a"]), task("p2", "two", 25.5, True, ["a", "b"])]),
+        raw_list([task("p2", "two", 30, True, ["b"], last_edited_time="2022-05-13T10:00:00.000Z")]),
+    ]
+    m = DatabaseMirror(offline_no.databases.get("db1"), indexes=["Price"])
+    yield m
+    m.close()
+
+
+class TestDatabaseMirror:
+    def test_lookups(self, mirror):
+        assert mirror.refresh() == 2
+        assert len(mirror) == 2
+        assert [str(p) for p in mirror.get("Done", True)] == ["two"]
+        assert [str(p) for p in mirror.get("Name", "one")] == ["one"]
+        assert [str(p) for p in mirror.range("Price", 20)] == ["two"]
+        assert [str(p) for p in mirror.range("Price", descending=True)] == ["two", "one"]
+        assert mirror.get("Tags", ["a", "b"])[0].properties["Tags"].value == ["a", "b"]
+
+    def test_incremental_refresh(self, mirror, offline_no):
+        mirror.refresh()
+        assert mirror.refresh() == 1
+        body = offline_no.session.session.calls[-1][2]
+        assert body["filter"]["last_edited_time"] == {"on_or_after": "2022-05-12T10:00:00.000Z"}
+        assert mirror.watermark == "2022-05-13T10:00:00.000Z"
+        assert [str(p) for p in mirror.range("Price", 30, 30)] == ["two"]
+        assert len(mirror) == 2
+
+    def test_index(self, mirror):
+        plan = mirror.connection.execute(
+            f"EXPLAIN QUERY PLAN SELECT raw FROM {mirror.quote(mirror.table)} WHERE \"p_Price\" = 10"
+        ).fetchall()
+        assert "INDEX" in str(plan)
+        with pytest.raises(ValueError):
+            DatabaseMirror(mirror.element, indexes=["Unknown"])
+
+    def test_background(self, mirror):
+        mirror.start(interval=10)
+        mirror.stop()
+        assert len(mirror) == 2
+
+    def test_reserved_names(self, offline_no):
+        offline_no.session.session.routes[("get", "databases/db2")] = raw_database("db2", {
+            "ID": {"id": "i", "name": "ID", "type": "rich_text", "rich_text": {}},
+            "Raw": {"id": "r", "name": "Raw", "type": "number", "number": {"format": "number"}},
+            "raw": {"id": "s", "name": "raw", "type": "number", "number": {"format": "number"}},
+        })
+        offline_no.session.session.routes[("post", "databases/db2/query")] = raw_list([raw_page("p1", "one", {
+            "ID": {"id": "i", "type": "rich_text", "rich_text": [raw_rich_text("TASK-1")]},
+            "Raw": {"id": "r", "type": "number", "number": 1},
+            "raw": {"id": "s", "type": "number", "number": 2},
+        })])
+        m = DatabaseMirror(offline_no.databases.get("db2"), indexes=["ID"])
+        try:
+            assert m.columns == {"Name": "p_Name", "ID": "p_ID", "Raw": "p_Raw", "raw": "p_raw_2"}
+            assert m.refresh() == 1
+            assert [p.id for p in m.get("ID", "TASK-1")] == ["p1"]
+            assert [p.id for p in m.get("raw", 2)] == ["p1"]
+            assert len(m.get("Raw", 2)) == 0
+            with pytest.raises(ValueError):
+                m.get("Unknown", 1)
+        finally:
+            m.close()
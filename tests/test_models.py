@@ -1,4 +1,10 @@
+import copy
+
+import pytest
+
+import pytion.envs as envs
 from pytion.models import *
+from tests.fixtures import raw_block, raw_page
 
 
 class TestProperty:
@@ -224,3 +230,118 @@ class TestBlock:
         assert b.id == ""
         assert b.type == "heading_2"
         assert b_dict["heading_2"]["is_toggleable"] is True
+
+
+class TestBlockArray:
+    def test_get__nested(self):
+        blocks = BlockArray([
+            Block.create("toggle", type_="toggle"),
+            Block.create("inside", level=1),
+            Block.create("deeper", level=2),
+            Block.create("next"),
+        ], create=True)
+        assert len(blocks.get()) == 4, "get() is flat"
+        data = blocks.get_nested()
+        assert len(data) == 2
+        inside = data[0]["toggle"]["children"][0]
+        assert inside["paragraph"]["rich_text"][0]["text"]["content"] == "inside"
+        assert inside["paragraph"]["children"][0]["paragraph"]["rich_text"][0]["text"]["content"] == "deeper"
+        assert "children" not in data[1]["paragraph"]
+
+    def test_get__not_created_parent(self):
+        blocks = BlockArray([
+            Block.create("", type_="divider"), Block.create("inside", level=1), Block.create("next")
+        ], create=True)
+        assert blocks.get()[0] is None
+        with pytest.raises(ValueError):
+            blocks.get_nested()
+        with pytest.raises(ValueError):
+            blocks.batches()
+        assert len(BlockArray([Block.create("", type_="divider")], create=True).batches()[0]) == 1
+
+    def test_batches(self):
+        blocks = [Block.create(f"b{i}") for i in range(5)]
+        blocks[1:1] = [Block.create("c1", level=1), Block.create("c2", level=2)]
+        blocks[4:4] = [Block.create("d1", level=1), Block.create("d2", level=2), Block.create("d3", level=3)]
+        batches = BlockArray(blocks, create=True).batches(size=2)
+        assert [len(batch) for batch in batches] == [2, 2, 1]
+        (b0, later0), (b1, later1) = batches[0]
+        assert later0 is None, "2 levels of nesting are sent at once"
+        assert b0["paragraph"]["children"][0]["paragraph"]["children"]
+        assert "children" not in b1["paragraph"]
+        assert [b.simple for b in later1] == ["d1", "d2", "d3"], "too deep subtree is appended later"
+
+    def test_batches__limits(self):
+        wide = [Block.create("parent")] + [Block.create(f"c{i}", level=1) for i in range(3)]
+        assert BlockArray(wide, create=True).batches(size=2)[0][0][1] is not None, "too many children"
+        batches = BlockArray(wide + wide, create=True).batches(size=3, total=5)
+        assert [len(batch) for batch in batches] == [1, 1], "total number of blocks in one request"
+        assert all(later is None for batch in batches for _, later in batch)
+
+
+class TestLazy:
+    properties = {
+        "Digit": {"id": "dg", "type": "number", "number": 5},
+        "Tags": {"id": "tg", "type": "multi_select", "multi_select": [{"name": "a"}]},
+    }
+
+    def test_page(self):
+        page = Page(lazy=True, **raw_page("p1", "lazy title", self.properties))
+        assert isinstance(page.properties, PropertyMap)
+        assert page.properties.decoded == {}
+        assert page.properties["Digit"].value == 5
+        assert list(page.properties.decoded) == ["Digit"]
+        assert page.properties["Digit"] is page.properties["Digit"]
+        assert str(page) == "lazy title"
+        assert "lazy" not in page.raw
+        eager = Page(**raw_page("p1", "lazy title", self.properties))
+        assert page.get() == eager.get()
+        assert list(page.properties) == ["Name", "Digit", "Tags"]
+
+    def test_page__envs(self, monkeypatch):
+        monkeypatch.setattr(envs, "LAZY_DECODING", True)
+        pages = PageArray([raw_page("p1", "one"), raw_page("p2", "two")])
+        assert all(isinstance(p.properties, PropertyMap) for p in pages)
+        assert [str(p) for p in pages] == ["one", "two"]
+        assert isinstance(PageArray([raw_page("p1")], lazy=False)[0].properties, dict)
+
+    @pytest.mark.parametrize("type_", ["paragraph", "heading_2", "to_do", "quote", "child_page"])
+    def test_block(self, type_):
+        raw = raw_block("b1", "lazy text", type_=type_)
+        if type_ == "child_page":
+            raw[type_] = {"title": "lazy text"}
+        block = Block(lazy=True, **raw)
+        assert block._pending is not None
+        assert block.id == "b1" and block.type == type_
+        assert block._pending is not None, "id and type do not decode the content"
+        eager = Block(**raw)
+        assert block.simple == eager.simple
+        assert block._pending is None
+        assert str(block) == str(eager)
+        assert str(block.parent) == str(eager.parent)
+        with pytest.raises(AttributeError):
+            block.unknown_attr
+        assert str(copy.deepcopy(block)) == str(eager)
+
+    def test_block__array(self):
+        blocks = BlockArray([raw_block("b1", "one"), raw_block("b2", "two")], lazy=True)
+        assert all(b._pending is not None for b in blocks)
+        assert blocks.simple == "one\ntwo"
+
+
+class TestCompact:
+    def test_slots(self):
+        block = Block(**raw_block("b1", "text"))
+        page = Page(**raw_page("p1", "title"))
+        for obj in (block, block.text[0], block.created_by, block.parent, page.properties["Name"]):
+            assert not hasattr(obj, "__dict__"), type(obj)
+        assert block.object == "block"
+
+    def test_interned(self):
+        blocks = BlockArray([raw_block("b1", "one"), raw_block("b2", "two")])
+        assert blocks[0].created_by is blocks[1].last_edited_by
+        assert blocks[0].text[0].annotations is blocks[1].text[0].annotations
+        raw = blocks[1].raw["paragraph"]["rich_text"][0]["annotations"]
+        assert raw is blocks[0].text[0].annotations, "the decoded copy in the raw payload is replaced"
+        full = User.intern({"object": "user", "id": blocks[0].created_by.id, "name": "Full"})
+        assert full is not blocks[0].created_by and full.name == "Full"
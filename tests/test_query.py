@@ -1,10 +1,20 @@
+import asyncio
+import http.server
+import socket
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
 import requests
+from urllib3.exceptions import MaxRetryError, NewConnectionError
 import pytest
 
 import pytion.envs as envs
-from pytion import InvalidRequestURL, ContentError, ValidationError, ObjectNotFound
-from pytion.query import Sort
-from pytion.models import Page
+from pytion import Notion, AsyncNotion, InvalidRequestURL, ContentError, ValidationError, ObjectNotFound
+from pytion import RateLimited, ServiceUnavailable
+from pytion.query import Filter, Sort, RateLimiter, RetryPolicy, aiohttp
+from pytion.models import Page, PageArray
+from tests.fixtures import offline_no, raw_block, raw_list, raw_page, raw_rich_text, raw_user
 
 
 class TestRequest:
@@ -166,8 +176,357 @@ class TestRequest:
         assert r["next_cursor"] is None
 
 
+class TestRequestOffline:
+    def test_prepare_url__get_paging(self, offline_no):
+        url, data = offline_no.session.prepare_url(
+            "get", "blocks", "123", after_path="children", limit=10, start_cursor="abc"
+        )
+        assert url == envs.NOTION_URL + "blocks/123/children?page_size=10&start_cursor=abc"
+        assert data is None
+
+    def test_prepare_url__post_paging(self, offline_no):
+        body = {"filter": {}}
+        url, data = offline_no.session.prepare_url("post", "databases", "123", body, "query", start_cursor="abc")
+        assert url == envs.NOTION_URL + "databases/123/query"
+        assert data == {"filter": {}, "start_cursor": "abc"}
+        assert body == {"filter": {}}
+
+    def test_method__paginate_get(self, offline_no):
+        offline_no.session.session.routes = {
+            ("get", "blocks/123/children"): raw_list([raw_block("b1")], next_cursor="c1"),
+            ("get", "blocks/123/children?start_cursor=c1"): raw_list([raw_block("b2")]),
+        }
+        r = offline_no.session.method("get", "blocks", "123", after_path="children")
+        assert [b["id"] for b in r["results"]] == ["b1", "b2"]
+        assert r["has_more"] is False
+
+
+class TestRateLimiter:
+    def test_reserve__burst(self):
+        limiter = RateLimiter(rate=10, burst=2)
+        assert limiter.reserve() == 0
+        assert limiter.reserve() == 0
+        assert limiter.reserve() == pytest.approx(0.1, abs=0.01)
+        assert limiter.reserve() == pytest.approx(0.2, abs=0.01)
+
+    def test_reserve__disabled(self):
+        limiter = RateLimiter(rate=0)
+        assert all(limiter.reserve() == 0 for _ in range(100))
+
+    def test_reserve__threads(self):
+        limiter = RateLimiter(rate=100, burst=1)
+        waits = []
+        threads = [threading.Thread(target=lambda: waits.append(limiter.reserve())) for _ in range(20)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        # every thread got its own slot
+        assert max(waits) == pytest.approx(0.19, abs=0.02)
+        assert len(set(round(w, 2) for w in waits)) == 20
+
+    def test_shared_by_elements(self):
+        no = Notion(token="secret_offline", rate_limit=5, rate_burst=1)
+        assert no.pages.api.session.limiter is no.blocks.api.session.limiter
+        assert no.session.limiter.rate == 5
+
+
+@pytest.fixture()
+def silent_server():
+    """Local port which accepts connections (by the backlog) and never answers"""
+    server = socket.socket()
+    server.bind(("127.0.0.1", 0))
+    server.listen(16)
+    yield f"http://127.0.0.1:{server.getsockname()[1]}/"
+    server.close()
+
+
+@pytest.fixture()
+def user_server():
+    """Local keep-alive HTTP server answering with the user object. Yields (base URL, list of connections)"""
+    connections = []
+
+    class Handler(http.server.BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def setup(self):
+            connections.append(self.client_address)
+            super().setup()
+
+        def do_GET(self):
+            body = b'{"object": "user", "id": "u1", "type": "bot", "name": "bot"}'
+            self.send_response(200)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_HEAD(self):
+            self.send_response(200)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+
+        def log_message(self, *args):
+            pass
+
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_address[1]}/", connections
+    server.shutdown()
+    server.server_close()
+
+
+class TestConnections:
+    def test_options(self):
+        no = Notion(token="secret_offline", pool_size=4, keep_alive=False, connect_timeout=1, read_timeout=2)
+        assert no.session.session.get_adapter(envs.NOTION_URL)._pool_maxsize == 4
+        assert no.session.session.headers["Connection"] == "close"
+        assert no.session.timeout == (1, 2)
+        assert Notion(token="secret_offline").session.session.headers["Connection"] == "keep-alive"
+
+    def test_method__timeout(self, offline_no):
+        sent = []
+        fake = offline_no.session.session
+        fake.routes[("get", "pages/p1")] = raw_page("p1", "one")
+        request = fake.request
+        fake.request = lambda *args, **kwargs: sent.append(kwargs) or request(*args, **kwargs)
+        offline_no.pages.get("p1")
+        assert sent[0]["timeout"] == (envs.CONNECT_TIMEOUT, envs.READ_TIMEOUT)
+
+    def test_read_timeout(self, silent_server):
+        no = Notion(token="secret_offline", rate_limit=0, max_retries=0, read_timeout=0.2)
+        no.session.base = silent_server
+        start = time.monotonic()
+        with pytest.raises(requests.Timeout):
+            no.session.method("get", "pages", id_="p1")
+        assert time.monotonic() - start < 2
+
+    def test_warm_up(self, user_server):
+        base, connections = user_server
+        no = Notion(token="secret_offline", pool_size=2)
+        no.session.base = base
+        assert no.session.warm_up(5) == 2
+        assert len(connections) == 2
+
+    def test_warm_up__reused(self, user_server):
+        base, connections = user_server
+        no = Notion(token="secret_offline", rate_limit=0, pool_size=4)
+        no.session.base = base
+        assert no.session.warm_up(4) == 4
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            list(pool.map(lambda _: no.session.method("get", "users", id_="u1"), range(40)))
+        assert len(connections) == 4
+
+    def test_warm_up__failed(self, silent_server):
+        no = Notion(token="secret_offline")
+        no.session.base = "http://127.0.0.1:1/"
+        assert no.session.warm_up(2) == 0
+        no = Notion(token="secret_offline", read_timeout=0.2)
+        no.session.base = silent_server
+        assert no.session.warm_up(2) == 0
+
+    @pytest.mark.skipif(aiohttp is None, reason="aiohttp is not installed")
+    def test_async_warm_up(self, user_server):
+        base, connections = user_server
+
+        async def run():
+            no = AsyncNotion(token="secret_offline", rate_limit=0, pool_size=3, warm_up=3)
+            no.session.base = base
+            async with no:
+                assert len(connections) == 3
+                await asyncio.gather(*(no.session.method("get", "users", id_="u1") for _ in range(12)))
+
+        asyncio.run(run())
+        assert len(connections) == 3, "requests are sent by the warmed connections"
+
+    @pytest.mark.skipif(aiohttp is None, reason="aiohttp is not installed")
+    def test_async_warm_up__failed(self):
+        async def run():
+            async with AsyncNotion(token="secret_offline") as no:
+                no.session.base = "http://127.0.0.1:1/"
+                return await no.session.warm_up(2)
+
+        assert asyncio.run(run()) == 0
+
+
+RATE_LIMITED = (429, {"object": "error", "status": 429, "code": "rate_limited", "message": ""}, {"Retry-After": "0"})
+UNAVAILABLE = (503, {"object": "error", "status": 503, "code": "service_unavailable", "message": ""}, {})
+
+
+class TestRetry:
+    def test_delay__retry_after(self, offline_no):
+        offline_no.session.session.routes[("get", "pages/123")] = (
+            429, {"object": "error", "status": 429, "code": "rate_limited", "message": ""}, {"Retry-After": "7"}
+        )
+        offline_no.session.retry.max_retries = 0
+        with pytest.raises(RateLimited) as e:
+            offline_no.session.method("get", "pages", "123")
+        assert e.value.retry_after == 7
+        assert RetryPolicy(max_retries=1).delay(0, e.value) == 7
+        assert RetryPolicy(max_retries=1).delay(1, e.value) is None
+
+    def test_delay__backoff(self):
+        policy = RetryPolicy(max_retries=10, backoff=1, max_backoff=5)
+        error = requests.ConnectionError()
+        assert all(0 <= policy.delay(attempt, error) <= min(5, 2 ** attempt) for attempt in range(10))
+        assert policy.delay(0, ObjectNotFound.__new__(ObjectNotFound)) is None
+
+    def test_method__retry(self, offline_no):
+        offline_no.session.session.routes[("get", "pages/123")] = [RATE_LIMITED, UNAVAILABLE, {"object": "page"}]
+        offline_no.session.retry.backoff = 0
+        r = offline_no.session.method("get", "pages", "123")
+        assert r == {"object": "page"}
+        assert len(offline_no.session.session.calls) == 3
+
+    def test_method__retry_exhausted(self, offline_no):
+        offline_no.session.session.routes[("get", "pages/123")] = [UNAVAILABLE, UNAVAILABLE]
+        offline_no.session.retry.backoff = 0
+        offline_no.session.retry.max_retries = 1
+        with pytest.raises(ServiceUnavailable):
+            offline_no.session.method("get", "pages", "123")
+
+    def test_paginate__keeps_cursor(self, offline_no):
+        offline_no.session.retry.backoff = 0
+        offline_no.session.session.routes = {
+            ("post", "databases/123/query"): [
+                raw_list([raw_block("b1")], next_cursor="c1"),
+                RATE_LIMITED,
+                raw_list([raw_block("b2")]),
+            ],
+        }
+        r = offline_no.session.method("post", "databases", "123", data={}, after_path="query")
+        assert [b["id"] for b in r["results"]] == ["b1", "b2"]
+        assert [call[2] for call in offline_no.session.session.calls] == [
+            {}, {"start_cursor": "c1"}, {"start_cursor": "c1"}
+        ]
+
+    def test_is_idempotent(self):
+        url = envs.NOTION_URL
+        assert RetryPolicy.is_idempotent("get", url + "blocks/1/children?page_size=10")
+        assert RetryPolicy.is_idempotent("patch", url + "pages/1")
+        assert RetryPolicy.is_idempotent("post", url + "databases/1/query?filter_properties=title")
+        assert not RetryPolicy.is_idempotent("post", url + "pages")
+        assert not RetryPolicy.is_idempotent("patch", url + "blocks/1/children")
+
+    def test_not_idempotent__read_timeout(self, offline_no):
+        def timeout(*args):
+            raise requests.ReadTimeout()
+
+        offline_no.session.retry.backoff = 0
+        offline_no.session.session.routes[("post", "pages/")] = timeout
+        with pytest.raises(requests.ReadTimeout):
+            offline_no.session.method("post", "pages", data={"properties": {}})
+        assert len(offline_no.session.session.calls) == 1, "the page may be created, the request is not sent again"
+
+    def test_not_idempotent__not_processed(self, offline_no):
+        def refused(*args):
+            raise requests.ConnectionError(MaxRetryError(None, "url", NewConnectionError(None, "refused")))
+
+        offline_no.session.retry.backoff = 0
+        offline_no.session.session.routes[("post", "pages/")] = [
+            refused, RATE_LIMITED, (503, UNAVAILABLE[1], {"Retry-After": "0"}), {"object": "page"}
+        ]
+        assert offline_no.session.method("post", "pages", data={}) == {"object": "page"}
+        assert len(offline_no.session.session.calls) == 4
+
+        offline_no.session.session.routes[("patch", "blocks/b1/children")] = [UNAVAILABLE, raw_list([])]
+        with pytest.raises(ServiceUnavailable):
+            offline_no.session.method("patch", "blocks", "b1", after_path="children", data={"children": []})
+        assert len(offline_no.session.session.calls) == 5
+
+    def test_paginate__partial_result(self, offline_no):
+        offline_no.session.retry.max_retries = 0
+        offline_no.session.session.routes = {
+            ("get", "blocks/123/children"): raw_list([raw_block("b1")], next_cursor="c1"),
+            ("get", "blocks/123/children?start_cursor=c1"): UNAVAILABLE,
+        }
+        with pytest.raises(ServiceUnavailable) as e:
+            offline_no.session.method("get", "blocks", "123", after_path="children")
+        assert [b["id"] for b in e.value.partial_result["results"]] == ["b1"]
+        assert e.value.partial_result["next_cursor"] == "c1"
+
+
+def local_pages():
+    def page(id_, title, digit, done, tags, date, last_edited_time):
+        return raw_page(id_, title, {
+            "Digit": {"id": "dg", "type": "number", "number": digit},
+            "Done": {"id": "dn", "type": "checkbox", "checkbox": done},
+            "Tags": {"id": "tg", "type": "multi_select", "multi_select": [{"name": tag} for tag in tags]},
+            "Date": {"id": "dt", "type": "date", "date": {"start": date, "end": None} if date else None},
+            "Owner": {"id": "ow", "type": "people", "people": [raw_user()] if done else []},
+            "Note": {"id": "nt", "type": "rich_text", "rich_text": [raw_rich_text(title.upper())]},
+        }, last_edited_time=last_edited_time)
+
+    return PageArray([
+        page("p1", "first page", 2, True, ["a"], "2022-05-01", "2022-05-12T10:00:00.000Z"),
+        page("p2", "second", None, False, ["a", "b"], "2022-05-02T15:00:00.000+03:00", "2022-05-13T10:00:00.000Z"),
+        page("p3", "third page", 1, False, [], None, "2022-05-11T10:00:00.000Z"),
+    ])
+
+
 class TestFilter:
-    pass
+    @pytest.mark.parametrize("kwargs,expected", [
+        ({"property_name": "title", "property_type": "title", "value": "PAGE"}, ["p1", "p3"]),
+        ({"property_name": "Note", "property_type": "rich_text", "value": "sec", "condition": "starts_with"}, ["p2"]),
+        ({"property_name": "Digit", "property_type": "number", "value": "2"}, ["p1"]),
+        ({"property_name": "Digit", "property_type": "number", "value": "1.5", "condition": "greater_than"}, ["p1"]),
+        ({"property_name": "Digit", "property_type": "number", "value": "0", "condition": "is_empty"}, ["p2"]),
+        ({"property_name": "Done", "property_type": "checkbox", "value": True}, ["p1"]),
+        ({"property_name": "Tags", "property_type": "multi_select", "value": "b"}, ["p2"]),
+        ({"property_name": "Tags", "property_type": "multi_select", "condition": "is_not_empty"}, ["p1", "p2"]),
+        ({"property_name": "Date", "property_type": "date", "value": "2022-05-02"}, ["p2"]),
+        ({"property_name": "Date", "property_type": "date", "value": "2022-05-02T00:00:00Z", "condition": "before"},
+         ["p1"]),
+        ({"property_name": "Date", "property_type": "date", "condition": "past_week"}, []),
+        ({"property_name": "Owner", "property_type": "people", "value": raw_user()["id"]}, ["p1"]),
+        ({"property_name": "last_edited_time", "property_type": "timestamp", "value": "2022-05-12",
+          "condition": "on_or_after"}, ["p1", "p2"]),
+    ])
+    def test_apply(self, kwargs, expected):
+        pages = Filter(**kwargs).apply(local_pages())
+        assert isinstance(pages, PageArray)
+        assert [p.id for p in pages] == expected
+
+    def test_apply__raw(self):
+        f = Filter(raw={"or": [
+            {"property": "Digit", "number": {"less_than": 2}},
+            {"and": [
+                {"property": "Done", "checkbox": {"equals": False}},
+                {"property": "Tags", "multi_select": {"contains": "b"}},
+            ]},
+        ]})
+        assert [p.id for p in f.apply(local_pages())] == ["p2", "p3"]
+
+    def test_compound(self):
+        done = Filter(property_name="Done", property_type="checkbox", value=True)
+        digit = Filter(property_name="Digit", property_type="number", value="1")
+        tag = Filter(property_name="Tags", property_type="multi_select", value="b")
+        f = done | digit | tag
+        assert list(f.filter) == ["or"] and len(f.filter["or"]) == 3, "same operators are flattened"
+        assert f.depth == 1
+        f = (done | digit) & tag & (digit | tag)
+        assert f.filter == {
+            "and": [{"or": [done.filter, digit.filter]}, tag.filter, {"or": [digit.filter, tag.filter]}]
+        }
+        assert f.depth == 2
+        empty = Filter(raw={"property": "Digit", "number": {"is_empty": True}})
+        assert [p.id for p in ((done | tag) & empty).apply(local_pages())] == ["p2"]
+        with pytest.raises(ValueError):
+            (done & (digit | (tag & done))) | tag
+
+    def test_compound__query(self, offline_no):
+        offline_no.session.session.routes[("post", "databases/db1/query")] = raw_list([raw_page("p1")])
+        f = Filter(property_name="Done", property_type="checkbox") & Filter(
+            property_name="Tags", property_type="multi_select", value="b"
+        )
+        offline_no.databases.db_query("db1", filter_=f)
+        assert offline_no.session.session.calls[0][2]["filter"] == {"and": [
+            {"property": "Done", "checkbox": {"equals": True}},
+            {"property": "Tags", "multi_select": {"contains": "b"}},
+        ]}
+
+    def test_apply__unknown_property(self):
+        with pytest.raises(ValueError):
+            Filter(property_name="Unknown", property_type="select", value="x").apply(local_pages())
 
 
 class TestSort:
@@ -191,6 +550,16 @@ class TestSort:
         assert "friends" in str(r.obj[0])
         assert bool(r.obj[3].title) is False
 
+    def test_apply(self):
+        s = Sort("Digit", "descending")
+        s.add("title", "ascending")
+        assert [p.id for p in s.apply(local_pages())] == ["p1", "p3", "p2"], "empty value is the last"
+        assert [p.id for p in Sort("Digit").apply(local_pages())] == ["p3", "p1", "p2"]
+        assert [p.id for p in Sort("last_edited_time", "descending").apply(local_pages())] == ["p2", "p1", "p3"]
+        s = Sort("Done", "descending")
+        s.add("Date", "descending")
+        assert [p.id for p in s.apply(local_pages())] == ["p1", "p2", "p3"]
+
     def test_query__invalid_direction(self):
         with pytest.raises(ValueError):
             Sort("Digit", "reverse")
@@ -0,0 +1,85 @@
+import io
+
+import pytest
+
+from pytion.models import Block, BlockArray
+from pytion.render import Renderer, render
+from tests.fixtures import raw_block, raw_rich_text
+
+
+def blocks():
+    raws = [
+        (raw_block("h", "Title", "heading_1"), 0),
+        (raw_block("p", "Intro"), 0),
+        (raw_block("l1", "one", "bulleted_list_item", has_children=True), 0),
+        (raw_block("l11", "nested", "bulleted_list_item"), 1),
+        (raw_block("l2", "two", "bulleted_list_item"), 0),
+        (raw_block("t", "task", "to_do"), 0),
+        (raw_block("c", "print(1)\nprint(2)", "code"), 0),
+        (raw_block("q", "<quoted>", "quote"), 0),
+    ]
+    raws[5][0]["to_do"]["checked"] = True
+    raws[6][0]["code"].update(language="python", caption=[])
+    bold = raw_rich_text("bold")
+    bold["annotations"]["bold"] = True
+    raws[1][0]["paragraph"]["rich_text"].append(bold)
+    return BlockArray([Block(level=level, **raw) for raw, level in raws], create=True)
+
+
+class TestRender:
+    def test_markdown(self):
+        assert blocks().render() == (
+            "# Title\n"
+            "Intro**bold**\n"
+            "- one\n"
+            "    - nested\n"
+            "- two\n"
+            "- [x] task\n"
+            "```python\nprint(1)\nprint(2)\n```\n"
+            "> <quoted>\n"
+        )
+
+    def test_text(self):
+        out = io.StringIO()
+        assert render(blocks(), out, fmt="text") is None
+        assert out.getvalue().splitlines() == blocks().simple.splitlines()
+
+    def test_html(self):
+        assert blocks().render(fmt="html") == (
+            "<h1>Title</h1>\n"
+            "<p>Intro<strong>bold</strong></p>\n"
+            "<ul>\n<li>one<ul>\n<li>nested</li>\n</ul>\n</li>\n<li>two</li>\n"
+            '<li><input type="checkbox" disabled checked> task</li>\n</ul>\n'
+            '<pre><code class="language-python">print(1)\nprint(2)</code></pre>\n'
+            "<blockquote>&lt;quoted&gt;</blockquote>\n"
+        )
+
+    def test_links(self):
+        raw = raw_block("p", "")
+        for text, url in (("safe", "https://example.com/?a=1&b=2"), ("js", " JavaScript:alert(1)"), ("rel", "/page")):
+            item = raw_rich_text(text)
+            item["href"] = url
+            raw["paragraph"]["rich_text"].append(item)
+        bookmark = raw_block("b", "", "bookmark")
+        bookmark["bookmark"] = {"url": "java\tscript:alert(1)", "caption": []}
+        html = render([Block(**raw), Block(**bookmark)], fmt="html")
+        assert html == (
+            '<p><a href="https://example.com/?a=1&amp;b=2">safe</a>js<a href="/page">rel</a></p>\n'
+            "<p></p>\n"
+        )
+        assert render([Block(**raw)]) == "[safe](https://example.com/?a=1&b=2)js[rel](/page)\n"
+
+    def test_code_fence(self):
+        raw = raw_block("c", "before\n```\nafter ````", "code")
+        raw["code"].update(language="", caption=[])
+        assert render([Block(**raw)]) == "`````\nbefore\n```\nafter ````\n`````\n"
+
+    def test_lazy_and_created(self):
+        lazy = Block(lazy=True, **raw_block("p", "lazy"))
+        created = Block.create("created", type_="heading_2")
+        assert render([lazy, created]) == "lazy\n## created\n"
+        assert lazy._pending is not None, "rendered without decoding"
+
+    def test_format(self):
+        with pytest.raises(ValueError):
+            Renderer(io.StringIO(), "pdf")